@@ -10,7 +10,6 @@ dependencies = [
     "httpcore[http2]",
     "httpx==0.23.1",
     "tabulate",
-    "anytree",
     "humanize",
 ]
 
@@ -27,5 +26,8 @@ setup(
     packages=['tiny'],
     install_requires=dependencies,
     python_requires=">=3.7",
+    entry_points={
+        'console_scripts': ['tiny=tiny.cli:main'],
+    },
     zip_safe=False
 )
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+# tiny reads these on import, so every manifest, checkpoint and job store of the run lands in a scratch directory
+os.environ['TINYBIO_CACHE_DIR'] = tempfile.mkdtemp(prefix='tiny-tests-')
+os.environ['TINYBIO_AUTH_TOKEN'] = 'test-token'
+
+import pytest
+
+from tiny.client import Client
+from tiny.jobstore import JobStore
+from tiny.main import Workbench
+from tiny.mockserver import MockServer
+from tiny.retry import RetryPolicy
+
+WORKBENCH_NAME = 'test-workbench'
+
+
+@pytest.fixture
+def server():
+    with MockServer(objects=0) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    client = Client(base_url=server.url, http2=False, retry_policy=RetryPolicy(max_retries=0))
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def workbench(client, tmp_path):
+    workbench = Workbench(WORKBENCH_NAME, client=client, job_store=JobStore(str(tmp_path / 'jobs.sqlite')))
+    yield workbench
+    workbench.manifest.clear()
+    workbench.manifest.close()
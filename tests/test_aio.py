@@ -0,0 +1,29 @@
+import asyncio
+
+from tiny.aio import AsyncWorkbench
+from tiny.client import AsyncClient
+from tiny.retry import RetryPolicy
+from tiny.workflow import JobStatus
+
+from conftest import WORKBENCH_NAME
+
+
+def test_jobs_of_an_earlier_session_are_visible(server, workbench):
+    server.api.job_duration = 0
+    job = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+
+    async def session():
+        client = AsyncClient(base_url=server.url, http2=False, retry_policy=RetryPolicy(max_retries=0))
+        try:
+            async_workbench = AsyncWorkbench(WORKBENCH_NAME, client=client, job_store=workbench.job_store)
+            done, not_done = await async_workbench.wait_all(timeout=10)
+            records = await async_workbench.jobs()
+            return done, not_done, records
+        finally:
+            await client.aclose()
+
+    done, not_done, records = asyncio.run(session())
+    assert [async_job.job_id for async_job in done] == [job.job_id] and not not_done
+    assert [record.job_id for record in records] == [job.job_id]
+    assert records[0].status == JobStatus.SUCCEEDED.__str__()
+    assert workbench.job_store.get(WORKBENCH_NAME, job.job_id)['status'] == JobStatus.SUCCEEDED.name
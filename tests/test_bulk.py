@@ -0,0 +1,59 @@
+from tiny.storage import move_file
+
+from conftest import WORKBENCH_NAME
+
+
+def _put(server, *paths: str):
+    with server.api.lock:
+        files = server.api.workbench(WORKBENCH_NAME)
+        for path in paths:
+            files.put(path, path.encode())
+
+
+def _names(server) -> list:
+    return sorted(server.api.workbench(WORKBENCH_NAME).files)
+
+
+def test_dry_run_changes_nothing(server, workbench):
+    _put(server, 'output/run-1/a.bam', 'output/run-1/logs/a.log')
+
+    plan = workbench.move_dir('output/run-1/', 'output/archive/run-1/', dry_run=True)
+    assert [(item['source'], item['destination'], item['status']) for item in plan] == [
+        ('output/run-1/a.bam', 'output/archive/run-1/a.bam', 'planned'),
+        ('output/run-1/logs/a.log', 'output/archive/run-1/logs/a.log', 'planned'),
+    ]
+    assert _names(server) == ['output/run-1/a.bam', 'output/run-1/logs/a.log']
+
+
+def test_move_dir_moves_every_file_and_removes_the_directory(server, workbench):
+    _put(server, 'output/run-1/a.bam', 'output/run-1/logs/a.log', 'output/run-2/b.bam')
+    workbench.create_directory('output/run-1/empty')
+
+    results = workbench.move_dir('output/run-1', 'output/archive/run-1')
+    assert not [result for result in results if result['error']]
+    assert _names(server) == ['output/archive/run-1/a.bam', 'output/archive/run-1/logs/a.log', 'output/run-2/b.bam']
+    assert server.api.workbench(WORKBENCH_NAME).contents['output/archive/run-1/a.bam'] == b'output/run-1/a.bam'
+
+
+def test_a_failed_move_does_not_stop_the_others(server, workbench):
+    _put(server, 'input/a.txt', 'input/b.txt')
+
+    results = workbench.move_many({'input/a.txt': 'input/x/a.txt', 'input/missing.txt': 'input/x/missing.txt',
+                                   'input/b.txt': 'input/x/b.txt'})
+    assert [result['status'] for result in results] == ['moved', 'failed', 'moved']
+    assert results[1]['error'] == 'input/missing.txt not found'
+    assert _names(server) == ['input/x/a.txt', 'input/x/b.txt']
+    assert workbench.file_exists_in_bucket('x/a.txt')[0]
+
+
+def test_delete_many_deletes_files_and_prefixes(server, workbench):
+    _put(server, 'working/tmp/a.bam', 'working/tmp/b/c.bam', 'working/keep.bam', 'input/old.txt')
+
+    results = workbench.delete_many(['working/tmp/', 'input/old.txt'])
+    assert all(result['status'] == 'deleted' for result in results)
+    assert _names(server) == ['working/keep.bam']
+
+
+def test_move_file_reports_the_error_detail(server, client):
+    assert move_file(WORKBENCH_NAME, 'input/missing.txt', 'input/a.txt', 'token', client=client) == {
+        'message': 'input/missing.txt not found'}
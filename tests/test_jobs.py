@@ -0,0 +1,49 @@
+import pytest
+
+from tiny import main
+from tiny.errors import ApiError
+from tiny.workflow import JobStatus
+
+
+@pytest.fixture
+def finished_jobs(server):
+    # jobs succeed as soon as they are submitted
+    server.api.job_duration = 0
+
+
+def test_one_failing_status_request_does_not_stop_the_others(server, workbench, finished_jobs, monkeypatch):
+    healthy = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+    broken = workbench.run('bwa', 'bwa mem ref.fa b.fq')
+    get_job = main.get_job
+
+    def failing_get_job(job_id, **kwargs):
+        if job_id == broken.job_id:
+            raise ApiError('Service unavailable', status_code=503)
+        return get_job(job_id, **kwargs)
+
+    monkeypatch.setattr(main, 'get_jobs', lambda *args, **kwargs: None)
+    monkeypatch.setattr(main, 'get_job', failing_get_job)
+    with pytest.warns(UserWarning, match=broken.job_id):
+        jobs = workbench.refresh_jobs()
+
+    assert {job.job_id for job in jobs} == {healthy.job_id, broken.job_id}
+    assert healthy.status == JobStatus.SUCCEEDED
+    assert broken.status == JobStatus.QUEUED
+
+
+def test_statuses_are_refreshed_in_bulk(server, workbench, finished_jobs, monkeypatch):
+    jobs = [workbench.run('bwa', f'bwa mem ref.fa {i}.fq') for i in range(5)]
+    requests = []
+    get_jobs = main.get_jobs
+
+    def recording_get_jobs(job_ids, **kwargs):
+        requests.append(list(job_ids))
+        return get_jobs(job_ids, **kwargs)
+
+    monkeypatch.setattr(main, 'get_jobs', recording_get_jobs)
+    monkeypatch.setattr(main, 'get_job', lambda *args, **kwargs: pytest.fail('polled a job one at a time'))
+    workbench.refresh_jobs()
+
+    assert len(requests) == 1
+    assert sorted(requests[0]) == sorted(job.job_id for job in jobs)
+    assert all(job.status == JobStatus.SUCCEEDED for job in jobs)
@@ -0,0 +1,47 @@
+from tiny.jobstore import JobStore
+from tiny.main import Workbench
+
+from conftest import WORKBENCH_NAME
+
+
+def test_saving_again_keeps_the_submit_time(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite'))
+    store.save(WORKBENCH_NAME, 'job-1', 'bwa', '0.7', 'bwa mem', 'QUEUED', submitted_at=100.0)
+    store.save(WORKBENCH_NAME, 'job-1', 'bwa', '0.7', 'bwa mem', 'RUNNING', submitted_at=200.0)
+
+    record = store.get(WORKBENCH_NAME, 'job-1')
+    assert record['status'] == 'RUNNING'
+    assert record['submitted_at'] == 100.0
+    assert len(store.query(WORKBENCH_NAME)) == 1
+    store.close()
+
+
+def test_query_filters(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite'))
+    for i, (tool, status) in enumerate([('bwa', 'SUCCEEDED'), ('fastqc', 'FAILED'), ('bwa', 'RUNNING'),
+                                        ('bwa', 'QUEUED')]):
+        store.save(WORKBENCH_NAME, f'job-{i}', tool, None, f'{tool} {i}', status, submitted_at=float(i + 1))
+    store.save('other-workbench', 'job-9', 'bwa', None, 'bwa 9', 'QUEUED', submitted_at=9.0)
+
+    def ids(**filters):
+        return [record['job_id'] for record in store.query(WORKBENCH_NAME, **filters)]
+
+    assert ids() == ['job-0', 'job-1', 'job-2', 'job-3']
+    assert ids(status=['RUNNING', 'QUEUED']) == ['job-2', 'job-3']
+    assert ids(exclude_status=['SUCCEEDED', 'FAILED']) == ['job-2', 'job-3']
+    assert ids(tool='fastqc') == ['job-1']
+    assert ids(since=2.0, until=4.0) == ['job-1', 'job-2']
+    assert ids(limit=2) == ['job-2', 'job-3']
+    store.close()
+
+
+def test_jobs_survive_a_new_session(server, client, workbench):
+    job = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+
+    later = Workbench(WORKBENCH_NAME, client=client, job_store=JobStore(workbench.job_store.path))
+    try:
+        assert [record.job_id for record in later.jobs()] == [job.job_id]
+        assert later.jobs(job.job_id).full_command == 'bwa mem ref.fa a.fq'
+    finally:
+        later.job_store.close()
+        later.manifest.close()
@@ -0,0 +1,89 @@
+from tiny.manifest import Manifest
+
+from conftest import WORKBENCH_NAME
+
+
+def _put(server, path: str, content: bytes = b'data'):
+    with server.api.lock:
+        server.api.workbench(WORKBENCH_NAME).put(path, content)
+
+
+def test_lookups_are_served_locally_until_invalidated(server, workbench):
+    _put(server, 'input/a.txt')
+    assert workbench.file_exists_in_bucket('a.txt') == (True, 'input/a.txt')
+
+    # changed behind the manifest's back, the cached listing is still fresh
+    _put(server, 'input/b.txt')
+    assert workbench.file_exists_in_bucket('b.txt') == (False, 'input/b.txt')
+
+    workbench.manifest.invalidate('input/b.txt')
+    assert workbench.file_exists_in_bucket('b.txt') == (True, 'input/b.txt')
+
+
+def test_workbench_changes_invalidate_the_manifest(server, workbench):
+    _put(server, 'input/a.txt')
+    _put(server, 'input/b.txt')
+    assert workbench.file_exists_in_bucket('a.txt')[0]
+
+    workbench.delete_path('input/a.txt')
+    assert not workbench.file_exists_in_bucket('a.txt')[0]
+
+    workbench.move_file('input/b.txt', 'input/c.txt')
+    assert not workbench.file_exists_in_bucket('b.txt')[0]
+    assert workbench.file_exists_in_bucket('c.txt')[0]
+
+
+def test_invalidation_only_affects_overlapping_paths(server, client, tmp_path):
+    _put(server, 'input/rna/a.fastq')
+    _put(server, 'output/rna/a.bam')
+    manifest = Manifest(WORKBENCH_NAME, path=str(tmp_path / 'manifest.sqlite'))
+    manifest.refresh('token', client=client)
+    assert not manifest.needs_refresh()
+
+    manifest.invalidate('input/rna/')
+    assert manifest.needs_refresh('input/rna/a.fastq')
+    assert manifest.needs_refresh('input/')
+    assert not manifest.needs_refresh('output/')
+    assert not manifest.exists('input/rna/a.fastq')
+    assert manifest.exists('output/rna/a.bam')
+
+    manifest.refresh('token', client=client)
+    assert not manifest.needs_refresh('input/')
+    assert manifest.exists('input/rna/a.fastq')
+    manifest.close()
+
+
+def test_expired_listing_is_kept_when_unchanged(server, client, tmp_path):
+    _put(server, 'input/a.txt')
+    manifest = Manifest(WORKBENCH_NAME, path=str(tmp_path / 'manifest.sqlite'))
+    manifest.refresh('token', client=client)
+    etag = manifest._meta('etag')
+
+    manifest.expire()
+    assert manifest.needs_refresh()
+    manifest.refresh('token', client=client)
+    assert not manifest.needs_refresh()
+    assert manifest._meta('etag') == etag
+    assert [entry['name'] for entry in manifest.entries()] == ['input/a.txt']
+
+    _put(server, 'input/b.txt')
+    manifest.expire()
+    manifest.refresh('token', client=client)
+    assert [entry['name'] for entry in manifest.entries()] == ['input/a.txt', 'input/b.txt']
+    manifest.close()
+
+
+def test_each_server_gets_its_own_manifest(server, client):
+    _put(server, 'input/a.txt')
+    mock = Manifest(WORKBENCH_NAME, base_url=server.url)
+    production = Manifest(WORKBENCH_NAME, base_url='https://api.tinybio.cloud')
+    try:
+        assert production.path != mock.path
+        mock.refresh('token', client=client)
+        assert mock.exists('input/a.txt')
+        assert production.needs_refresh()
+        assert not production.exists('input/a.txt')
+    finally:
+        mock.clear()
+        mock.close()
+        production.close()
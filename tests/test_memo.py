@@ -0,0 +1,46 @@
+import pytest
+
+from tiny.memo import RunCache, referenced_paths, normalize_command
+
+
+@pytest.fixture
+def memoized(server, workbench, tmp_path):
+    server.api.job_duration = 0
+    workbench.memoize = True
+    workbench._run_cache = RunCache(str(tmp_path / 'runs.sqlite'))
+    yield workbench
+    workbench._run_cache.close()
+
+
+def _upload(workbench, tmp_path, content: bytes):
+    path = tmp_path / 'a.fq'
+    path.write_bytes(content)
+    workbench.upload_file(str(path))
+
+
+def test_referenced_paths():
+    assert referenced_paths('fastqc /input/rna/*.gz -o=/output/qc --tmp working/') == \
+        ['input/rna/*.gz', 'output/qc', 'working']
+    assert normalize_command("fastqc  '/input/a.fq'") == normalize_command('fastqc /input/a.fq')
+
+
+def test_identical_run_reuses_the_job_until_an_input_changes(server, memoized, tmp_path):
+    _upload(memoized, tmp_path, b'reads')
+    first = memoized.run('fastqc', 'fastqc /input/a.fq -o /output/qc')
+
+    assert memoized.run('fastqc', "fastqc  '/input/a.fq'  -o /output/qc").job_id == first.job_id
+    assert len(server.api.jobs) == 1
+
+    _upload(memoized, tmp_path, b'other reads')
+    assert memoized.run('fastqc', 'fastqc /input/a.fq -o /output/qc').job_id != first.job_id
+    assert len(server.api.jobs) == 2
+
+
+def test_memoize_false_always_submits(server, memoized, tmp_path):
+    _upload(memoized, tmp_path, b'reads')
+    first = memoized.run('fastqc', 'fastqc /input/a.fq')
+
+    assert memoized.run('fastqc', 'fastqc /input/a.fq', memoize=False).job_id != first.job_id
+    memoized.invalidate_runs('fastqc')
+    assert memoized.run('fastqc', 'fastqc /input/a.fq').job_id != first.job_id
+    assert len(server.api.jobs) == 3
@@ -0,0 +1,57 @@
+import pytest
+
+from tiny.pipeline import Pipeline, CONTINUE, COMPLETED_EARLIER, UPSTREAM_FAILED, SUBMIT_FAILED
+from tiny.poller import Poller
+from tiny.workflow import JobStatus
+
+SUCCEEDED = JobStatus.SUCCEEDED.__str__()
+
+
+@pytest.fixture
+def pipeline(server, workbench, request):
+    server.api.job_duration = 0
+    pipeline = Pipeline(workbench, request.node.name, on_failure=CONTINUE,
+                        poller=Poller(min_interval=0.01, max_interval=0.05))
+    pipeline.add('align', 'bowtie2', 'bowtie2 /output/trimmed -o /output/aligned', inputs=['/output/trimmed'])
+    pipeline.add('trim', 'trimmomatic', 'trimmomatic /input/reads -o /output/trimmed', outputs=['/output/trimmed'])
+    pipeline.add('fastqc', 'fastqc', 'fastqc /input/reads -o /output/fastqc')
+    return pipeline
+
+
+def _statuses(report) -> dict:
+    return {record.step: record.status for record in report}
+
+
+def test_steps_run_after_the_steps_they_read_from(server, pipeline, capsys):
+    report = pipeline.run()
+
+    assert [record.step for record in report] == ['trim', 'fastqc', 'align']
+    assert _statuses(report) == {'trim': SUCCEEDED, 'fastqc': SUCCEEDED, 'align': SUCCEEDED}
+    assert report[2].depends_on == ('trim',)
+    submitted = sorted(server.api.jobs.values(), key=lambda job: job['submitted_at'])
+    assert submitted[-1]['tool'] == 'bowtie2'
+    # the report is returned, printing it is up to the caller
+    assert 'Depends On' not in capsys.readouterr().out
+
+
+def test_a_second_run_skips_the_steps_that_succeeded(server, pipeline):
+    pipeline.run()
+    submitted = len(server.api.jobs)
+
+    report = pipeline.run()
+    assert set(_statuses(report).values()) == {COMPLETED_EARLIER}
+    assert len(server.api.jobs) == submitted
+
+
+def test_a_failed_step_stops_only_its_downstream_steps(pipeline, workbench, monkeypatch):
+    submit = workbench._submit
+
+    def failing_submit(tool, full_command):
+        if tool == 'trimmomatic':
+            raise Exception('Service unavailable')
+        return submit(tool, full_command)
+
+    monkeypatch.setattr(workbench, '_submit', failing_submit)
+    report = pipeline.run()
+    assert _statuses(report) == {'trim': SUBMIT_FAILED, 'fastqc': SUCCEEDED, 'align': UPSTREAM_FAILED}
+    assert report[0].error == 'Service unavailable'
@@ -0,0 +1,58 @@
+import pytest
+
+from tiny.poller import Poller, JobFailedError, FIRST_COMPLETED
+from tiny.workflow import JobStatus
+
+FAST = Poller(min_interval=0.01, max_interval=0.05, jitter=0)
+
+
+def test_wait_returns_the_final_status(server, workbench):
+    server.api.job_duration = 0.2
+    job = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+
+    assert job.wait(timeout=10, poller=FAST) == JobStatus.SUCCEEDED
+    assert workbench.job_store.get(workbench.name, job.job_id)['status'] == JobStatus.SUCCEEDED.name
+
+
+def test_wait_times_out(server, workbench):
+    server.api.job_duration = 60
+    job = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+
+    with pytest.raises(TimeoutError):
+        job.wait(timeout=0.2, poller=FAST)
+
+
+def test_failed_job_raises(server, workbench, monkeypatch):
+    monkeypatch.setattr(server.api, 'job_state', lambda job: 'FAILED')
+    job = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+
+    with pytest.raises(JobFailedError):
+        job.wait(timeout=10, poller=FAST)
+    assert job.wait(timeout=10, raise_on_failure=False, poller=FAST) == JobStatus.FAILED
+
+
+def test_wait_all_first_completed(server, workbench):
+    server.api.job_duration = 60
+    slow = workbench.run('bwa', 'bwa mem ref.fa slow.fq')
+    fast = workbench.run('bwa', 'bwa mem ref.fa fast.fq')
+    server.api.jobs[fast.job_id]['submitted_at'] -= 60
+
+    done, not_done = workbench.wait_all(return_when=FIRST_COMPLETED, timeout=10, poller=FAST)
+    assert done == [fast] and not_done == [slow]
+
+
+def test_unchanged_jobs_are_polled_less_and_less_often(server, workbench, monkeypatch):
+    server.api.job_duration = 60
+    job = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+    polls = []
+    refresh_jobs = workbench.refresh_jobs
+
+    def recording_refresh_jobs(jobs):
+        polls.append(len(jobs))
+        return refresh_jobs(jobs)
+
+    monkeypatch.setattr(workbench, 'refresh_jobs', recording_refresh_jobs)
+    done, _ = Poller(min_interval=0.01, max_interval=1, backoff=2, jitter=0).wait([job], timeout=0.5)
+    # 0.01 doubling: polls at about 0, 0.01, 0.03, 0.07, 0.15, 0.31 seconds instead of every 0.01
+    assert not done
+    assert len(polls) <= 8
@@ -0,0 +1,77 @@
+import pytest
+
+from tiny import main
+from tiny.query import compile_glob, glob_prefix, disk_usage
+
+from conftest import WORKBENCH_NAME
+
+
+@pytest.mark.parametrize('pattern, matches, misses', [
+    ('input/**/*_1.fastq.gz',
+     ['input/a_1.fastq.gz', 'input/rna/a_1.fastq.gz', 'input/rna/run1/a_1.fastq.gz'],
+     ['input/a_2.fastq.gz', 'inputs/a_1.fastq.gz', 'input/a_1.fastq.gz.md5']),
+    ('input/*/s?.txt', ['input/rna/s1.txt'], ['input/s1.txt', 'input/rna/run1/s1.txt', 'input/rna/s10.txt']),
+    ('working/**', ['working/a', 'working/a/b.bam'], ['input/working/a']),
+    ('in[!x]ut/[ab].txt', ['input/a.txt', 'input/b.txt'], ['inxut/a.txt', 'input/c.txt']),
+    ('input/a+b (1).txt', ['input/a+b (1).txt'], ['input/aab (1).txt']),
+])
+def test_compile_glob(pattern, matches, misses):
+    regex = compile_glob(pattern)
+    for path in matches:
+        assert regex.match(path), path
+    for path in misses:
+        assert not regex.match(path), path
+
+
+@pytest.mark.parametrize('pattern, prefix', [
+    ('input/**/*_1.fastq.gz', 'input/'),
+    ('input/rna/*.gz', 'input/rna/'),
+    ('input/rna/a.gz', 'input/rna/'),
+    ('*.gz', ''),
+    ('/input/r?a/*.gz', 'input/'),
+])
+def test_glob_prefix(pattern, prefix):
+    assert glob_prefix(pattern) == prefix
+
+
+def test_workbench_glob_lists_only_the_literal_prefix(server, workbench, monkeypatch):
+    with server.api.lock:
+        files = server.api.workbench(WORKBENCH_NAME)
+        for path in ('input/rna/a_1.fastq.gz', 'input/rna/a_2.fastq.gz', 'input/rna/run2/b_1.fastq.gz',
+                     'input/atac/c_1.fastq.gz', 'output/rna/a_1.fastq.gz'):
+            files.put(path, b'reads')
+    listed = []
+    iter_files_in_workbench = main.iter_files_in_workbench
+
+    def recording_iter_files(workbench_name, auth_token, path=None, **kwargs):
+        listed.append(path)
+        return iter_files_in_workbench(workbench_name, auth_token, path=path, **kwargs)
+
+    monkeypatch.setattr(main, 'iter_files_in_workbench', recording_iter_files)
+
+    names = [entry['name'] for entry in workbench.glob('input/rna/**/*_1.fastq.gz')]
+    assert names == ['input/rna/a_1.fastq.gz', 'input/rna/run2/b_1.fastq.gz']
+    assert listed == ['input/rna/']
+
+
+def test_disk_usage_totals_each_directory_once():
+    entries = [
+        {'name': 'working/', 'size': 0},
+        {'name': 'working/a.bam', 'size': 10},
+        {'name': 'working/run1/b.bam', 'size': 20},
+        {'name': 'working/run1/tmp/c.bam', 'size': '30'},
+        {'name': 'working/run2/d.bam', 'size': 40},
+        {'name': 'working/run2/e.bam', 'size': '1.0 GB'},
+    ]
+    assert disk_usage(entries, 'working') == {
+        'working/': (100, 4),
+        'working/run1/': (50, 2),
+        'working/run1/tmp/': (30, 1),
+        'working/run2/': (40, 1),
+    }
+    assert disk_usage(entries, 'working/', depth=1) == {
+        'working/': (100, 4),
+        'working/run1/': (50, 2),
+        'working/run2/': (40, 1),
+    }
+    assert disk_usage(entries, 'output/') == {}
@@ -0,0 +1,29 @@
+import io
+
+from tiny.records import Records, JobRecord, render
+
+
+def _render(records, **kwargs) -> str:
+    buffer = io.StringIO()
+    render(records, file=buffer, empty_message='No jobs', **kwargs)
+    return buffer.getvalue()
+
+
+def _jobs(count: int) -> Records:
+    return Records(JobRecord(f'job-{i}', 'bwa', '0.7', 'Succeeded', f'bwa mem {i}.fq') for i in range(count))
+
+
+def test_limit_zero_shows_no_rows_but_counts_them():
+    assert _render(_jobs(3), limit=0) == '... 3 more rows, render with a higher limit to see them\n'
+    assert _render(_jobs(0), limit=0) == 'No jobs\n'
+
+
+def test_limit_none_shows_every_row():
+    lines = _render(_jobs(120), limit=None).splitlines()
+    assert len(lines) == 2 + 120
+
+
+def test_rows_past_the_limit_are_counted():
+    lines = _render(_jobs(5), limit=2).splitlines()
+    assert [line.split()[0] for line in lines[2:4]] == ['job-0', 'job-1']
+    assert lines[-1] == '... 3 more rows, render with a higher limit to see them'
@@ -0,0 +1,110 @@
+import httpx
+import pytest
+
+from tiny.client import Client
+from tiny.jobstore import JobStore
+from tiny.main import Workbench
+from tiny.retry import RetryPolicy, CircuitBreaker
+
+from conftest import WORKBENCH_NAME
+
+FAST_RETRIES = RetryPolicy(max_retries=3, backoff=0.001, max_backoff=0.001)
+
+
+def _client(statuses, requests) -> Client:
+    # answers with the given statuses in turn, then 200
+    statuses = list(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(statuses.pop(0) if statuses else 200, json={})
+
+    return Client(base_url='http://api.test', http2=False, transport=httpx.MockTransport(handler),
+                  retry_policy=FAST_RETRIES)
+
+
+def test_transient_failures_are_retried():
+    requests = []
+    with _client([503, 502], requests) as client:
+        assert client.get('/workbench/me').status_code == 200
+    assert len(requests) == 3
+
+
+def test_post_is_only_retried_with_an_idempotency_key():
+    requests = []
+    with _client([500], requests) as client:
+        assert client.post('/workbench/w/run').status_code == 500
+    assert len(requests) == 1
+
+    requests.clear()
+    with _client([500], requests) as client:
+        assert client.post('/workbench/w/run', idempotency_key='key').status_code == 200
+    assert len(requests) == 2
+    assert {request.headers['Idempotency-Key'] for request in requests} == {'key'}
+
+
+def test_retries_give_up_after_max_retries():
+    requests = []
+    with _client([503] * 10, requests) as client:
+        assert client.get('/workbench/me').status_code == 503
+    assert len(requests) == 1 + FAST_RETRIES.max_retries
+
+
+def test_retry_after_is_followed():
+    response = httpx.Response(429, headers={'Retry-After': '2'})
+    assert RetryPolicy().delay(0, response) == 2.0
+    assert RetryPolicy(max_retry_after=1).delay(0, response) == 1.0
+
+
+class _LosingTransport(httpx.HTTPTransport):
+    """
+    Lets the first job submission reach the server, then drops the connection before the response arrives
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lost = False
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = super().handle_request(request)
+        if request.url.path.endswith('/run') and not self.lost:
+            self.lost = True
+            response.close()
+            raise httpx.ReadError('connection reset', request=request)
+        return response
+
+
+def test_retried_submission_starts_one_job(server, tmp_path):
+    transport = _LosingTransport()
+    with Client(base_url=server.url, http2=False, transport=transport, retry_policy=FAST_RETRIES) as client:
+        workbench = Workbench(WORKBENCH_NAME, client=client, job_store=JobStore(str(tmp_path / 'jobs.sqlite')))
+        job = workbench.run('bwa', 'bwa mem ref.fa a.fq')
+        workbench.manifest.close()
+
+    assert transport.lost
+    assert list(server.api.jobs) == [job.job_id]
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(max_concurrency=8, failure_threshold=3, cooldown=60)
+    breaker.acquire()
+    breaker.release(False)
+    assert breaker.limit == 4 and breaker.state == 'throttled'
+    breaker.acquire()
+    breaker.release(True)
+    assert breaker.limit == 5
+
+    for _ in range(3):
+        breaker.acquire()
+        breaker.release(False)
+    assert breaker.state == 'open'
+    assert breaker.limit == breaker.min_concurrency
+
+
+@pytest.mark.parametrize('error, idempotent, retried', [
+    (httpx.ConnectError('refused'), False, True),
+    (httpx.ReadTimeout('slow'), False, False),
+    (httpx.ReadTimeout('slow'), True, True),
+])
+def test_which_errors_are_retried(error, idempotent, retried):
+    assert RetryPolicy().retry_error(error, idempotent) == retried
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from tiny.ratelimit import RateLimiter
+
+
+@pytest.mark.parametrize('rate', [0, -1])
+def test_rate_must_be_positive(rate):
+    with pytest.raises(ValueError):
+        RateLimiter(rate)
+
+
+def test_rate_limiter_spaces_calls_after_the_burst():
+    limiter = RateLimiter(50, burst=2)
+    started = time.monotonic()
+    for _ in range(7):
+        limiter.acquire()
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+
+
+def test_run_many_submits_one_job_per_sample(server, workbench, tmp_path):
+    sample_sheet = tmp_path / 'samples.csv'
+    sample_sheet.write_text('sample,reads\na,a_1.fq\nb,b_1.fq\n')
+
+    jobs, report = workbench.run_many('bwa', 'bwa mem ref.fa {reads} -o {sample}.sam {lane}', str(sample_sheet))
+    assert not jobs
+    assert [failure['sample']['sample'] for failure in report] == ['a', 'b']
+
+    jobs, report = workbench.run_many('bwa', 'bwa mem ref.fa {reads} -o {sample}.sam', str(sample_sheet))
+    assert [job.full_command for job in jobs] == ['bwa mem ref.fa a_1.fq -o a.sam', 'bwa mem ref.fa b_1.fq -o b.sam']
+    assert not report
+    assert {job['full_command'] for job in server.api.jobs.values()} == {job.full_command for job in jobs}
+
+
+def test_run_many_reports_failed_submissions(server, workbench, monkeypatch):
+    submit = workbench._submit
+
+    def failing_submit(tool, full_command):
+        if 'b_1' in full_command:
+            raise Exception('Service unavailable')
+        return submit(tool, full_command)
+
+    monkeypatch.setattr(workbench, '_submit', failing_submit)
+    jobs, report = workbench.run_many('bwa', 'bwa mem ref.fa {reads}', [{'reads': 'a_1.fq'}, {'reads': 'b_1.fq'}])
+    assert [job.full_command for job in jobs] == ['bwa mem ref.fa a_1.fq']
+    assert report == [{'sample': {'reads': 'b_1.fq'}, 'full_command': 'bwa mem ref.fa b_1.fq',
+                       'error': 'Service unavailable'}]
@@ -0,0 +1,23 @@
+import pytest
+
+from tiny.storage import upload_files
+
+from conftest import WORKBENCH_NAME
+
+
+def _write(path, content: bytes = b'reads'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def test_upload_refuses_files_sharing_a_name(server, client, tmp_path):
+    _write(tmp_path / 'samples' / 'a' / 'reads.fastq')
+    _write(tmp_path / 'samples' / 'b' / 'reads.fastq')
+    _write(tmp_path / 'samples' / 'b' / 'other.fastq')
+
+    with pytest.raises(ValueError) as e:
+        upload_files(WORKBENCH_NAME, str(tmp_path / 'samples'), 'token', client=client)
+    assert str(tmp_path / 'samples' / 'a' / 'reads.fastq') in str(e.value)
+    assert str(tmp_path / 'samples' / 'b' / 'reads.fastq') in str(e.value)
+    assert not server.api.workbench(WORKBENCH_NAME).contents
+
@@ -0,0 +1,154 @@
+import os
+
+import httpx
+import pytest
+
+from tiny import transfer
+from tiny.remote import RemoteFile
+from tiny.storage import get_download_url
+from tiny.transfer import upload_chunked, download_ranged, UPLOAD_CHECKPOINT_DIR
+
+from conftest import WORKBENCH_NAME
+
+PART_SIZE = 1024
+
+
+def _write(path, size: int) -> bytes:
+    content = os.urandom(size)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return content
+
+
+def _put(server, path: str, content: bytes):
+    with server.api.lock:
+        server.api.workbench(WORKBENCH_NAME).put(path, content)
+
+
+def test_interrupted_upload_resumes_from_checkpoint(server, client, tmp_path, monkeypatch):
+    content = _write(tmp_path / 'reads.fastq', 5 * PART_SIZE + 100)
+    sent = []
+    upload_part = transfer._upload_part
+
+    def failing_upload_part(workbench_name, upload_id, part_number, data, auth_token, client):
+        if part_number == 4:
+            raise httpx.ConnectError('connection dropped')
+        sent.append(part_number)
+        return upload_part(workbench_name, upload_id, part_number, data, auth_token, client)
+
+    monkeypatch.setattr(transfer, '_upload_part', failing_upload_part)
+    with pytest.raises(httpx.ConnectError):
+        upload_chunked(WORKBENCH_NAME, str(tmp_path / 'reads.fastq'), 'input/reads.fastq', 'token', client=client,
+                       part_size=PART_SIZE, max_workers=1)
+    assert os.listdir(UPLOAD_CHECKPOINT_DIR)
+    acknowledged = set(sent)
+
+    sent.clear()
+
+    def recording_upload_part(workbench_name, upload_id, part_number, data, auth_token, client):
+        sent.append(part_number)
+        return upload_part(workbench_name, upload_id, part_number, data, auth_token, client)
+
+    monkeypatch.setattr(transfer, '_upload_part', recording_upload_part)
+    upload_chunked(WORKBENCH_NAME, str(tmp_path / 'reads.fastq'), 'input/reads.fastq', 'token', client=client,
+                   part_size=PART_SIZE, max_workers=1)
+
+    assert sorted(sent) == sorted(set(range(1, 7)) - acknowledged)
+    assert server.api.workbench(WORKBENCH_NAME).contents['input/reads.fastq'] == content
+    assert not os.listdir(UPLOAD_CHECKPOINT_DIR)
+
+
+def test_changed_file_restarts_upload(server, client, tmp_path, monkeypatch):
+    path = str(tmp_path / 'reads.fastq')
+    _write(path, 3 * PART_SIZE)
+    upload_part = transfer._upload_part
+
+    def failing_upload_part(workbench_name, upload_id, part_number, data, auth_token, client):
+        if part_number == 3:
+            raise httpx.ConnectError('connection dropped')
+        return upload_part(workbench_name, upload_id, part_number, data, auth_token, client)
+
+    monkeypatch.setattr(transfer, '_upload_part', failing_upload_part)
+    with pytest.raises(httpx.ConnectError):
+        upload_chunked(WORKBENCH_NAME, path, 'input/reads.fastq', 'token', client=client, part_size=PART_SIZE,
+                       max_workers=1)
+    monkeypatch.setattr(transfer, '_upload_part', upload_part)
+
+    content = _write(path, 3 * PART_SIZE + 1)
+    upload_chunked(WORKBENCH_NAME, path, 'input/reads.fastq', 'token', client=client, part_size=PART_SIZE)
+    assert server.api.workbench(WORKBENCH_NAME).contents['input/reads.fastq'] == content
+
+
+def test_interrupted_download_fetches_only_missing_ranges(server, client, tmp_path, monkeypatch):
+    content = os.urandom(8 * PART_SIZE + 10)
+    _put(server, 'output/result.bam', content)
+    url = get_download_url(WORKBENCH_NAME, 'output/result.bam', 'token', client=client)
+    destination = str(tmp_path / 'result.bam')
+    ranges = []
+    stream = client.stream
+
+    def failing_stream(method, url, **kwargs):
+        byte_range = kwargs.get('headers', {}).get('Range')
+        if byte_range != 'bytes=0-0':
+            if len(ranges) == 5:
+                raise httpx.ReadError('connection reset')
+            ranges.append(byte_range)
+        return stream(method, url, **kwargs)
+
+    monkeypatch.setattr(client, 'stream', failing_stream)
+    with pytest.raises(httpx.ReadError):
+        download_ranged(url, destination, client=client, part_size=PART_SIZE, max_workers=1)
+    assert not os.path.exists(destination)
+    assert os.path.exists(destination + '.part')
+    fetched_before = list(ranges)
+
+    ranges.clear()
+
+    def recording_stream(method, url, **kwargs):
+        ranges.append(kwargs['headers']['Range'])
+        return stream(method, url, **kwargs)
+
+    monkeypatch.setattr(client, 'stream', recording_stream)
+    download_ranged(url, destination, client=client, part_size=PART_SIZE, max_workers=1, verify=True)
+
+    assert ranges[0] == 'bytes=0-0'
+    assert len(ranges) - 1 == 9 - len(fetched_before)
+    assert not set(ranges) & set(fetched_before)
+    with open(destination, 'rb') as f:
+        assert f.read() == content
+    assert not os.path.exists(destination + '.part')
+
+
+def test_empty_object_downloads_and_opens(server, client, tmp_path):
+    _put(server, 'input/empty.txt', b'')
+    url = get_download_url(WORKBENCH_NAME, 'input/empty.txt', 'token', client=client)
+
+    destination = download_ranged(url, str(tmp_path / 'empty.txt'), client=client, verify=True)
+    assert os.path.getsize(destination) == 0
+
+    remote_file = RemoteFile(url, client=client)
+    assert remote_file.size == 0
+    assert remote_file.read() == b''
+
+
+def test_upload_forgotten_by_the_server_starts_over(server, client, tmp_path, monkeypatch):
+    path = str(tmp_path / 'reads.fastq')
+    content = _write(path, 4 * PART_SIZE)
+    upload_part = transfer._upload_part
+
+    def failing_upload_part(workbench_name, upload_id, part_number, data, auth_token, client):
+        if part_number == 3:
+            raise httpx.ConnectError('connection dropped')
+        return upload_part(workbench_name, upload_id, part_number, data, auth_token, client)
+
+    monkeypatch.setattr(transfer, '_upload_part', failing_upload_part)
+    with pytest.raises(httpx.ConnectError):
+        upload_chunked(WORKBENCH_NAME, path, 'input/reads.fastq', 'token', client=client, part_size=PART_SIZE,
+                       max_workers=1)
+    monkeypatch.setattr(transfer, '_upload_part', upload_part)
+    with server.api.lock:
+        server.api.uploads.clear()
+
+    upload_chunked(WORKBENCH_NAME, path, 'input/reads.fastq', 'token', client=client, part_size=PART_SIZE)
+    assert server.api.workbench(WORKBENCH_NAME).contents['input/reads.fastq'] == content
+    assert not os.listdir(UPLOAD_CHECKPOINT_DIR)
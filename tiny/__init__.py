@@ -1,19 +1,60 @@
 import os
-from .main import Job, Workbench, Auth, create_workbench, list_workbenches
+from importlib import import_module
 
-auth_token = os.environ.get('TINYBIO_AUTH_TOKEN')
-if not auth_token:
-        print("""
-TINYBIO_AUTH_TOKEN NOT FOUND IN ENVIRONMENT VARIABLES
+from .settings import AUTH_BANNER
 
-To create a token click here: https://api.tinybio.cloud/readme-docs/login
+# public names and the module each is imported from on first access, so importing tiny (and starting the tiny
+# command) does not load httpx, tabulate and the rest until they are needed
+_EXPORTS = {
+    'Job': ('.main', 'Job'),
+    'Workbench': ('.main', 'Workbench'),
+    'Auth': ('.main', 'Auth'),
+    'create_workbench': ('.main', 'create_workbench'),
+    'list_workbenches': ('.main', 'list_workbenches'),
+    'Client': ('.client', 'Client'),
+    'AsyncClient': ('.client', 'AsyncClient'),
+    'set_client': ('.client', 'set_client'),
+    'RetryPolicy': ('.retry', 'RetryPolicy'),
+    'CircuitBreaker': ('.retry', 'CircuitBreaker'),
+    'Poller': ('.poller', 'Poller'),
+    'JobFailedError': ('.poller', 'JobFailedError'),
+    'FIRST_COMPLETED': ('.poller', 'FIRST_COMPLETED'),
+    'ALL_COMPLETED': ('.poller', 'ALL_COMPLETED'),
+    'AsyncWorkbench': ('.aio', 'AsyncWorkbench'),
+    'AsyncJob': ('.aio', 'AsyncJob'),
+    'JobStore': ('.jobstore', 'JobStore'),
+    'Records': ('.records', 'Records'),
+    'JobRecord': ('.records', 'JobRecord'),
+    'WorkbenchRecord': ('.records', 'WorkbenchRecord'),
+    'DiskUsageRecord': ('.records', 'DiskUsageRecord'),
+    'StepRecord': ('.records', 'StepRecord'),
+    'Pipeline': ('.pipeline', 'Pipeline'),
+    'Step': ('.pipeline', 'Step'),
+    'metrics': ('.instrumentation', 'metrics'),
+    'prometheus_text': ('.instrumentation', 'prometheus_text'),
+    'write_prometheus': ('.instrumentation', 'write_prometheus'),
+    'enable_metrics': ('.instrumentation', 'enable'),
+    'disable_metrics': ('.instrumentation', 'disable'),
+    'add_metrics_hook': ('.instrumentation', 'add_hook'),
+    'remove_metrics_hook': ('.instrumentation', 'remove_hook'),
+}
 
-SET YOUR TOKEN AS AN ENVIRONMENT VARIABLE:
-import os
-os.environ['TINYBIO_AUTH_TOKEN']='YOUR_TOKEN_HERE'
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module_name, attribute = _EXPORTS[name]
+    value = getattr(import_module(module_name, __name__), attribute)
+    globals()[name] = value
+    return value
 
-To gain access to your workbench, run:
-workbench = tiny.Workbench(name="WORKBENCH_NAME")
 
-Check out these comprehensive tutorials on RNA-Seq, ATAC-Seq, and Variant calling on our docs here: http://docs.tinybio.cloud
-                """)
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+auth_token = os.environ.get('TINYBIO_AUTH_TOKEN')
+if not auth_token and os.environ.get('TINYBIO_BANNER', '').lower() in ('1', 'true', 'yes'):
+    print(AUTH_BANNER)
@@ -0,0 +1,517 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from os.path import isdir, split, getsize, join, exists
+from typing import List, Tuple, AsyncIterator, Optional
+
+import httpx
+
+from .client import AsyncClient, get_async_client, TRANSFER_TIMEOUT
+from .jobstore import JobStore, get_job_store
+from . import instrumentation
+from .errors import ApiError
+from .main import Auth, _build_tree, _render_tree, _limit_entries, DEFAULT_LOG_POLL_INTERVAL, \
+    DEFAULT_LOG_MAX_BACKOFF, DEFAULT_LOG_RETRIES, NO_JOBS_MESSAGE, \
+    _store_status_filters
+from .records import Records, JobRecord, WorkbenchRecord
+from .poller import JobFailedError, FIRST_COMPLETED, ALL_COMPLETED, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL, \
+    DEFAULT_BACKOFF, DEFAULT_JITTER
+from .storage import INPUT_PREFIX, DEFAULT_UPLOAD_WORKERS, DEFAULT_DOWNLOAD_WORKERS, _walk_files, \
+    _check_name_collisions
+from .workflow import JobStatus, TERMINAL_STATUSES, DEFAULT_LOG_CONNECT_TIMEOUT, DEFAULT_LOG_READ_TIMEOUT, _take_lines
+
+DEFAULT_STATUS_CONCURRENCY: int = 64
+DEFAULT_MAX_LOG_STREAMS: int = 20
+# how long a polled job's log is read before the connection is given up
+DEFAULT_LOG_POLL_READ_TIMEOUT: float = 2.0
+
+
+async def execute_workflow(workbench_name: str, arguments: dict, auth_token: str, client: AsyncClient = None,
+                           idempotency_key: str = None) -> json:
+    client = client or get_async_client()
+    r = await client.post(f'/workbench/{workbench_name}/run', auth_token=auth_token, json=arguments,
+                          idempotency_key=idempotency_key or uuid.uuid4().hex)
+    if r.status_code != 200:
+        raise ApiError(f'Failed to execute job: {r.text}', status_code=r.status_code)
+    return r.json()
+
+
+async def get_job(job_id: str, workbench_name: str, auth_token: str, client: AsyncClient = None) -> json:
+    client = client or get_async_client()
+    r = await client.get(f'/{workbench_name}/jobs/{job_id}', auth_token=auth_token)
+    if r.status_code != 200:
+        return r.content
+    return JobStatus(r.json().get('state'))
+
+
+async def get_job_logs(job_id: str, workbench_name: str, auth_token: str, client: AsyncClient = None) -> json:
+    client = client or get_async_client()
+    r = await client.get(f'/{workbench_name}/jobs/{job_id}/logs', auth_token=auth_token)
+    if r.status_code != 200:
+        raise ApiError(f'Failed to get job logs: {r.text}', status_code=r.status_code)
+    return r.json()
+
+
+async def iter_job_log_lines(job_id: str, workbench_name: str, auth_token: str, offset: int = 0,
+                             client: AsyncClient = None, read_timeout: float = DEFAULT_LOG_READ_TIMEOUT,
+                             flush_partial: bool = False) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Async version of workflow.iter_job_log_lines
+    """
+    client = client or get_async_client()
+    url = f'/{workbench_name}/jobs/{job_id}/logs/stream'
+    headers = {'Range': f'bytes={offset}-'} if offset else None
+    timeout = httpx.Timeout(DEFAULT_LOG_CONNECT_TIMEOUT, read=read_timeout)
+    async with client.stream('GET', url, auth_token=auth_token, headers=headers, timeout=timeout) as r:
+        if r.status_code == 416:
+            return
+        if r.status_code not in (200, 206):
+            await r.aread()
+            raise ApiError(f'Failed to stream job logs: {r.text}', status_code=r.status_code)
+        skip = offset if r.status_code == 200 else 0
+        position = offset
+        buffer = bytearray()
+        async for chunk in r.aiter_bytes():
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            buffer.extend(chunk)
+            lines, position = _take_lines(buffer, position)
+            for line in lines:
+                yield line
+        if flush_partial and buffer:
+            yield position + len(buffer), bytes(buffer)
+
+
+async def iter_files_in_workbench(workbench_name: str, auth_token: str, path: str = None, page_size: int = 1000,
+                                  client: AsyncClient = None) -> AsyncIterator[dict]:
+    """
+    Async version of storage.iter_files_in_workbench
+    """
+    client = client or get_async_client()
+    query_params = {'page_size': page_size}
+    if path:
+        query_params['path'] = path
+    while True:
+        r = await client.get(f'/workbench/{workbench_name}', auth_token=auth_token, params=query_params)
+        if r.status_code != 200:
+            raise ApiError(r.content, status_code=r.status_code)
+        page = r.json()
+        if isinstance(page, list):
+            for file in page:
+                yield file
+            return
+        for file in page.get('files', []):
+            yield file
+        if not page.get('next_page_token'):
+            return
+        query_params['page_token'] = page['next_page_token']
+
+
+async def download_file(workbench_name: str, remote_file: str, auth_token: str, client: AsyncClient = None) -> json:
+    client = client or get_async_client()
+    r = await client.get(f'/workbench/{workbench_name}/download', auth_token=auth_token,
+                         params={'file_path': remote_file})
+    if r.status_code != 200:
+        raise ApiError(f"Error downloading file {remote_file} from workbench {workbench_name}",
+                       status_code=r.status_code)
+    return r.json()
+
+
+async def _fetch_to_file(workbench_name: str, remote_file: str, destination: str, auth_token: str,
+                         client: AsyncClient) -> str:
+    response = await download_file(workbench_name, remote_file, auth_token, client=client)
+    url = response if isinstance(response, str) else \
+        response.get('url') or response.get('download_url') or response.get('signed_url')
+    if not url:
+        raise Exception(f"No download url for {remote_file} in workbench {workbench_name}: {response}")
+    parent = os.path.dirname(destination)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    partial_path = destination + '.part'
+    async with client.stream('GET', url, timeout=TRANSFER_TIMEOUT) as r:
+        if r.status_code != 200:
+            raise ApiError(f"Error downloading {remote_file}: {r.status_code}", status_code=r.status_code)
+        with open(partial_path, 'wb') as f:
+            async for chunk in r.aiter_bytes():
+                f.write(chunk)
+    os.replace(partial_path, destination)
+    return destination
+
+
+async def _upload_blob(workbench_name: str, source_file_name: str, auth_token: str, client: AsyncClient) -> json:
+    print(f'Uploading {source_file_name} to {workbench_name}')
+    with open(source_file_name, 'rb') as f:
+        r = await client.post(f'/workbench/{workbench_name}/upload', auth_token=auth_token, files={'file': f},
+                              timeout=TRANSFER_TIMEOUT, idempotency_key=uuid.uuid4().hex)
+    if r.status_code != 200:
+        raise ApiError(f"Error uploading file {source_file_name} to workbench {workbench_name}",
+                       status_code=r.status_code)
+    return r.json()
+
+
+async def _gather_limited(concurrency: int, coroutines) -> list:
+    """
+    Runs coroutines with at most concurrency in flight, returning results or exceptions in order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines), return_exceptions=True)
+
+
+class AsyncWorkbench:
+    """
+    asyncio version of Workbench. Every network call is a coroutine on a shared httpx.AsyncClient.
+    """
+
+    def __init__(self, workbench_name: str, client: AsyncClient = None, job_store: JobStore = None):
+        self.name = workbench_name
+        self._jobs = {}
+        self.job_store = job_store or get_job_store()
+        self._client = client
+        self.auth = Auth(os.environ.get('TINYBIO_AUTH_TOKEN'))
+
+    def __repr__(self):
+        return f'AsyncWorkbench({self.name})'
+
+    @property
+    def client(self) -> AsyncClient:
+        return self._client or get_async_client()
+
+    def _add_job(self, job: 'AsyncJob'):
+        self._jobs[job.job_id] = job
+        self.job_store.save(self.name, job.job_id, job.tool, job.version, job.full_command, job.status.name)
+
+    def _job_from_record(self, record: dict) -> 'AsyncJob':
+        # reuse the live object so status updates made this session are not lost
+        job = self._jobs.get(record['job_id'])
+        if job is None:
+            job = AsyncJob(record['job_id'], record['tool'], record['version'], record['full_command'], self,
+                           status=JobStatus[record['status']])
+            self._jobs[job.job_id] = job
+        return job
+
+    def _load_jobs(self, **filters) -> List['AsyncJob']:
+        """
+        Jobs of this workbench from the job store, see JobStore.query for the filters
+        """
+        return [self._job_from_record(record) for record in self.job_store.query(self.name, **filters)]
+
+    def _unfinished_jobs(self) -> List['AsyncJob']:
+        return self._load_jobs(exclude_status=[status.name for status in TERMINAL_STATUSES])
+
+    async def run(self, tool: str, full_command: str) -> 'AsyncJob':
+        arguments = {
+            'full_command': full_command,
+            'tool': tool,
+        }
+        execution = await execute_workflow(self.name, arguments, auth_token=self.auth.get_access_token(),
+                                           client=self.client)
+        job = AsyncJob(
+            job_id=execution.get('id'),
+            tool=execution.get('tool'),
+            version=execution.get('version'),
+            full_command=execution.get('full_command'),
+            workbench=self
+        )
+        self._add_job(job)
+        return job
+
+    async def upload_file(self, file: str, max_concurrency: int = DEFAULT_UPLOAD_WORKERS) -> dict:
+        """
+        Uploads a file, or a directory recursively, returning the same mapping as Workbench.upload_file
+        """
+        local_files = (file.rstrip('/') or file) if isdir(file) else file
+        _, base_name = split(local_files)
+        dir_prefix = INPUT_PREFIX + base_name
+        if not isdir(local_files):
+            await _upload_blob(self.name, local_files, self.auth.get_access_token(), self.client)
+            return {local_files: dir_prefix}
+
+        uploads = [(local_files + '/' + f, dir_prefix + '/' + f) for f in _walk_files(local_files)]
+        _check_name_collisions(self.name, [local_file for local_file, _ in uploads])
+        uploads.sort(key=lambda upload: getsize(upload[0]), reverse=True)
+        results = await _gather_limited(max_concurrency, (
+            _upload_blob(self.name, local_file, self.auth.get_access_token(), self.client)
+            for local_file, _ in uploads
+        ))
+        errors = {local_file: result for (local_file, _), result in zip(uploads, results) if isinstance(result, Exception)}
+        if errors:
+            failed = ', '.join(f'{local_file}: {error}' for local_file, error in errors.items())
+            raise Exception(f"Error uploading {len(errors)} files to workbench {self.name}: {failed}")
+        return dict(sorted(uploads))
+
+    async def download(self, file: str, dest: str = None, max_concurrency: int = DEFAULT_DOWNLOAD_WORKERS):
+        """
+        Returns the download url of a workbench file, or with dest downloads it (every file under it when the path
+        ends with '/') and returns a mapping of remote to local path
+        """
+        auth_token = self.auth.get_access_token()
+        if dest is None:
+            return await download_file(self.name, file, auth_token, client=self.client)
+        if not file.endswith('/'):
+            if isdir(dest):
+                dest = join(dest, file.rsplit('/', 1)[-1])
+            return {file: await _fetch_to_file(self.name, file, dest, auth_token, self.client)}
+
+        downloads = {}
+        async for entry in iter_files_in_workbench(self.name, auth_token, path=file, client=self.client):
+            name = entry.get('name', '')
+            if name.startswith(file) and not name.endswith('/'):
+                downloads[name] = join(dest, *name[len(file):].split('/'))
+        results = await _gather_limited(max_concurrency, (
+            _fetch_to_file(self.name, remote_file, local_file, auth_token, self.client)
+            for remote_file, local_file in downloads.items()
+        ))
+        errors = {remote_file: result for remote_file, result in zip(downloads, results) if isinstance(result, Exception)}
+        if errors:
+            failed = ', '.join(f'{remote_file}: {error}' for remote_file, error in errors.items())
+            raise Exception(f"Error downloading {len(errors)} files from workbench {self.name}: {failed}")
+        return downloads
+
+    async def iter_files(self, path: str = None, depth: int = None, max_entries: int = None,
+                         page_size: int = 1000) -> AsyncIterator[dict]:
+        count = 0
+        async for file in iter_files_in_workbench(self.name, self.auth.get_access_token(), path=path,
+                                                  page_size=page_size, client=self.client):
+            if max_entries is not None and count >= max_entries:
+                return
+            for entry in _limit_entries([file], path, depth):
+                count += 1
+                yield entry
+
+    async def ls(self, path: str = None, depth: int = None, max_entries: int = None):
+        files = [file async for file in self.iter_files(path, max_entries=max_entries)]
+        max_segments = None
+        if depth is not None:
+            max_segments = depth + (len(path.rstrip('/').split('/')) if path else 0)
+        for line in _render_tree(self.name, _build_tree(files, max_segments)):
+            print(line)
+        print()
+
+    async def refresh_jobs(self, jobs: List['AsyncJob'] = None,
+                           max_concurrency: int = DEFAULT_STATUS_CONCURRENCY) -> List['AsyncJob']:
+        jobs = self._unfinished_jobs() if jobs is None else list(jobs)
+        pending = [job for job in jobs if job.status not in TERMINAL_STATUSES]
+        await _gather_limited(max_concurrency, (job.get_status() for job in pending))
+        return jobs
+
+    async def jobs(self, job_id: str = None, exclude: List[str] = None, status: List[str] = None, tool: str = None,
+                   since: float = None, limit: int = None, max_concurrency: int = DEFAULT_STATUS_CONCURRENCY):
+        """
+        Jobs of this workbench from the persistent job store, including those of earlier sessions, as JobRecords.
+        Takes the same filters as Workbench.jobs.
+        """
+        if job_id:
+            if job_id not in self._jobs:
+                record = self.job_store.get(self.name, job_id)
+                return self._job_from_record(record) if record else None
+            return self._jobs.get(job_id)
+
+        exclude_status, status_names = _store_status_filters(exclude, status)
+        jobs = self._load_jobs(status=status_names, exclude_status=exclude_status, tool=tool, since=since, limit=limit)
+
+        records = Records(empty_message=NO_JOBS_MESSAGE)
+        for job in await self.refresh_jobs(jobs, max_concurrency=max_concurrency):
+            job_status = job.status.__str__()
+            if exclude and job_status in exclude:
+                continue
+            if status and job_status not in status and job.status.name not in status:
+                continue
+            records.append(job.record)
+        return records
+
+    async def wait_all(self, jobs: List['AsyncJob'] = None, return_when: str = ALL_COMPLETED, timeout: float = None,
+                       raise_on_failure: bool = False) -> Tuple[List['AsyncJob'], List['AsyncJob']]:
+        """
+        Waits for the jobs concurrently on the event loop, returning (done, not_done). Waits for every unfinished job
+        of the workbench when jobs is None.
+        """
+        jobs = self._unfinished_jobs() if jobs is None else list(jobs)
+        tasks = {asyncio.ensure_future(job.wait(raise_on_failure=raise_on_failure)): job for job in jobs}
+        if not tasks:
+            return [], []
+        when = asyncio.FIRST_EXCEPTION if raise_on_failure and return_when == ALL_COMPLETED else \
+            (asyncio.FIRST_COMPLETED if return_when == FIRST_COMPLETED else asyncio.ALL_COMPLETED)
+        finished, unfinished = await asyncio.wait(tasks, timeout=timeout, return_when=when)
+        for task in unfinished:
+            task.cancel()
+        for task in finished:
+            if task.exception() is not None:
+                raise task.exception()
+        return [tasks[task] for task in finished], [tasks[task] for task in unfinished]
+
+    async def follow_logs(self, jobs: List['AsyncJob'] = None, max_streams: int = DEFAULT_MAX_LOG_STREAMS,
+                          output_dir: str = None, poll_interval: float = DEFAULT_LOG_POLL_INTERVAL,
+                          read_timeout: float = DEFAULT_LOG_READ_TIMEOUT, max_retries: int = DEFAULT_LOG_RETRIES):
+        """
+        Follows the logs of many jobs concurrently, printing every line prefixed with its job id until each job
+        finishes. At most max_streams log streams are open at once; the other jobs are polled for new lines every
+        poll_interval seconds and take over a stream as soon as one frees up.
+        :param jobs: jobs to follow, every unfinished job of this workbench when None
+        :param output_dir: also append each job's log to output_dir/<job_id>.log, resuming an existing file
+        """
+        jobs = self._unfinished_jobs() if jobs is None else list(jobs)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        slots = asyncio.Semaphore(max_streams)
+        await asyncio.gather(*(job._follow_logs(slots, output_dir, poll_interval, read_timeout, max_retries)
+                               for job in jobs))
+
+
+class AsyncJob:
+    def __init__(
+            self,
+            job_id: str,
+            tool: str,
+            version: str,
+            full_command: str,
+            workbench: AsyncWorkbench,
+            status: JobStatus = JobStatus.QUEUED,
+    ):
+        self.job_id = job_id
+        self.tool = tool
+        self.version = version
+        self.full_command = full_command
+        self.workbench = workbench
+        self.status = status
+        self.log_offset = 0
+
+    def __repr__(self):
+        return f'AsyncJob({self.job_id}, {self.status})'
+
+    @property
+    def record(self) -> JobRecord:
+        return JobRecord(self.job_id, self.tool, self.version, self.status.__str__(), self.full_command)
+
+    async def get_status(self) -> str:
+        if self.status in TERMINAL_STATUSES:
+            return self.status.__str__()
+        status = await get_job(self.job_id, workbench_name=self.workbench.name,
+                               auth_token=self.workbench.auth.get_access_token(), client=self.workbench.client)
+        if isinstance(status, JobStatus):
+            if status != self.status:
+                self.workbench.job_store.update_status(self.workbench.name, self.job_id, status.name)
+            self.status = status
+        return status.__str__()
+
+    async def wait(self, timeout: float = None, raise_on_failure: bool = True,
+                   min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL) -> JobStatus:
+        """
+        Polls with the same backoff and jitter as Poller until the job finishes
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        interval = min_interval
+        while True:
+            previous = self.status
+            await self.get_status()
+            if self.status in TERMINAL_STATUSES:
+                if raise_on_failure and self.status == JobStatus.FAILED:
+                    raise JobFailedError(self)
+                return self.status
+            interval = min_interval if self.status != previous else min(interval * DEFAULT_BACKOFF, max_interval)
+            delay = interval * random.uniform(1 - DEFAULT_JITTER, 1 + DEFAULT_JITTER)
+            if deadline is not None:
+                if time.monotonic() + delay > deadline:
+                    raise TimeoutError(f'Job {self.job_id} did not finish within {timeout} seconds')
+            await asyncio.sleep(delay)
+
+    async def logs(self):
+        return await get_job_logs(self.job_id, workbench_name=self.workbench.name,
+                                  auth_token=self.workbench.auth.get_access_token(), client=self.workbench.client)
+
+    async def stream_logs(self):
+        try:
+            async for _, line in iter_job_log_lines(self.job_id, workbench_name=self.workbench.name,
+                                                    auth_token=self.workbench.auth.get_access_token(),
+                                                    client=self.workbench.client, flush_partial=True):
+                print(line.decode('utf-8', errors='replace').rstrip('\r'))
+        except Exception as e:
+            print(e)
+
+    async def _follow_logs(self, slots: asyncio.Semaphore, output_dir: str, poll_interval: float,
+                           read_timeout: float, max_retries: int):
+        out = None
+        if output_dir:
+            path = join(output_dir, f'{self.job_id}.log')
+            self.log_offset = getsize(path) if exists(path) else 0
+            out = open(path, 'ab')
+        failures = 0
+        try:
+            while True:
+                finished = self.status in TERMINAL_STATUSES
+                if not finished:
+                    await self.get_status()
+                    finished = self.status in TERMINAL_STATUSES
+                # jobs without a free stream slot only read what is logged so far and disconnect
+                streaming = not slots.locked()
+                if streaming:
+                    await slots.acquire()
+                try:
+                    async for offset, line in iter_job_log_lines(
+                            self.job_id, workbench_name=self.workbench.name,
+                            auth_token=self.workbench.auth.get_access_token(), offset=self.log_offset,
+                            client=self.workbench.client, flush_partial=finished,
+                            read_timeout=read_timeout if streaming else DEFAULT_LOG_POLL_READ_TIMEOUT):
+                        self.log_offset = offset
+                        failures = 0
+                        if out:
+                            out.write(line + b'\n')
+                        print(f"[{self.job_id}] {line.decode('utf-8', errors='replace').rstrip(chr(13))}")
+                except httpx.ReadTimeout:
+                    # idle log, not an error
+                    pass
+                except (httpx.TransportError, ApiError) as e:
+                    waiting = isinstance(e, ApiError) and e.status_code == 404 and not finished
+                    if not waiting and not (isinstance(e, httpx.TransportError) or e.transient):
+                        raise
+                    if not waiting:
+                        failures += 1
+                        if failures > max_retries:
+                            raise
+                        instrumentation.record_retry('GET', f'/{self.workbench.name}/jobs/{self.job_id}/logs/stream')
+                        await asyncio.sleep(min(poll_interval * 2 ** failures, DEFAULT_LOG_MAX_BACKOFF))
+                        continue
+                finally:
+                    if streaming:
+                        slots.release()
+                if finished:
+                    return
+                await asyncio.sleep(poll_interval)
+        finally:
+            if out:
+                out.close()
+
+
+async def list_workbenches(client: AsyncClient = None) -> Records:
+    """
+    Workbenches of the signed in user as WorkbenchRecords, sorted by name; call render() on the result to print them
+    """
+    client = client or get_async_client()
+    r = await client.get('/workbench/me', auth_token=os.environ.get('TINYBIO_AUTH_TOKEN'))
+    if r.status_code != 200:
+        raise ApiError(r.content, status_code=r.status_code)
+    return Records(sorted((WorkbenchRecord(workbench.get('name'), workbench.get('size'), workbench.get('updated_at'))
+                           for workbench in r.json()), key=lambda record: record.name or ''),
+                   empty_message='No workbenches yet. Create one with tiny.aio.create_workbench(name).')
+
+
+async def create_workbench(workbench_name: str, client: AsyncClient = None) -> Optional[AsyncWorkbench]:
+    r = await (client or get_async_client()).post(f'/workbench/{workbench_name}',
+                                                  auth_token=os.environ.get('TINYBIO_AUTH_TOKEN'))
+    if r.status_code != 200:
+        print(r.content)
+        return None
+    generate_workbench_name = r.json().get('workbench_name')
+    print(f"The {generate_workbench_name} workbench is now available.")
+    return AsyncWorkbench(generate_workbench_name, client=client)
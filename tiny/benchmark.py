@@ -0,0 +1,316 @@
+"""
+Client benchmarks against the local stand-in api (tiny.mockserver), so releases can be compared on the same machine.
+
+    python -m tiny.benchmark --output before.json
+    python -m tiny.benchmark --output after.json --compare before.json
+
+Every benchmark starts its own mock server in a child process and keeps its job store and listing cache in a
+temporary directory, so nothing is read from or written to ~/.tiny. Reports are JSON: the parameters, the
+environment and, per benchmark, the seconds of each run and the throughput of the median run. Comparing two reports
+is only meaningful when their parameters match, which --compare checks.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from os.path import join, dirname
+from typing import Callable, Dict, List, Optional
+
+from .client import Client
+from .jobstore import JobStore
+from .main import Workbench, Auth, print_table
+from .manifest import Manifest
+from .mockserver import MockServerProcess
+from .storage import upload_files
+
+REPORT_VERSION: int = 1
+DEFAULT_REPEAT: int = 3
+DEFAULT_LATENCY: float = 0.01
+
+# full size parameters; --quick divides the counts by QUICK_FACTOR
+DEFAULT_PARAMS = {
+    'latency': DEFAULT_LATENCY,
+    'bandwidth': None,
+    'upload_files': 16,
+    'upload_file_size': 8 * 1024 * 1024,
+    'upload_workers': 8,
+    'ls_objects': 100_000,
+    'jobs': 1000,
+    'log_lines': 200_000,
+}
+QUICK_FACTOR: int = 10
+
+
+class _Benchmark:
+    def __init__(self, name: str, unit: str, server: Callable[[dict], dict], setup: Callable, run: Callable):
+        """
+        :param unit: throughput unit, the amount run returns is per second of the run
+        :param server: mock server options for the parameters
+        :param setup: (workbench, params, workdir) -> state, not timed
+        :param run: (workbench, params, state) -> amount of work done, timed
+        """
+        self.name = name
+        self.unit = unit
+        self.server = server
+        self.setup = setup
+        self.run = run
+
+
+def _workbench(url: str, workdir: str, name: str) -> Workbench:
+    client = Client(base_url=url)
+    workbench = Workbench(name, client=client, job_store=JobStore(join(workdir, 'jobs.sqlite')),
+                          manifest=Manifest(name, path=join(workdir, f'{name}.sqlite')))
+    workbench.auth = Auth('benchmark')
+    return workbench
+
+
+def _upload_setup(workbench: Workbench, params: dict, workdir: str) -> str:
+    source = join(workdir, 'upload')
+    os.makedirs(source, exist_ok=True)
+    content = os.urandom(params['upload_file_size'])
+    for i in range(params['upload_files']):
+        with open(join(source, f'sample_{i:03d}.fastq.gz'), 'wb') as f:
+            f.write(content)
+    return source
+
+
+def _upload_run(workbench: Workbench, params: dict, source: str) -> float:
+    upload_files(workbench.name, source, auth_token=workbench.auth.get_access_token(), client=workbench.client,
+                 max_workers=params['upload_workers'])
+    return params['upload_files'] * params['upload_file_size'] / 1024 ** 2
+
+
+def _ls_cold_run(workbench: Workbench, params: dict, state) -> float:
+    # the listing is fetched unconditionally, indexed and rendered
+    workbench.ls(refresh=True)
+    return params['ls_objects']
+
+
+def _ls_warm_setup(workbench: Workbench, params: dict, workdir: str):
+    workbench.ls(refresh=True)
+
+
+def _ls_warm_run(workbench: Workbench, params: dict, state) -> float:
+    workbench.ls()
+    return params['ls_objects']
+
+
+def _iter_files_run(workbench: Workbench, params: dict, state) -> float:
+    return sum(1 for _ in workbench.iter_files())
+
+
+def _submit_many(workbench: Workbench, count: int) -> list:
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return list(executor.map(lambda i: workbench._submit('fastqc', f'fastqc /input/sample_{i:04d}.fastq.gz'),
+                                 range(count)))
+
+
+def _jobs_submit_run(workbench: Workbench, params: dict, state) -> float:
+    _submit_many(workbench, params['jobs'])
+    return params['jobs']
+
+
+def _jobs_setup(workbench: Workbench, params: dict, workdir: str):
+    _submit_many(workbench, params['jobs'])
+
+
+def _jobs_run(workbench: Workbench, params: dict, state) -> float:
+    # jobs keep running on the server, so every call polls all of them
+    workbench.jobs()
+    return params['jobs']
+
+
+def _jobs_per_job_run(workbench: Workbench, params: dict, state) -> float:
+    # as against an api without the bulk status endpoint
+    workbench._bulk_status = False
+    workbench.refresh_jobs()
+    return params['jobs']
+
+
+def _logs_setup(workbench: Workbench, params: dict, workdir: str):
+    return workbench._submit('fastqc', 'fastqc /input/sample.fastq.gz')
+
+
+def _logs_run(workbench: Workbench, params: dict, job) -> float:
+    return sum(1 for _ in job.iter_logs(follow=False))
+
+
+def _no_setup(workbench: Workbench, params: dict, workdir: str):
+    return None
+
+
+BENCHMARKS = [
+    _Benchmark('upload', 'MB/s', lambda p: {'bandwidth': p['bandwidth']}, _upload_setup, _upload_run),
+    _Benchmark('ls_cold', 'entries/s', lambda p: {'objects': p['ls_objects']}, _no_setup, _ls_cold_run),
+    _Benchmark('ls_warm', 'entries/s', lambda p: {'objects': p['ls_objects']}, _ls_warm_setup, _ls_warm_run),
+    _Benchmark('iter_files', 'entries/s', lambda p: {'objects': p['ls_objects']}, _no_setup, _iter_files_run),
+    _Benchmark('jobs_submit', 'jobs/s', lambda p: {'job_duration': 3600}, _no_setup, _jobs_submit_run),
+    _Benchmark('jobs_poll', 'jobs/s', lambda p: {'job_duration': 3600}, _jobs_setup, _jobs_run),
+    _Benchmark('jobs_poll_per_job', 'jobs/s', lambda p: {'job_duration': 3600}, _jobs_setup, _jobs_per_job_run),
+    _Benchmark('log_stream', 'lines/s', lambda p: {'log_lines': p['log_lines'], 'bandwidth': p['bandwidth']},
+               _logs_setup, _logs_run),
+]
+
+
+def _version() -> str:
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return 'unknown'
+    try:
+        return version('tiny-cli')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=dirname(__file__),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+    except OSError:
+        return None
+    return commit.stdout.strip() or None
+
+
+def run_benchmark(benchmark: _Benchmark, params: dict, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Runs one benchmark repeat times against a fresh mock server
+    :return: {'unit', 'runs' (seconds), 'seconds' (median), 'throughput' (amount per second of the median run)}
+    """
+    server_options = dict(benchmark.server(params), latency=params['latency'])
+    workdir = tempfile.mkdtemp(prefix=f'tiny-benchmark-{benchmark.name}-')
+    try:
+        with MockServerProcess(**server_options) as server:
+            runs = []
+            amounts = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                workbench = _workbench(server.url, workdir, f'benchmark-{benchmark.name}')
+                state = benchmark.setup(workbench, params, workdir)
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    amounts.append(benchmark.run(workbench, params, state))
+                    runs.append(time.perf_counter() - started)
+            workbench.client.close()
+            workbench.job_store.close()
+            workbench.manifest.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    median = statistics.median(runs)
+    amount = amounts[runs.index(min(runs, key=lambda seconds: abs(seconds - median)))]
+    return {'unit': benchmark.unit, 'runs': runs, 'seconds': median, 'throughput': amount / median if median else None}
+
+
+def run_benchmarks(params: dict = None, names: List[str] = None, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Runs the benchmarks and returns the report
+    :param params: overrides of DEFAULT_PARAMS
+    :param names: only run these benchmarks
+    :param repeat: timed runs per benchmark
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    unknown = set(names or []) - {benchmark.name for benchmark in BENCHMARKS}
+    if unknown:
+        raise ValueError(f'Unknown benchmarks {sorted(unknown)}')
+    results = {}
+    for benchmark in BENCHMARKS:
+        if names and benchmark.name not in names:
+            continue
+        print(f'Running {benchmark.name}...', flush=True)
+        results[benchmark.name] = run_benchmark(benchmark, params, repeat=repeat)
+    return {
+        'report_version': REPORT_VERSION,
+        'tiny_version': _version(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'repeat': repeat,
+        'params': params,
+        'results': results,
+    }
+
+
+def print_report(report: dict, previous: dict = None):
+    """
+    Prints the results, next to those of a previous report when given
+    """
+    headers = ['Benchmark', 'Seconds', 'Throughput']
+    if previous:
+        headers += ['Previous', 'Change']
+    table = []
+    for name, result in report['results'].items():
+        row = [name, f"{result['seconds']:.3f}", f"{result['throughput']:,.1f} {result['unit']}"]
+        if previous:
+            before = previous.get('results', {}).get(name)
+            if before and before.get('throughput') and result.get('throughput'):
+                row += [f"{before['throughput']:,.1f} {before['unit']}",
+                        f"{(result['throughput'] / before['throughput'] - 1) * 100:+.1f}%"]
+            else:
+                row += ['N/A', 'N/A']
+        table.append(row)
+    print_table(headers, table, maxcolwidths=[None] * len(headers))
+
+
+def regressions(report: dict, previous: dict, threshold: float) -> Dict[str, float]:
+    """
+    Benchmarks whose throughput dropped by more than threshold percent, with the change in percent
+    """
+    changes = {}
+    for name, result in report['results'].items():
+        before = previous.get('results', {}).get(name)
+        if before and before.get('throughput') and result.get('throughput'):
+            change = (result['throughput'] / before['throughput'] - 1) * 100
+            if change < -threshold:
+                changes[name] = change
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the tinybio client against a local mock api')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--compare', help='JSON report of an earlier run to compare against')
+    parser.add_argument('--fail-above', type=float, default=None,
+                        help='exit with status 1 when a throughput dropped by more than this percent')
+    parser.add_argument('--only', help='comma separated benchmarks to run, of ' +
+                                       ', '.join(benchmark.name for benchmark in BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--quick', action='store_true', help=f'divide every count by {QUICK_FACTOR}')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='seconds the server adds per request')
+    parser.add_argument('--bandwidth', type=float, default=None, help='bytes per second per request body')
+    args = parser.parse_args(argv)
+
+    params = {'latency': args.latency, 'bandwidth': args.bandwidth}
+    if args.quick:
+        params.update({name: max(DEFAULT_PARAMS[name] // QUICK_FACTOR, 1)
+                       for name in ('upload_files', 'ls_objects', 'jobs', 'log_lines')})
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    report = run_benchmarks(params, names=args.only.split(',') if args.only else None, repeat=args.repeat)
+    if previous and previous.get('params') != report['params']:
+        print(f"Warning: {args.compare} was run with different parameters, the numbers are not comparable")
+    print_report(report, previous)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if previous and args.fail_above is not None:
+        dropped = regressions(report, previous, args.fail_above)
+        if dropped:
+            print('Regressions: ' + ', '.join(f'{name} {change:+.1f}%' for name, change in dropped.items()))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+The tiny command. Only the standard library is imported up front; each subcommand imports what it needs, so
+`tiny --help` and argument errors return straight away.
+
+    export TINYBIO_AUTH_TOKEN=... TINYBIO_WORKBENCH=my-workbench
+    tiny ls input/atac-seq --depth 1
+    tiny run fastqc 'fastqc /input/atac-seq/*.gz -o /output/fastqc' --wait
+    tiny --json jobs --status Running | jq -r '.[].job_id'
+
+With --json, the result is written to stdout as JSON (one object per line for logs) and everything else goes to
+stderr.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+
+class CliError(Exception):
+    pass
+
+
+def _workbench(args):
+    if not os.environ.get('TINYBIO_AUTH_TOKEN'):
+        raise CliError('TINYBIO_AUTH_TOKEN is not set, create a token at https://api.tinybio.cloud/readme-docs/login')
+    if not args.workbench:
+        raise CliError('no workbench given, pass --workbench or set TINYBIO_WORKBENCH')
+    from .main import Workbench
+
+    return Workbench(args.workbench)
+
+
+def _emit(args, value):
+    json.dump(value, args.out, default=str)
+    args.out.write('\n')
+
+
+def _ls(args) -> int:
+    workbench = _workbench(args)
+    if not args.json:
+        workbench.ls(args.path, refresh=args.refresh, depth=args.depth, max_entries=args.limit)
+        return 0
+    from .main import _limit_entries
+
+    entries = workbench._listing(args.path, refresh=args.refresh)
+    _emit(args, list(_limit_entries(entries, args.path, args.depth, args.limit)))
+    return 0
+
+
+def _run(args) -> int:
+    from .workflow import JobStatus
+
+    workbench = _workbench(args)
+    job = workbench.run(args.tool, ' '.join(args.full_command), memoize=args.memoize or None)
+    if job.job_id == 'N/A':
+        return 1
+    if not args.json:
+        print(job)
+    if args.follow:
+        for line in job.iter_logs():
+            print(line)
+    elif args.wait:
+        job.wait(raise_on_failure=False)
+    if args.json:
+        _emit(args, job.record._asdict())
+    return 0 if not (args.wait or args.follow) or job.status == JobStatus.SUCCEEDED else 1
+
+
+def _jobs(args) -> int:
+    workbench = _workbench(args)
+    if args.job_id:
+        job = workbench.jobs(args.job_id)
+        if job is None:
+            raise CliError(f'job {args.job_id} not found in the local job store')
+        job.get_status()
+        if args.json:
+            _emit(args, job.record._asdict())
+        else:
+            print(job)
+        return 0
+    records = workbench.iter_jobs(status=args.status, exclude=args.exclude, tool=args.tool, limit=args.limit)
+    if args.json:
+        _emit(args, [record._asdict() for record in records])
+    else:
+        from .main import NO_JOBS_MESSAGE
+        from .records import render
+
+        render(records, limit=None, empty_message=NO_JOBS_MESSAGE)
+    return 0
+
+
+def _logs(args) -> int:
+    from .main import Job
+
+    workbench = _workbench(args)
+    # jobs submitted elsewhere are not in the local store, their logs can still be read
+    job = workbench.jobs(args.job_id) or Job(args.job_id, None, None, None, workbench)
+    for line in job.iter_logs(follow=args.follow, since=args.since, tail=args.tail):
+        if args.json:
+            _emit(args, {'job_id': job.job_id, 'line': line})
+        else:
+            print(line)
+    return 0
+
+
+def _upload(args) -> int:
+    workbench = _workbench(args)
+    uploaded = workbench.upload_file(args.path, max_workers=args.workers, chunked=args.chunked)
+    if uploaded is None:
+        return 1
+    if args.json:
+        _emit(args, uploaded)
+    else:
+        for local_path, remote_path in uploaded.items():
+            print(f'{local_path} -> {remote_path}')
+    return 0
+
+
+def _download(args) -> int:
+    workbench = _workbench(args)
+    downloaded = workbench.download(args.remote_path, dest=args.dest, max_workers=args.workers, verify=args.verify)
+    if downloaded is None:
+        return 1
+    if args.json:
+        _emit(args, downloaded)
+    elif args.dest is None:
+        print(downloaded.get('url', downloaded) if isinstance(downloaded, dict) else downloaded)
+    else:
+        for remote_path, local_path in downloaded.items():
+            print(f'{remote_path} -> {local_path}')
+    return 0
+
+
+def _sync(args) -> int:
+    from .sync import UP, DOWN
+
+    workbench = _workbench(args)
+    plan = workbench.sync(args.local_dir, args.remote_prefix, direction=DOWN if args.down else UP,
+                          dry_run=args.dry_run, max_workers=args.workers, chunked=args.chunked)
+    if args.json:
+        _emit(args, plan)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='tiny', description='Run bioinformatics tools on tinybio workbenches')
+    parser.add_argument('-w', '--workbench', default=os.environ.get('TINYBIO_WORKBENCH'),
+                        help='workbench to use, defaults to $TINYBIO_WORKBENCH')
+    parser.add_argument('--json', action='store_true', help='write the result to stdout as JSON')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    ls = commands.add_parser('ls', help='list workbench files')
+    ls.add_argument('path', nargs='?', help='only list files under this path')
+    ls.add_argument('--depth', type=int, help='levels below path to show')
+    ls.add_argument('--limit', type=int, help='stop after this many files')
+    ls.add_argument('--refresh', action='store_true', help='fetch the listing even if the cached one is fresh')
+    ls.set_defaults(handler=_ls)
+
+    run = commands.add_parser('run', help='run a tool on the workbench')
+    run.add_argument('tool')
+    run.add_argument('full_command', nargs='+', help='command to run, quoted or as the remaining words after --')
+    run.add_argument('--memoize', action='store_true', help='reuse an earlier successful run of the same command')
+    run.add_argument('--wait', action='store_true', help='wait for the job, exit with 1 if it fails')
+    run.add_argument('-f', '--follow', action='store_true', help='stream the log until the job finishes')
+    run.set_defaults(handler=_run)
+
+    jobs = commands.add_parser('jobs', help='show jobs, or one job')
+    jobs.add_argument('job_id', nargs='?')
+    jobs.add_argument('--status', action='append', help='only jobs in this status, e.g. Running (repeatable)')
+    jobs.add_argument('--exclude', action='append', help='hide jobs in this status (repeatable)')
+    jobs.add_argument('--tool', help='only jobs of this tool')
+    jobs.add_argument('--limit', type=int, help='only the most recent jobs')
+    jobs.set_defaults(handler=_jobs)
+
+    logs = commands.add_parser('logs', help="print a job's log")
+    logs.add_argument('job_id')
+    logs.add_argument('-f', '--follow', action='store_true', help='keep printing until the job finishes')
+    logs.add_argument('--tail', type=int, help='start with the last TAIL lines')
+    logs.add_argument('--since', type=int, default=0, help='byte offset to start from')
+    logs.set_defaults(handler=_logs)
+
+    upload = commands.add_parser('upload', help='upload a file or directory to input/')
+    upload.add_argument('path')
+    upload.add_argument('--chunked', action='store_true', help='upload large files in resumable parts')
+    upload.add_argument('--workers', type=int, default=8, help='files uploaded at once')
+    upload.set_defaults(handler=_upload)
+
+    download = commands.add_parser('download', help='download a file, or a directory ending with /')
+    download.add_argument('remote_path')
+    download.add_argument('dest', nargs='?', help='local path, without it only the download url is printed')
+    download.add_argument('--verify', action='store_true', help='check checksums of the downloaded files')
+    download.add_argument('--workers', type=int, default=8, help='files downloaded at once')
+    download.set_defaults(handler=_download)
+
+    sync = commands.add_parser('sync', help='transfer only the files that differ between a directory and a prefix')
+    sync.add_argument('local_dir')
+    sync.add_argument('remote_prefix')
+    sync.add_argument('--down', action='store_true', help='make local_dir match the workbench instead')
+    sync.add_argument('--dry-run', action='store_true', help='only show what would be transferred')
+    sync.add_argument('--chunked', action='store_true', help='upload large files in resumable parts')
+    sync.add_argument('--workers', type=int, help='files transferred at once')
+    sync.set_defaults(handler=_sync)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    args.out = sys.stdout
+    try:
+        # keeps the progress and tables the library prints out of the JSON on stdout
+        with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+            return args.handler(args)
+    except CliError as e:
+        print(f'tiny: error: {e}', file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # the reader went away, e.g. tiny logs JOB_ID | head; stdout cannot be flushed on exit either
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except Exception as e:
+        print(f'tiny: error: {e}', file=sys.stderr)
+        return 1
@@ -0,0 +1,331 @@
+import asyncio
+import contextlib
+import threading
+import time
+import weakref
+from typing import Optional, Union
+
+import httpx
+
+from . import instrumentation
+from .errors import TRANSIENT_STATUS_CODES
+from .retry import RetryPolicy, CircuitBreaker, IDEMPOTENT_METHODS
+from .settings import BASE_URL
+
+DEFAULT_MAX_CONNECTIONS: int = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+DEFAULT_KEEPALIVE_EXPIRY: float = 30.0
+# read/write timeouts apply per socket operation, not to the whole request
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=30.0)
+# uploads and downloads of large files, which may wait a while for a free connection of the pool
+TRANSFER_TIMEOUT = httpx.Timeout(300.0, connect=30.0, pool=None)
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class Client:
+    """
+    Keep-alive, HTTP/2-capable connection pool shared by every call to the tinybio API.
+
+    A single instance is safe to use from several threads. Each request carries its own
+    auth token so one client can serve several workbenches.
+    """
+
+    def __init__(
+            self,
+            base_url: str = BASE_URL,
+            http2: bool = True,
+            max_connections: int = DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+            timeout: Union[httpx.Timeout, float, None] = DEFAULT_TIMEOUT,
+            transport: httpx.BaseTransport = None,
+            retry_policy: RetryPolicy = None,
+            breaker: CircuitBreaker = None,
+    ):
+        self.base_url = base_url
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.breaker = breaker or CircuitBreaker(max_concurrency=max_connections)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http = httpx.Client(
+            base_url=base_url,
+            http2=http2,
+            limits=limits,
+            timeout=timeout,
+            transport=transport,
+        )
+
+    def __repr__(self):
+        return f'Client({self.base_url})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def _headers(auth_token: Optional[str], headers: dict = None) -> dict:
+        merged = dict(headers or {})
+        if auth_token:
+            merged['Authorization'] = f'Bearer {auth_token}'
+        return merged
+
+    def request(self, method: str, url: str, auth_token: str = None, headers: dict = None,
+                idempotency_key: str = None, idempotent: bool = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request through the shared pool, retrying transient failures according to the retry policy
+        :param method: HTTP method
+        :param url: path relative to the base url, or an absolute url (e.g. a signed download url)
+        :param auth_token: auth token provided by logging in, omitted from the request when None
+        :param headers: extra request headers
+        :param idempotency_key: sent as the Idempotency-Key header, makes a non-idempotent request safe to retry
+        :param idempotent: overrides whether the request may be retried after it may have reached the server
+        :return:
+        """
+        headers = self._headers(auth_token, headers)
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS or idempotency_key is not None
+        attempt = 0
+        while True:
+            self.breaker.acquire()
+            try:
+                response = self._send(method, url, headers, kwargs)
+            except httpx.TransportError as e:
+                self.breaker.release(False)
+                if attempt >= self.retry_policy.max_retries or not self.retry_policy.retry_error(e, idempotent):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+            else:
+                transient = response.status_code in TRANSIENT_STATUS_CODES
+                self.breaker.release(not transient)
+                if not transient or attempt >= self.retry_policy.max_retries or \
+                        not self.retry_policy.retry_response(response, idempotent):
+                    return response
+                delay = self.retry_policy.delay(attempt, response)
+                response.close()
+            instrumentation.record_retry(method, url)
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, method: str, url: str, headers: dict, kwargs: dict) -> httpx.Response:
+        if not instrumentation.enabled:
+            return self._http.request(method, url, headers=headers, **kwargs)
+        started = time.perf_counter()
+        try:
+            response = self._http.request(method, url, headers=headers, **kwargs)
+        except Exception as e:
+            instrumentation.record_error(method, url, started, e)
+            raise
+        instrumentation.record_response(method, url, started, response)
+        return response
+
+    def get(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return self.request('GET', url, auth_token=auth_token, **kwargs)
+
+    def post(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return self.request('POST', url, auth_token=auth_token, **kwargs)
+
+    def put(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return self.request('PUT', url, auth_token=auth_token, **kwargs)
+
+    def delete(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return self.request('DELETE', url, auth_token=auth_token, **kwargs)
+
+    @contextlib.contextmanager
+    def stream(self, method: str, url: str, auth_token: str = None, headers: dict = None, **kwargs):
+        """
+        Opens a streaming response, use as a context manager. Streams are not retried, a partly consumed body
+        cannot be replayed; callers resume from what they received instead. They wait while the circuit is open but
+        do not count against the concurrency limit, since log streams stay open for hours.
+        """
+        self.breaker.acquire(hold=False)
+        success = None
+        started = time.perf_counter()
+        try:
+            with self._http.stream(method, url, headers=self._headers(auth_token, headers), **kwargs) as response:
+                success = response.status_code not in TRANSIENT_STATUS_CODES
+                yield response
+        except Exception as e:
+            if isinstance(e, httpx.TransportError):
+                success = False
+            if instrumentation.enabled:
+                instrumentation.record_error(method, url, started, e)
+            raise
+        finally:
+            self.breaker.release(success, hold=False)
+        if instrumentation.enabled:
+            # recorded once the stream is closed, so the latency and byte count cover the whole body
+            instrumentation.record_response(method, url, started, response)
+
+    def close(self):
+        self._http.close()
+
+
+class AsyncClient:
+    """
+    asyncio counterpart of Client, built on httpx.AsyncClient. Many coroutines share its connection pool, so
+    thousands of polls and log streams can run from one event loop.
+    """
+
+    def __init__(
+            self,
+            base_url: str = BASE_URL,
+            http2: bool = True,
+            max_connections: int = DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+            timeout: Union[httpx.Timeout, float, None] = DEFAULT_TIMEOUT,
+            transport: httpx.AsyncBaseTransport = None,
+            retry_policy: RetryPolicy = None,
+            breaker: CircuitBreaker = None,
+    ):
+        self.base_url = base_url
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.breaker = breaker or CircuitBreaker(max_concurrency=max_connections)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            http2=http2,
+            limits=limits,
+            timeout=timeout,
+            transport=transport,
+        )
+
+    def __repr__(self):
+        return f'AsyncClient({self.base_url})'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def request(self, method: str, url: str, auth_token: str = None, headers: dict = None,
+                      idempotency_key: str = None, idempotent: bool = None, **kwargs) -> httpx.Response:
+        headers = Client._headers(auth_token, headers)
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS or idempotency_key is not None
+        attempt = 0
+        while True:
+            await self.breaker.acquire_async()
+            try:
+                response = await self._send(method, url, headers, kwargs)
+            except httpx.TransportError as e:
+                self.breaker.release(False)
+                if attempt >= self.retry_policy.max_retries or not self.retry_policy.retry_error(e, idempotent):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+            else:
+                transient = response.status_code in TRANSIENT_STATUS_CODES
+                self.breaker.release(not transient)
+                if not transient or attempt >= self.retry_policy.max_retries or \
+                        not self.retry_policy.retry_response(response, idempotent):
+                    return response
+                delay = self.retry_policy.delay(attempt, response)
+                await response.aclose()
+            instrumentation.record_retry(method, url)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, method: str, url: str, headers: dict, kwargs: dict) -> httpx.Response:
+        if not instrumentation.enabled:
+            return await self._http.request(method, url, headers=headers, **kwargs)
+        started = time.perf_counter()
+        try:
+            response = await self._http.request(method, url, headers=headers, **kwargs)
+        except Exception as e:
+            instrumentation.record_error(method, url, started, e)
+            raise
+        instrumentation.record_response(method, url, started, response)
+        return response
+
+    async def get(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, auth_token=auth_token, **kwargs)
+
+    async def post(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, auth_token=auth_token, **kwargs)
+
+    async def put(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return await self.request('PUT', url, auth_token=auth_token, **kwargs)
+
+    async def delete(self, url: str, auth_token: str = None, **kwargs) -> httpx.Response:
+        return await self.request('DELETE', url, auth_token=auth_token, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, auth_token: str = None, headers: dict = None, **kwargs):
+        """
+        Opens a streaming response, use as an async context manager. Not retried, see Client.stream
+        """
+        await self.breaker.acquire_async(hold=False)
+        success = None
+        started = time.perf_counter()
+        try:
+            async with self._http.stream(method, url, headers=Client._headers(auth_token, headers),
+                                         **kwargs) as response:
+                success = response.status_code not in TRANSIENT_STATUS_CODES
+                yield response
+        except Exception as e:
+            if isinstance(e, httpx.TransportError):
+                success = False
+            if instrumentation.enabled:
+                instrumentation.record_error(method, url, started, e)
+            raise
+        finally:
+            self.breaker.release(success, hold=False)
+        if instrumentation.enabled:
+            instrumentation.record_response(method, url, started, response)
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+_default_client: Optional[Client] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> Client:
+    """
+    Returns the process wide client, creating it on first use
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = Client()
+        return _default_client
+
+
+def set_client(client: Optional[Client]):
+    """
+    Replaces the process wide client used when no client is passed explicitly
+    :param client: client to use, or None to create a fresh default on next use
+    """
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+
+
+# connection pools cannot be shared between event loops, keep one default async client per loop
+_default_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> AsyncClient:
+    """
+    Returns the default async client of the running event loop, creating it on first use
+    """
+    loop = asyncio.get_running_loop()
+    client = _default_async_clients.get(loop)
+    if client is None:
+        client = _default_async_clients[loop] = AsyncClient()
+    return client
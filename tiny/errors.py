@@ -0,0 +1,23 @@
+from typing import Optional
+
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class ApiError(Exception):
+    """
+    Non-success response from the tinybio api
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def transient(self) -> bool:
+        return self.status_code in TRANSIENT_STATUS_CODES
+
+
+class AuthError(Exception):
+    """
+    A request needs an auth token and none is set
+    """
@@ -0,0 +1,215 @@
+import bisect
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+# set through enable()/disable(); the clients check it before doing any bookkeeping
+enabled: bool = os.environ.get('TINYBIO_METRICS', '').lower() in ('1', 'true', 'yes')
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# api routes, the most specific first; requests are aggregated per route rather than per url
+_ROUTES = [
+    '/workbench/me',
+    '/workbench/{workbench}/upload/multipart/{upload_id}/parts/{part_number}',
+    '/workbench/{workbench}/upload/multipart/{upload_id}/complete',
+    '/workbench/{workbench}/upload/multipart',
+    '/workbench/{workbench}/upload/file-url',
+    '/workbench/{workbench}/upload',
+    '/workbench/{workbench}/download',
+    '/workbench/{workbench}/run',
+    '/workbench/{workbench}/move-file',
+    '/workbench/{workbench}/create-directory',
+    '/workbench/{workbench}/delete-path',
+    '/workbench/{workbench}',
+    '/available-tools',
+    '/{workbench}/jobs/status',
+    '/{workbench}/jobs/{job_id}/logs/stream',
+    '/{workbench}/jobs/{job_id}/logs',
+    '/{workbench}/jobs/{job_id}',
+]
+_ROUTE_PATTERNS = [(re.compile('^' + re.sub(r'\{\w+\}', '[^/]+', route) + '$'), route) for route in _ROUTES]
+
+_lock = threading.Lock()
+_requests = {}
+_retries = {}
+_hooks: List[Callable[[dict], None]] = []
+
+
+@lru_cache(maxsize=4096)
+def endpoint(url: str) -> str:
+    """
+    Route a request url is aggregated under, 'external' for absolute urls such as signed download urls
+    """
+    if '://' in url:
+        return 'external'
+    path = url.split('?', 1)[0]
+    for pattern, route in _ROUTE_PATTERNS:
+        if pattern.match(path):
+            return route
+    return 'other'
+
+
+class _RequestStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.statuses = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(DEFAULT_LATENCY_BUCKETS) + 1)
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'statuses': dict(self.statuses),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_sum': self.latency_sum,
+            'latency_buckets': dict(zip(DEFAULT_LATENCY_BUCKETS + (float('inf'),), self.latency_buckets)),
+        }
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def add_hook(hook: Callable[[dict], None]):
+    """
+    Calls hook with a dict (method, endpoint, url, status_code, elapsed, bytes_sent, bytes_received, error) after
+    every request while instrumentation is enabled
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[dict], None]):
+    _hooks.remove(hook)
+
+
+def _record(method: str, url: str, started: float, status_code: Optional[int], bytes_sent: int,
+            bytes_received: int, error: Optional[BaseException]):
+    elapsed = time.perf_counter() - started
+    route = endpoint(str(url))
+    failed = error is not None or status_code >= 400
+    with _lock:
+        stats = _requests.get((method, route))
+        if stats is None:
+            stats = _requests[(method, route)] = _RequestStats()
+        stats.count += 1
+        stats.errors += failed
+        status = str(status_code) if error is None else type(error).__name__
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.bytes_sent += bytes_sent
+        stats.bytes_received += bytes_received
+        stats.latency_sum += elapsed
+        stats.latency_buckets[bisect.bisect_left(DEFAULT_LATENCY_BUCKETS, elapsed)] += 1
+    if _hooks:
+        event = {'method': method, 'endpoint': route, 'url': str(url), 'status_code': status_code,
+                 'elapsed': elapsed, 'bytes_sent': bytes_sent, 'bytes_received': bytes_received, 'error': error}
+        for hook in list(_hooks):
+            hook(event)
+
+
+def record_response(method: str, url: str, started: float, response):
+    """
+    Records a finished httpx response, started being the time.perf_counter() value before sending it
+    """
+    bytes_sent = int(response.request.headers.get('content-length') or 0)
+    _record(method, url, started, response.status_code, bytes_sent, response.num_bytes_downloaded, None)
+
+
+def record_error(method: str, url: str, started: float, error: BaseException):
+    _record(method, url, started, None, 0, 0, error)
+
+
+def record_retry(method: str, url: str):
+    if not enabled:
+        return
+    key = (method, endpoint(str(url)))
+    with _lock:
+        _retries[key] = _retries.get(key, 0) + 1
+
+
+def metrics(reset: bool = False) -> dict:
+    """
+    Snapshot of the recorded metrics
+    :param reset: clear the counters after taking the snapshot
+    :return: {'requests': {'METHOD endpoint': stats}, 'retries': {'METHOD endpoint': count}}
+    """
+    with _lock:
+        snapshot = {
+            'requests': {f'{method} {route}': stats.snapshot() for (method, route), stats in _requests.items()},
+            'retries': {f'{method} {route}': count for (method, route), count in _retries.items()},
+        }
+        if reset:
+            _requests.clear()
+            _retries.clear()
+    return snapshot
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+def prometheus_text() -> str:
+    """
+    The metrics in the Prometheus text exposition format
+    """
+    with _lock:
+        requests = {key: stats.snapshot() for key, stats in _requests.items()}
+        retries = dict(_retries)
+    lines = [
+        '# HELP tinybio_requests_total Requests sent to the tinybio api by status.',
+        '# TYPE tinybio_requests_total counter',
+    ]
+    for (method, route), stats in sorted(requests.items()):
+        for status, count in sorted(stats['statuses'].items()):
+            lines.append(f'tinybio_requests_total{_labels(method=method, endpoint=route, status=status)} {count}')
+    for name, key, help_text in (
+            ('tinybio_request_errors_total', 'errors', 'Requests that failed or returned an error status.'),
+            ('tinybio_request_bytes_sent_total', 'bytes_sent', 'Request body bytes sent.'),
+            ('tinybio_response_bytes_received_total', 'bytes_received', 'Response body bytes received.'),
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for (method, route), stats in sorted(requests.items()):
+            lines.append(f'{name}{_labels(method=method, endpoint=route)} {stats[key]}')
+    lines.append('# HELP tinybio_request_duration_seconds Request latency, until the body was read.')
+    lines.append('# TYPE tinybio_request_duration_seconds histogram')
+    for (method, route), stats in sorted(requests.items()):
+        cumulative = 0
+        for bound, count in stats['latency_buckets'].items():
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'tinybio_request_duration_seconds_bucket{_labels(method=method, endpoint=route, le=le)} '
+                         f'{cumulative}')
+        lines.append(f'tinybio_request_duration_seconds_sum{_labels(method=method, endpoint=route)} '
+                     f'{stats["latency_sum"]}')
+        lines.append(f'tinybio_request_duration_seconds_count{_labels(method=method, endpoint=route)} '
+                     f'{stats["count"]}')
+    lines.append('# HELP tinybio_retries_total Requests sent again after a transient failure.')
+    lines.append('# TYPE tinybio_retries_total counter')
+    for (method, route), count in sorted(retries.items()):
+        lines.append(f'tinybio_retries_total{_labels(method=method, endpoint=route)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path: str):
+    """
+    Writes prometheus_text() to path atomically, e.g. for the node exporter textfile collector
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+from os.path import join
+from typing import List, Optional
+
+from .settings import CACHE_DIR
+
+JOB_STORE_PATH: str = join(CACHE_DIR, 'jobs.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    workbench TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    tool TEXT,
+    version TEXT,
+    full_command TEXT,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (workbench, job_id)
+);
+CREATE INDEX IF NOT EXISTS jobs_workbench_submitted ON jobs (workbench, submitted_at);
+CREATE INDEX IF NOT EXISTS jobs_workbench_status ON jobs (workbench, status);
+CREATE INDEX IF NOT EXISTS jobs_workbench_tool ON jobs (workbench, tool);
+"""
+
+_COLUMNS = ['workbench', 'job_id', 'tool', 'version', 'full_command', 'status', 'submitted_at', 'updated_at']
+
+
+class JobStore:
+    """
+    Durable registry of submitted jobs, shared by every workbench in the process. Statuses are stored by JobStatus
+    name, e.g. 'SUCCEEDED'.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f'JobStore({self.path})'
+
+    def save(self, workbench: str, job_id: str, tool: str, version: str, full_command: str, status: str,
+             submitted_at: float = None):
+        """
+        Records a job, keeping the original submit time when it is already known
+        """
+        now = time.time()
+        with self._lock, self._db:
+            # INSERT ... ON CONFLICT DO UPDATE needs SQLite 3.24, older versions ship with Python 3.7 builds
+            self._db.execute(
+                'INSERT OR REPLACE INTO jobs (workbench, job_id, tool, version, full_command, status, submitted_at, '
+                'updated_at) VALUES (?, ?, ?, ?, ?, ?, '
+                'COALESCE((SELECT submitted_at FROM jobs WHERE workbench = ? AND job_id = ?), ?), ?)',
+                (workbench, job_id, tool, version, full_command, status, workbench, job_id, submitted_at or now, now)
+            )
+
+    def update_status(self, workbench: str, job_id: str, status: str):
+        with self._lock, self._db:
+            self._db.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE workbench = ? AND job_id = ?',
+                             (status, time.time(), workbench, job_id))
+
+    def get(self, workbench: str, job_id: str) -> Optional[dict]:
+        rows = self._select('WHERE workbench = ? AND job_id = ?', (workbench, job_id))
+        return rows[0] if rows else None
+
+    def query(self, workbench: str, status: List[str] = None, exclude_status: List[str] = None, tool: str = None,
+              since: float = None, until: float = None, limit: int = None) -> List[dict]:
+        """
+        Jobs of a workbench in submit order, filtered on the indexed columns
+        :param workbench: name of workbench
+        :param status: only these JobStatus names
+        :param exclude_status: none of these JobStatus names
+        :param tool: only jobs of this tool
+        :param since: only jobs submitted at or after this unix time
+        :param until: only jobs submitted before this unix time
+        :param limit: at most this many jobs, the most recent ones
+        """
+        clauses = ['workbench = ?']
+        params = [workbench]
+        if status:
+            clauses.append(f"status IN ({', '.join('?' * len(status))})")
+            params.extend(status)
+        if exclude_status:
+            clauses.append(f"status NOT IN ({', '.join('?' * len(exclude_status))})")
+            params.extend(exclude_status)
+        if tool:
+            clauses.append('tool = ?')
+            params.append(tool)
+        if since is not None:
+            clauses.append('submitted_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('submitted_at < ?')
+            params.append(until)
+        sql = f"WHERE {' AND '.join(clauses)} ORDER BY submitted_at DESC"
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return list(reversed(self._select(sql, params)))
+
+    def _select(self, sql: str, params) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs {sql}", params).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def close(self):
+        self._db.close()
+
+
+_default_job_store: Optional[JobStore] = None
+_default_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """
+    Returns the process wide job store, opening it on first use
+    """
+    global _default_job_store
+    with _default_job_store_lock:
+        if _default_job_store is None:
+            _default_job_store = JobStore()
+        return _default_job_store
@@ -1,17 +1,55 @@
-import json
+import asyncio
+import csv
+import io
 import os
-from datetime import datetime
-from typing import List, Tuple
-import humanize
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Tuple, Iterator, Iterable
 
 import httpx
-from tabulate import tabulate
-from anytree import Node, RenderTree
 
-from .storage import upload_files, download_file, list_files_in_workbench, upload_file_path, create_bucket, move_file, \
-    create_directory, get_workbenches, delete_path
-from .workflow import execute_workflow, get_job, get_job_logs, JobStatus, stream_job_logs
-from .settings import PROD_BASE_URL
+from .storage import upload_files, download_file, create_bucket, move_file, create_directory, get_workbenches, \
+    delete_path, download_files, upload_file_path_batch, iter_files_in_workbench, get_download_url, \
+    _upload_many, _download_many, move_files, delete_paths, DEFAULT_UPLOAD_WORKERS, DEFAULT_DOWNLOAD_WORKERS, \
+    DEFAULT_BULK_WORKERS
+from .sync import plan_sync, get_hash_cache, remote_updated, UP, SKIP, DEFAULT_HASH_WORKERS
+from .workflow import execute_workflow, get_job, get_jobs, get_job_logs, JobStatus, TERMINAL_STATUSES, \
+    iter_job_log_lines, get_tool_versions, DEFAULT_LOG_READ_TIMEOUT
+from .client import Client, AsyncClient, get_client
+from .transfer import DEFAULT_PART_SIZE
+from .remote import RemoteFile, DEFAULT_BLOCK_SIZE, DEFAULT_CACHE_BLOCKS
+from .manifest import Manifest, DEFAULT_MANIFEST_TTL
+from .jobstore import JobStore, get_job_store
+from .memo import RunCache, get_run_cache, run_key, referenced_paths, fingerprint
+from .errors import ApiError, AuthError
+from . import instrumentation
+from .ratelimit import RateLimiter
+from .poller import Poller, get_poller, ALL_COMPLETED
+from .settings import LOGIN_URL
+from .records import Records, JobRecord, WorkbenchRecord, DiskUsageRecord
+from .query import glob_prefix, match_glob, disk_usage
+
+
+DEFAULT_STATUS_WORKERS: int = 16
+DEFAULT_SUBMIT_WORKERS: int = 8
+DEFAULT_SUBMIT_RATE: float = 10.0
+BULK_STATUS_BATCH_SIZE: int = 500
+DEFAULT_LOG_POLL_INTERVAL: float = 5.0
+DEFAULT_LOG_MAX_BACKOFF: float = 60.0
+DEFAULT_LOG_RETRIES: int = 5
+NO_JOBS_MESSAGE = 'No jobs have been run yet. Run workbench.run(tool, full_command) to run a job.'
+
+
+def _run_coroutine(coroutine):
+    # notebooks already run an event loop in this thread, asyncio.run needs one of its own
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
 
 
 def print_table(headers, table_data, maxcolwidths=[None, None, 60, 60, 80], sort=None):
@@ -22,9 +60,89 @@ def print_table(headers, table_data, maxcolwidths=[None, None, 60, 60, 80], sort
         col_idx, order = sort
         table_data = sorted(table_data, key=lambda row: row[col_idx], reverse=order == "desc")
 
+    # tabulate is only imported once something is printed as a table
+    from tabulate import tabulate
+
     print(tabulate(table_data, headers=headers, tablefmt="grid", maxcolwidths=maxcolwidths))
 
 
+def _limit_entries(files: Iterable[dict], path: str = None, depth: int = None,
+                   max_entries: int = None) -> Iterator[dict]:
+    """
+    Applies the depth and max_entries limits of a listing to a stream of entries
+    """
+    base_depth = len(path.rstrip('/').split('/')) if path else 0
+    count = 0
+    for file in files:
+        if max_entries is not None and count >= max_entries:
+            return
+        if depth is not None and len(file.get('name').rstrip('/').split('/')) - base_depth > depth:
+            continue
+        count += 1
+        yield file
+
+
+def _build_tree(files: Iterable[dict], max_segments: int = None) -> dict:
+    """
+    Builds a trie of listing entries. Each node maps a path segment to its child node; the
+    '(path (size))' label of a file is stored as a one element tuple key so it keeps its place among the children.
+    Paths longer than max_segments are cut short and shown as their enclosing directory.
+    """
+    root = {}
+    for file in files:
+        file_name = file.get('name')
+        file_size = file.get('size')
+
+        path = file_name.split("/")
+        node = root
+        for name in path[:max_segments]:
+            node = node.setdefault(name, {})
+        if file_size is not None and (max_segments is None or len(path) <= max_segments):
+            node[(f"{file_name} ({file_size})",)] = None
+    return root
+
+
+def _render_tree(name: str, tree: dict) -> Iterator[str]:
+    """
+    Yields the lines of a tree drawing, one at a time
+    """
+    yield name
+    stack = [(iter(tree.items()), '', len(tree))]
+    while stack:
+        children, indent, remaining = stack.pop()
+        for key, child in children:
+            remaining -= 1
+            last = remaining == 0
+            yield f"{indent}{'└── ' if last else '├── '}{key[0] if isinstance(key, tuple) else key}"
+            if child:
+                stack.append((children, indent, remaining))
+                stack.append((iter(child.items()), indent + ('    ' if last else '│   '), len(child)))
+                break
+
+
+def _read_sample_sheet(samples) -> List[dict]:
+    """
+    Reads a CSV (or TSV, by extension) sample sheet with a header row, or passes a list of dicts through
+    """
+    if isinstance(samples, str):
+        delimiter = '\t' if samples.endswith(('.tsv', '.txt')) else ','
+        with open(samples, newline='') as f:
+            return [dict(row) for row in csv.DictReader(f, delimiter=delimiter)]
+    return [dict(sample) for sample in samples]
+
+
+def _store_status_filters(exclude: List[str] = None, status: List[str] = None) -> Tuple[List[str], List[str]]:
+    """
+    Turns the status filters of jobs(), display names or JobStatus names, into the JobStatus names the job store
+    filters on
+    """
+    # finished jobs never change status, so excluding them can be done by the store
+    exclude_status = [s.name for s in TERMINAL_STATUSES if s.__str__() in (exclude or []) or s.name in (exclude or [])]
+    status_names = [s.name for s in JobStatus if isinstance(s.value, str) and
+                    (s.__str__() in status or s.name in status)] if status else None
+    return exclude_status, status_names
+
+
 class Auth:
     def __init__(self, access_token: str = None):
         self.access_token = access_token
@@ -34,152 +152,520 @@ class Auth:
 
 
 class Workbench:
-    def __init__(self, workbench_name: str):
+    def __init__(self, workbench_name: str, client: Client = None, manifest_ttl: float = DEFAULT_MANIFEST_TTL,
+                 job_store: JobStore = None, memoize: bool = False, manifest: Manifest = None):
         self.name = workbench_name
         self._jobs = {}
+        self.job_store = job_store or get_job_store()
+        self.memoize = memoize
+        self._run_cache = None
+        self._tool_versions = None
+        self.client = client or get_client()
+        self.manifest = manifest or Manifest(workbench_name, ttl=manifest_ttl, base_url=self.client.base_url)
+        self._bulk_status = None
         auth_token = os.environ.get('TINYBIO_AUTH_TOKEN')
-        if auth_token:
-            self.auth = Auth(auth_token)
-        else:
-            print("""
-TINYBIO_AUTH_TOKEN NOT FOUND IN ENVIRONMENT VARIABLES
-
-To create a token click here: https://api.tinybio.cloud/readme-docs/login
-
-SET YOUR TOKEN AS AN ENVIRONMENT VARIABLE:
-import os
-os.environ['TINYBIO_AUTH_TOKEN']='YOUR_TOKEN_HERE'
-
-To gain access to your workbench, run:
-workbench = tiny.Workbench(name="WORKBENCH_NAME")
-
-Check out these comprehensive tutorials on RNA-Seq, ATAC-Seq, and Variant calling on our docs here: http://docs.tinybio.cloud
-            """)
+        self.auth = Auth(auth_token) if auth_token else None
 
     def __repr__(self):
         return f'Workbench({self.name})'
 
+    def _access_token(self) -> str:
+        if self.auth is None:
+            raise AuthError(f'No auth token for workbench {self.name}. TINYBIO_AUTH_TOKEN is not set, create a token '
+                            f'at {LOGIN_URL} and set it with os.environ[\'TINYBIO_AUTH_TOKEN\'] = \'YOUR_TOKEN_HERE\'')
+        return self.auth.get_access_token()
+
     def _add_job(self, job: 'Job'):
         self._jobs[job.job_id] = job
-
-    def run(self, tool: str, full_command: str):
+        self.job_store.save(self.name, job.job_id, job.tool, job.version, job.full_command, job.status.name,
+                            submitted_at=job.submitted_at)
+
+    def _job_from_record(self, record: dict) -> 'Job':
+        # reuse the live object so status updates made this session are not lost
+        job = self._jobs.get(record['job_id'])
+        if job is None:
+            job = Job(job_id=record['job_id'], tool=record['tool'], version=record['version'],
+                      full_command=record['full_command'], workbench=self, status=JobStatus[record['status']],
+                      submitted_at=record['submitted_at'])
+            self._jobs[job.job_id] = job
+        return job
+
+    def _load_jobs(self, **filters) -> List['Job']:
+        """
+        Jobs of this workbench from the job store, see JobStore.query for the filters
+        """
+        return [self._job_from_record(record) for record in self.job_store.query(self.name, **filters)]
+
+    def _submit(self, tool: str, full_command: str) -> 'Job':
         arguments = {
             'full_command': full_command,
             'tool': tool,
         }
-        status = JobStatus.QUEUED.__str__()
+        execution = execute_workflow(self.name, arguments, auth_token=self._access_token(), client=self.client)
+        job = Job(
+            job_id=execution.get('id'),
+            tool=execution.get('tool'),
+            version=execution.get('version'),
+            full_command=execution.get('full_command'),
+            workbench=self
+        )
+        self._add_job(job)
+        return job
+
+    @property
+    def run_cache(self) -> RunCache:
+        if self._run_cache is None:
+            self._run_cache = get_run_cache()
+        return self._run_cache
+
+    def _tool_version(self, tool: str) -> str:
+        if self._tool_versions is None:
+            try:
+                self._tool_versions = get_tool_versions(client=self.client)
+            except Exception:
+                self._tool_versions = {}
+        return self._tool_versions.get(tool)
+
+    def _path_entries(self, prefix: str) -> List[dict]:
+        if self.manifest.needs_refresh(prefix):
+            self.manifest.refresh(auth_token=self._access_token(), client=self.client)
+        return self.manifest.entries(prefix)
+
+    def _memoized_job(self, key: str) -> 'Job':
+        # the job of an earlier identical run, if it succeeded and the paths it touched are unchanged since
+        record = self.run_cache.get(self.name, key)
+        if record is None:
+            return None
+        job = self.jobs(record['job_id'])
+        if job is None:
+            return None
+        job.get_status()
+        if job.status != JobStatus.SUCCEEDED:
+            if job.status in TERMINAL_STATUSES:
+                self.run_cache.invalidate(self.name, key=key)
+            return None
+        record = self.run_cache.get(self.name, key)
+        current = fingerprint(record['paths'], self._path_entries)
+        if record['fingerprint'] is None:
+            # succeeded while nobody was watching
+            self.run_cache.settle(self.name, key, current)
+            return job
+        return job if current == record['fingerprint'] else None
+
+    def _settle_run(self, job: 'Job'):
+        record = self.run_cache.get_by_job(self.name, job.job_id)
+        if record is not None and record['fingerprint'] is None:
+            self.run_cache.settle(self.name, record['key'], fingerprint(record['paths'], self._path_entries))
+
+    def invalidate_runs(self, tool: str = None, full_command: str = None):
+        """
+        Forgets memoized runs so they are submitted again: the run of full_command, every run of tool, or with
+        neither every run of this workbench
+        """
+        key = run_key(tool, self._tool_version(tool), full_command) if full_command else None
+        self.run_cache.invalidate(self.name, key=key, tool=None if key else tool)
+
+    def run(self, tool: str, full_command: str, memoize: bool = None) -> 'Job':
+        """
+        Submits a job. With memoization on (memoize=True here or on the workbench), a job that already ran the same
+        tool version and command successfully is returned instead, as long as every workbench path the command
+        mentions is unchanged since it finished.
+        :param memoize: overrides the workbench setting for this call, False always submits
+        """
+        memoize = self.memoize if memoize is None else memoize
         try:
-            execution = execute_workflow(self.name, arguments, auth_token=self.auth.get_access_token())
-            job = Job(
-                job_id=execution.get('id'),
-                tool=execution.get('tool'),
-                version=execution.get('version'),
-                full_command=execution.get('full_command'),
-                workbench=self
-            )
-            self._add_job(job)
-            get_logs = f"workbench.jobs('{job.job_id}').logs()"
+            if memoize:
+                key = run_key(tool, self._tool_version(tool), full_command)
+                job = self._memoized_job(key)
+                if job is not None:
+                    print(f'Reusing job {job.job_id}, which already ran this command on the same inputs')
+                    return job
+            job = self._submit(tool, full_command)
+            if memoize:
+                self.run_cache.record(self.name, key, job.job_id, tool, full_command, referenced_paths(full_command))
+            return job
         except Exception as e:
-            status = e.__str__()
-            get_logs = 'N/A'
-            job = Job(
+            print(e)
+            return Job(
                 job_id='N/A',
                 tool=tool,
                 version='N/A',
                 full_command=full_command,
-                workbench=self
+                workbench=self,
+                error=e.__str__(),
             )
 
-        table = [[job.job_id, job.tool, job.version, status, get_logs, job.full_command]]
-        headers = ['Job ID', 'Tool', 'Version', 'Status', 'Get Logs', 'Full Command']
-
-        # format the table using tabulate
-        print_table(headers, table)
-
-    def upload_file(self, file) -> dict:
+    def run_many(self, tool: str, command_template: str, samples, max_workers: int = DEFAULT_SUBMIT_WORKERS,
+                 rate: float = DEFAULT_SUBMIT_RATE) -> Tuple[List['Job'], List[dict]]:
+        """
+        Submits one job per sample, filling command_template from the sample's columns with str.format,
+        e.g. 'bwa mem /input/ref.fa /input/{sample}_1.fq.gz -o /output/{sample}.sam'. Transient failures are retried
+        by the client's retry policy, under the key of the submission, so a retry never starts a second job.
+        :param tool: tool to run
+        :param command_template: command with {column} placeholders
+        :param samples: path of a CSV/TSV sample sheet with a header row, or a list of dicts
+        :param max_workers: maximum number of submissions in flight
+        :param rate: maximum submissions per second
+        :return: (submitted jobs in sample order, one {'sample', 'full_command', 'error'} dict per failed sample)
+        """
+        samples = _read_sample_sheet(samples)
+        limiter = RateLimiter(rate, burst=max_workers)
+
+        def submit(full_command: str) -> Job:
+            limiter.acquire()
+            return self._submit(tool, full_command)
+
+        commands = []
+        errors = {}
+        for i, sample in enumerate(samples):
+            try:
+                commands.append(command_template.format_map(sample))
+            except (KeyError, IndexError, ValueError) as e:
+                commands.append(None)
+                errors[i] = f'Cannot fill command template: {e!r}'
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(submit, command): i for i, command in enumerate(commands) if command is not None}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    errors[i] = e.__str__()
+
+        jobs = [results[i] for i in sorted(results)]
+        report = [{'sample': samples[i], 'full_command': commands[i], 'error': errors[i]} for i in sorted(errors)]
+
+        print(f'Submitted {len(jobs)}/{len(samples)} jobs, {len(report)} failed')
+        return jobs, report
+
+    def upload_file(self, file, max_workers: int = DEFAULT_UPLOAD_WORKERS, chunked: bool = False,
+                    part_size: int = DEFAULT_PART_SIZE) -> dict:
         try:
-            uploaded_files = upload_files(self.name, file, auth_token=self.auth.get_access_token())
+            uploaded_files = upload_files(self.name, file, auth_token=self._access_token(), client=self.client,
+                                          max_workers=max_workers, chunked=chunked, part_size=part_size)
+            self.manifest.invalidate(*uploaded_files.values())
             return uploaded_files
         except Exception as e:
             print(e)
 
-    def download(self, file) -> dict:
+    def download(self, file, dest: str = None, max_workers: int = DEFAULT_DOWNLOAD_WORKERS, verify: bool = False) -> dict:
+        """
+        Returns the download url of a workbench file, or with dest pulls the bytes to the local path.
+        A path ending with '/' downloads every file under it into the dest directory.
+        """
         try:
-            return download_file(self.name, file, auth_token=self.auth.get_access_token())
+            if dest is None:
+                return download_file(self.name, file, auth_token=self._access_token(), client=self.client)
+            return download_files(self.name, file, dest, auth_token=self._access_token(), client=self.client,
+                                  max_workers=max_workers, verify=verify)
         except Exception as e:
             print(e)
 
-    def file_exists_in_bucket(self, file):
-        input_file_path = f'input/{file}'
-        return input_file_path in list_files_in_workbench(self.name,
-                                                          auth_token=self.auth.get_access_token()), input_file_path
+    def open(self, path: str, mode: str = 'rb', block_size: int = DEFAULT_BLOCK_SIZE,
+             cache_blocks: int = DEFAULT_CACHE_BLOCKS):
+        """
+        Opens a workbench file for random access reads without downloading it, e.g. gzip.open(workbench.open(path))
+        """
+        if mode not in ('r', 'rt', 'rb'):
+            raise ValueError(f'Workbench files can only be opened for reading, not {mode!r}')
+        url = get_download_url(self.name, path, auth_token=self._access_token(), client=self.client)
+        remote_file = RemoteFile(url, client=self.client, name=path, block_size=block_size, cache_blocks=cache_blocks)
+        if mode == 'rb':
+            return remote_file
+        return io.TextIOWrapper(io.BufferedReader(remote_file))
+
+    def _listing(self, path: str = None, refresh: bool = False) -> List[dict]:
+        """
+        Listing entries under path served from the local manifest, fetched again only when stale
+        """
+        if refresh or self.manifest.needs_refresh(path):
+            self.manifest.refresh(auth_token=self._access_token(), client=self.client, force=refresh)
+        return self.manifest.entries(path)
+
+    def sync(self, local_dir: str, remote_prefix: str, direction: str = UP, dry_run: bool = False,
+             max_workers: int = None, hash_workers: int = DEFAULT_HASH_WORKERS, chunked: bool = False,
+             part_size: int = DEFAULT_PART_SIZE) -> List[dict]:
+        """
+        Makes remote_prefix match local_dir (direction='up') or local_dir match remote_prefix (direction='down'),
+        transferring only missing and changed files. Local hashes are cached, so a re-sync after a small change only
+        hashes the files that changed. Nothing is deleted on either side.
+        :param local_dir: local directory
+        :param remote_prefix: workbench directory, e.g. 'input/rna-seq/'
+        :param direction: 'up' or 'down'
+        :param dry_run: only print and return the plan
+        :param max_workers: maximum number of files transferred at once
+        :param hash_workers: number of local files hashed at once
+        :param chunked: upload files larger than part_size in resumable parts
+        :param part_size: size in bytes of each upload part when chunked, and of each download range
+        :return: the plan, one {'action', 'local_path', 'remote_path', 'reason'} dict per file
+        """
+        remote_prefix = remote_prefix.strip('/') + '/'
+        hash_cache = get_hash_cache()
+        entries = self._listing(remote_prefix)
+        plan = plan_sync(self.name, local_dir, remote_prefix, entries, direction=direction, hash_cache=hash_cache,
+                         hash_workers=hash_workers)
+        transfers = [item for item in plan if item['action'] != SKIP]
+
+        table = [[item['action'], item['local_path'], item['remote_path'], item['reason']] for item in transfers]
+        if table:
+            print_table(['Action', 'Local Path', 'Remote Path', 'Reason'], table)
+        print(f'{len(transfers)} files to {"upload" if direction == UP else "download"}, '
+              f'{len(plan) - len(transfers)} unchanged')
+        if dry_run or not transfers:
+            return plan
 
-    def ls(self, path: str = None):
-        return self.list_files(path)
+        try:
+            if direction == UP:
+                _upload_many(self.name, [(item['local_path'], item['remote_path']) for item in transfers],
+                             auth_token=self._access_token(), client=self.client,
+                             max_workers=max_workers or DEFAULT_UPLOAD_WORKERS,
+                             part_size=part_size if chunked else None)
+                self.manifest.invalidate(*[item['remote_path'] for item in transfers])
+                # the new update times are only known after listing again
+                entries = self._listing(remote_prefix, refresh=True)
+            else:
+                _download_many(self.name, {item['remote_path']: item['local_path'] for item in transfers},
+                               auth_token=self._access_token(), client=self.client,
+                               max_workers=max_workers or DEFAULT_DOWNLOAD_WORKERS, part_size=part_size)
+        except Exception as e:
+            print(e)
+            return plan
 
-    def list_files(self, path: str = None):
-        files = list_files_in_workbench(
-            self.name,
-            auth_token=self.auth.get_access_token(),
-            path=path
-        )
-        root = Node(self.name)
-        for file in files:
-            file_name = file.get('name')
-            file_size = file.get('size')
-
-            path = file_name.split("/")
-            node = root
-            for i in range(len(path)):
-                name = path[i]
-                if name not in [child.name for child in node.children]:
-                    node = Node(name, parent=node)
-                else:
-                    node = [child for child in node.children if child.name == name][0]
-            if file_size is not None:
-                Node(f"{file_name} ({file_size})", parent=node)
+        updated = {entry.get('name'): remote_updated(entry) for entry in entries}
+        hashes = hash_cache.md5_many([item['local_path'] for item in transfers], max_workers=hash_workers)
+        hash_cache.record_synced(self.name, [(item['remote_path'], hashes[item['local_path']],
+                                              updated.get(item['remote_path'])) for item in transfers])
+        return plan
 
-        output = ""
-        for pre, _, node in RenderTree(root):
-            output += f"{pre}{node.name}\n"
+    def file_exists_in_bucket(self, file):
+        input_file_path = f'input/{file}'
+        if self.manifest.needs_refresh(input_file_path):
+            self.manifest.refresh(auth_token=self._access_token(), client=self.client)
+        return self.manifest.exists(input_file_path), input_file_path
+
+    def ls(self, path: str = None, refresh: bool = False, depth: int = None, max_entries: int = None):
+        return self.list_files(path, refresh=refresh, depth=depth, max_entries=max_entries)
+
+    def iter_files(self, path: str = None, depth: int = None, max_entries: int = None,
+                   page_size: int = 1000) -> Iterator[dict]:
+        """
+        Yields listing entries straight from the server, page by page as they arrive
+        :param path: only list entries under this path
+        :param depth: skip entries nested more than depth levels below path
+        :param max_entries: stop after this many entries
+        :param page_size: number of entries requested per page
+        """
+        files = iter_files_in_workbench(self.name, auth_token=self._access_token(), path=path,
+                                        page_size=page_size, client=self.client)
+        yield from _limit_entries(files, path, depth, max_entries)
+
+    def glob(self, pattern: str, page_size: int = 1000) -> Iterator[dict]:
+        """
+        Yields the listing entries matching a glob such as 'input/**/*_1.fastq.gz', streamed from the server. Only
+        the directories before the first wildcard are listed; the rest of the pattern is matched locally.
+        :param pattern: * and ? match within a directory, ** matches any number of directories
+        :param page_size: number of entries requested per page
+        """
+        yield from match_glob(self.iter_files(glob_prefix(pattern) or None, page_size=page_size), pattern)
+
+    def du(self, prefix: str = None, depth: int = None, page_size: int = 1000) -> Records:
+        """
+        Bytes and file counts per directory under prefix, totalled in one pass over a streamed listing
+        :param prefix: directory to start from, e.g. 'working/', the whole workbench when None
+        :param depth: directory levels below prefix to report, deeper directories count toward their ancestor
+        :param page_size: number of entries requested per page
+        :return: Records of DiskUsageRecord ordered by path, starting with prefix itself
+        """
+        prefix = prefix.strip('/') + '/' if prefix and prefix.strip('/') else None
+        totals = disk_usage(self.iter_files(prefix, page_size=page_size), prefix, depth)
+        return Records((DiskUsageRecord(path, size, files) for path, (size, files) in sorted(totals.items())),
+                       empty_message=f'No files under {prefix or "the workbench"}')
+
+    def list_files(self, path: str = None, refresh: bool = False, depth: int = None, max_entries: int = None):
+        if refresh or self.manifest.needs_refresh(path):
+            self.manifest.refresh(auth_token=self._access_token(), client=self.client, force=refresh)
+        files = _limit_entries(self.manifest.iter_entries(path), max_entries=max_entries)
+        max_segments = None
+        if depth is not None:
+            max_segments = depth + (len(path.rstrip('/').split('/')) if path else 0)
+
+        for line in _render_tree(self.name, _build_tree(files, max_segments)):
+            print(line)
+        print()
+
+    def upload_job(self, files: List[Tuple[str, str]], method: str = 'curl', max_workers: int = DEFAULT_UPLOAD_WORKERS,
+                   skip_existing: bool = True) -> Tuple[List['Job'], List[dict]]:
+        """
+        Creates a job per (url, destination) pair that downloads the url onto the workbench. Duplicate pairs are
+        dropped, destinations already on the workbench are skipped unless skip_existing is False, and the rest are
+        submitted concurrently; one failure does not stop the others.
+        :return: (created jobs, one {'input_url', 'output_path', 'status', 'error'} dict per skipped or failed pair)
+        """
+        files = list(dict.fromkeys((input_url, output_path) for input_url, output_path in files))
+        report = []
+        if skip_existing:
+            if self.manifest.needs_refresh():
+                self.manifest.refresh(auth_token=self._access_token(), client=self.client)
+            pending = []
+            for input_url, output_path in files:
+                if self.manifest.exists(output_path.lstrip('/')):
+                    report.append({'input_url': input_url, 'output_path': output_path, 'status': 'skipped',
+                                   'error': 'destination already exists'})
+                else:
+                    pending.append((input_url, output_path))
+            files = pending
 
-        print(output)
+        upload_jobs, errors = upload_file_path_batch(self.name, files=files, method=method,
+                                                     auth_token=self._access_token(), client=self.client,
+                                                     max_workers=max_workers)
+        report.extend(dict(error, status='failed') for error in errors)
 
-    def upload_job(self, files: List[Tuple[str, str]], method: str = 'curl'):
-        upload_jobs = upload_file_path(self.name, files=files, method=method,
-                                       auth_token=self.auth.get_access_token())
-        table = []
-        for job in upload_jobs:
+        jobs = []
+        for _, job in upload_jobs:
             job = Job(job_id=job.get('id'), tool=method, version='latest', full_command=f'{method} {job.get("input")}', workbench=self)
-            row = [job.job_id, job.tool, job.version, job.status.__str__(), f"workbench.jobs('{job.job_id}').logs()", job.full_command]
             self._add_job(job)
-            table.append(row)
-        headers = ['Job ID', 'Tool', 'Version', 'Status', 'Get Logs', 'Full Command']
-        print_table(headers, table)
-
-    def jobs(self, job_id: str = None, exclude: List[str] = None):
+            jobs.append(job)
+        return jobs, report
+
+    def refresh_jobs(self, jobs: Iterable['Job'] = None, max_workers: int = DEFAULT_STATUS_WORKERS) -> List['Job']:
+        """
+        Refreshes the status of every job that has not finished yet, in bulk when the api supports it and
+        otherwise with up to max_workers concurrent requests
+        """
+        if jobs is None:
+            jobs = self._load_jobs(exclude_status=[status.name for status in TERMINAL_STATUSES])
+        jobs = list(jobs)
+        pending = [job for job in jobs if job.status not in TERMINAL_STATUSES and job.job_id != 'N/A']
+
+        if pending and self._bulk_status is not False:
+            try:
+                for i in range(0, len(pending), BULK_STATUS_BATCH_SIZE):
+                    batch = pending[i:i + BULK_STATUS_BATCH_SIZE]
+                    statuses = get_jobs([job.job_id for job in batch], workbench_name=self.name,
+                                        auth_token=self._access_token(), client=self.client)
+                    if statuses is None:
+                        self._bulk_status = False
+                        break
+                    self._bulk_status = True
+                    for job in batch:
+                        if job.job_id in statuses:
+                            job._set_status(statuses[job.job_id])
+                else:
+                    return jobs
+            except (ApiError, httpx.TransportError, ValueError) as e:
+                # a malformed payload or an unknown state raises ValueError
+                warnings.warn(f'Bulk job status request failed, polling each job instead: {e!r}')
+            pending = [job for job in pending if job.status not in TERMINAL_STATUSES]
+
+        def refresh(job: 'Job'):
+            try:
+                job.get_status()
+            except (ApiError, httpx.TransportError, ValueError) as e:
+                # the job keeps its last known status, one failed request should not hide the others
+                warnings.warn(f'Status request for job {job.job_id} failed, keeping {job.status}: {e!r}')
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                list(executor.map(refresh, pending))
+        return jobs
+
+    def wait_all(self, jobs: Iterable['Job'] = None, return_when: str = ALL_COMPLETED, timeout: float = None,
+                 raise_on_failure: bool = False, poller: Poller = None) -> Tuple[List['Job'], List['Job']]:
+        """
+        Blocks until all (or, with FIRST_COMPLETED, any) of the jobs finish, returning (done, not_done).
+        Waits for every unfinished job of the workbench when jobs is None.
+        """
+        if jobs is None:
+            jobs = self._load_jobs(exclude_status=[status.name for status in TERMINAL_STATUSES])
+        poller = poller or get_poller()
+        return poller.wait(jobs, return_when=return_when, timeout=timeout, raise_on_failure=raise_on_failure)
+
+    def follow_logs(self, jobs: Iterable['Job'] = None, max_streams: int = None, output_dir: str = None,
+                    client: AsyncClient = None, **kwargs):
+        """
+        Follows the logs of many jobs at once from a single event loop, printing each line prefixed with its job id
+        until every job finishes. See AsyncWorkbench.follow_logs for the keyword arguments.
+        :param jobs: jobs to follow, every unfinished job of the workbench when None
+        :param max_streams: log streams kept open at once, the remaining jobs are polled
+        :param output_dir: also append each job's log to output_dir/<job_id>.log
+        :param client: async client to use, by default one is opened for the call on this workbench's base url
+        """
+        # aio builds on this module
+        from .aio import AsyncWorkbench, AsyncJob, DEFAULT_MAX_LOG_STREAMS
+
+        if jobs is None:
+            jobs = self._load_jobs(exclude_status=[status.name for status in TERMINAL_STATUSES])
+        jobs = [job for job in jobs if job.job_id != 'N/A']
+
+        auth = Auth(self._access_token())
+
+        async def follow():
+            async_client = client or AsyncClient(base_url=self.client.base_url)
+            workbench = AsyncWorkbench(self.name, client=async_client, job_store=self.job_store)
+            workbench.auth = auth
+            async_jobs = []
+            for job in jobs:
+                async_job = AsyncJob(job.job_id, job.tool, job.version, job.full_command, workbench, status=job.status)
+                async_job.log_offset = job.log_offset
+                async_jobs.append(async_job)
+            try:
+                await workbench.follow_logs(async_jobs, max_streams=max_streams or DEFAULT_MAX_LOG_STREAMS,
+                                            output_dir=output_dir, **kwargs)
+            finally:
+                for job, async_job in zip(jobs, async_jobs):
+                    job._set_status(async_job.status)
+                    job.log_offset = async_job.log_offset
+                if client is None:
+                    await async_client.aclose()
+
+        _run_coroutine(follow())
+
+    def jobs(self, job_id: str = None, exclude: List[str] = None, status: List[str] = None, tool: str = None,
+             since: float = None, limit: int = None, max_workers: int = DEFAULT_STATUS_WORKERS):
+        """
+        Jobs of this workbench from the persistent job store, including those of earlier sessions, as JobRecords.
+        Only unfinished jobs are polled; finished ones are served from the store. Call render() on the result to
+        print it as a table.
+        :param job_id: return this Job instead
+        :param exclude: hide jobs in these statuses, e.g. ['Succeeded']
+        :param status: only show jobs in these statuses
+        :param tool: only show jobs of this tool
+        :param since: only show jobs submitted at or after this unix time
+        :param limit: only show the most recent limit jobs
+        :return: Records of JobRecord, or the Job with job_id
+        """
         if job_id:
+            if job_id not in self._jobs:
+                record = self.job_store.get(self.name, job_id)
+                return self._job_from_record(record) if record else None
             return self._jobs.get(job_id)
 
-        table = []
-        for job in self._jobs.values():
-            job.status = job.get_status()
-            if exclude and job.status.__str__() in exclude:
-                continue
-            row = [job.job_id, job.tool, job.version, job.status.__str__(), f"workbench.jobs('{job.job_id}').logs()", job.full_command]
-            table.append(row)
+        return Records(self.iter_jobs(exclude=exclude, status=status, tool=tool, since=since, limit=limit,
+                                      max_workers=max_workers), empty_message=NO_JOBS_MESSAGE)
 
-        headers = ['Job ID', 'Tool', 'Version', 'Status', 'Get Logs', 'Full Command']
+    def iter_jobs(self, exclude: List[str] = None, status: List[str] = None, tool: str = None, since: float = None,
+                  limit: int = None, max_workers: int = DEFAULT_STATUS_WORKERS) -> Iterator[JobRecord]:
+        """
+        Yields a JobRecord per job once the unfinished ones are refreshed, see jobs() for the filters
+        """
+        exclude_status, status_names = _store_status_filters(exclude, status)
+        jobs = self._load_jobs(status=status_names, exclude_status=exclude_status, tool=tool, since=since, limit=limit)
 
-        if not table:
-            print('No jobs have been run yet. Run workbench.run(tool, full_command) to run a job.')
-            return
-        # format the table using tabulate
-        print_table(headers, table)
+        for job in self.refresh_jobs(jobs, max_workers=max_workers):
+            job_status = job.status.__str__()
+            if exclude and job_status in exclude:
+                continue
+            if status and job_status not in status and job.status.name not in status:
+                continue
+            yield job.record
 
     def move_file(self, source, destination):
         try:
-            response = move_file(self.name, source, destination, auth_token=self.auth.get_access_token())
+            response = move_file(self.name, source, destination, auth_token=self._access_token(),
+                                 client=self.client)
+            self.manifest.invalidate(source, destination)
             headers = ['Source', 'Destination', 'Message']
             table = [[source, destination, response.get('message')]]
             print_table(headers, table)
@@ -188,7 +674,9 @@ Check out these comprehensive tutorials on RNA-Seq, ATAC-Seq, and Variant callin
 
     def create_directory(self, directory):
         try:
-            response = create_directory(self.name, directory, auth_token=self.auth.get_access_token())
+            response = create_directory(self.name, directory, auth_token=self._access_token(),
+                                        client=self.client)
+            self.manifest.invalidate(directory)
             headers = ['Workbench', 'Directory', 'Message']
             table = [[self.name, response.get('path'), "Directory created"]]
             print_table(headers, table)
@@ -197,32 +685,139 @@ Check out these comprehensive tutorials on RNA-Seq, ATAC-Seq, and Variant callin
 
     def delete_path(self, path):
         try:
-            response = delete_path(self.name, path, auth_token=self.auth.get_access_token())
+            response = delete_path(self.name, path, auth_token=self._access_token(), client=self.client)
+            self.manifest.invalidate(path)
             headers = ['Workbench', 'Path', 'Message']
             table = [[self.name, response.get('path'), response.get('status')]]
             print_table(headers, table)
         except Exception as e:
             print(e)
 
-
-def list_workbenches():
+    def _expand_prefix(self, prefix: str) -> Tuple[List[str], List[str]]:
+        """
+        Files under a prefix ending with '/', and its directory entries deepest first, read from the server listing
+        """
+        files, directories = [], []
+        for entry in self.iter_files(prefix):
+            name = entry.get('name')
+            (directories if name.endswith('/') else files).append(name)
+        return files, sorted(directories, key=lambda directory: (-directory.count('/'), directory))
+
+    def move_many(self, moves, dry_run: bool = False, max_workers: int = DEFAULT_BULK_WORKERS) -> List[dict]:
+        """
+        Moves many files at once. A source ending with '/' moves every file under it to the same relative path
+        under its destination. A failed move does not stop the others; pass the failed pairs again to retry them.
+        :param moves: mapping or list of tuples (source path, destination path)
+        :param dry_run: only print and return the plan
+        :param max_workers: maximum number of moves in flight
+        :return: one {'action', 'source', 'destination', 'status', 'error'} dict per file, status is 'planned'
+        on a dry run, otherwise 'moved' or 'failed'
+        """
+        moves = list(moves.items() if isinstance(moves, dict) else moves)
+        plan = []
+        for source, destination in moves:
+            if source.endswith('/'):
+                destination = destination.rstrip('/') + '/'
+                plan.extend((name, destination + name[len(source):]) for name in self._expand_prefix(source)[0])
+            else:
+                plan.append((source, destination))
+        plan = list(dict.fromkeys(plan))
+
+        if dry_run:
+            if plan:
+                print_table(['Source', 'Destination'], [list(move) for move in plan], maxcolwidths=[80, 80])
+            print(f'{len(plan)} files to move')
+            return [{'action': 'move', 'source': source, 'destination': destination, 'status': 'planned',
+                     'error': None} for source, destination in plan]
+
+        results = move_files(self.name, plan, auth_token=self._access_token(), client=self.client,
+                             max_workers=max_workers)
+        self.manifest.invalidate(*[path for move in moves for path in move])
+        failed = sum(1 for result in results if result['error'])
+        print(f'Moved {len(results) - failed}/{len(results)} files, {failed} failed')
+        return results
+
+    def move_dir(self, source: str, destination: str, dry_run: bool = False,
+                 max_workers: int = DEFAULT_BULK_WORKERS) -> List[dict]:
+        """
+        Moves every file under source to destination. Once every file has moved, the directory entries left under
+        source are deleted. After a partial failure, calling move_dir again moves only the files still under source.
+        :param source: directory to move, e.g. 'output/run-1/'
+        :param destination: directory it becomes, e.g. 'output/archive/run-1/'
+        :param dry_run: only print and return the plan
+        :param max_workers: maximum number of moves in flight
+        :return: one result dict per file, see move_many, followed by one per deleted directory entry
+        """
+        source = source.strip('/') + '/'
+        results = self.move_many([(source, destination)], dry_run=dry_run, max_workers=max_workers)
+        if dry_run or any(result['error'] for result in results):
+            return results
+        files, directories = self._expand_prefix(source)
+        if not files and directories:
+            # nested directory entries go first, one at a time, since deleting a directory may remove those under it
+            results += delete_paths(self.name, directories, auth_token=self._access_token(),
+                                    client=self.client, max_workers=1)
+            self.manifest.invalidate(source)
+        return results
+
+    def delete_many(self, paths: List[str], dry_run: bool = False,
+                    max_workers: int = DEFAULT_BULK_WORKERS) -> List[dict]:
+        """
+        Deletes many files at once. A path ending with '/' deletes every file under it, then its directory entries.
+        A failed delete does not stop the others; calling delete_many again retries what is left.
+        :param paths: full paths of files, or directories ending with '/'
+        :param dry_run: only print and return the plan
+        :param max_workers: maximum number of deletes in flight
+        :return: one {'action', 'path', 'status', 'error'} dict per path, status is 'planned' on a dry run, otherwise
+        'deleted' or 'failed'
+        """
+        paths = [paths] if isinstance(paths, str) else list(paths)
+        files, directories = [], []
+        for path in paths:
+            if path.endswith('/'):
+                prefix_files, prefix_directories = self._expand_prefix(path)
+                files.extend(prefix_files)
+                directories.extend(prefix_directories)
+            else:
+                files.append(path)
+        files = list(dict.fromkeys(files))
+        directories = list(dict.fromkeys(directories))
+
+        if dry_run:
+            if files or directories:
+                print_table(['Path'], [[path] for path in files + directories], maxcolwidths=[120])
+            print(f'{len(files)} files and {len(directories)} directories to delete')
+            return [{'action': 'delete', 'path': path, 'status': 'planned', 'error': None}
+                    for path in files + directories]
+
+        results = delete_paths(self.name, files, auth_token=self._access_token(), client=self.client,
+                               max_workers=max_workers)
+        if not any(result['error'] for result in results):
+            # nested directory entries go first, one at a time, since deleting a directory may remove those under it
+            results += delete_paths(self.name, directories, auth_token=self._access_token(),
+                                    client=self.client, max_workers=1)
+        self.manifest.invalidate(*paths)
+        failed = sum(1 for result in results if result['error'])
+        print(f'Deleted {len(results) - failed}/{len(results)} paths, {failed} failed')
+        return results
+
+
+def list_workbenches(client: Client = None) -> Records:
+    """
+    Workbenches of the signed in user as WorkbenchRecords, sorted by name; call render() on the result to print them
+    """
     auth_token = os.environ.get('TINYBIO_AUTH_TOKEN')
 
-    workbenches = get_workbenches(auth_token=auth_token)
-    table = []
-    for workbench in workbenches:
-        updated_at = datetime.strptime(workbench.get('updated_at'), '%Y-%m-%dT%H:%M:%S.%f')
-        table.append([workbench.get('name'), humanize.naturalsize(workbench.get('size')), humanize.naturaltime(datetime.now() - updated_at)])
-
-    headers = ['Workbench Name', 'Size', 'Last Updated', ]
+    workbenches = get_workbenches(auth_token=auth_token, client=client)
+    return Records(sorted((WorkbenchRecord(workbench.get('name'), workbench.get('size'), workbench.get('updated_at'))
+                           for workbench in workbenches), key=lambda record: record.name or ''),
+                   empty_message='No workbenches yet. Create one with tiny.create_workbench(name).')
 
-    # format the table using tabulate
-    print_table(headers, table, sort=(0, "asc"))
 
-def create_workbench(workbench_name: str):
+def create_workbench(workbench_name: str, client: Client = None):
     auth_token = os.environ.get('TINYBIO_AUTH_TOKEN')
     try:
-        bucket = create_bucket(workbench_name, auth_token=auth_token)
+        bucket = create_bucket(workbench_name, auth_token=auth_token, client=client)
     except Exception as e:
         print(e)
         return
@@ -243,10 +838,10 @@ To upload a file directly from your machine run workbench.upload('file_path_on_y
 
 To upload from a remote machine run workbench.upload_job(method="curl or wget", files=[("public_file_url","destination_path_on_workbench")]). 
 
-To download a file run the following workbench.download('file_path_on_the_workbench'). This will generate a download URL.
+To download a file run the following workbench.download('file_path_on_the_workbench'). This will generate a download URL. Pass dest='local_path' to download the file itself, or a path ending in '/' to download a whole directory.
     """)
 
-    return Workbench(generate_workbench_name)
+    return Workbench(generate_workbench_name, client=client)
 
 
 class Job:
@@ -258,6 +853,8 @@ class Job:
             full_command: str,
             workbench: Workbench,
             status: str = JobStatus.QUEUED,
+            submitted_at: float = None,
+            error: str = None,
     ):
         self.job_id = job_id
         self.tool = tool
@@ -265,27 +862,138 @@ class Job:
         self.full_command = full_command
         self.workbench = workbench
         self.status = status
+        self.submitted_at = submitted_at or time.time()
+        self.log_offset = 0
+        # why the job could not be submitted, for jobs with id 'N/A'
+        self.error = error
+
+    def __repr__(self):
+        return f'Job({self.job_id}, {self.tool}, {self.status.__str__()})'
 
     def __str__(self):
-        headers = ['Job ID', 'Tool', 'Version', 'Status', 'Get Logs', 'Full Command']
-        data = [[self.job_id, self.tool, self.version, self.get_status(), f"workbench.jobs('{self.job_id}').logs()", self.full_command]]
-        return print_table(headers, data)
+        # the last known status, call get_status() first for the current one
+        return str(Records([self.record]))
+
+    @property
+    def record(self) -> JobRecord:
+        return JobRecord(self.job_id, self.tool, self.version, self.error or self.status.__str__(), self.full_command)
+
+    def _set_status(self, status: JobStatus):
+        # get_job hands back the error body when the request fails, keep the last known status
+        if not isinstance(status, JobStatus):
+            return
+        if status in [JobStatus.SUCCEEDED, JobStatus.FAILED] and status != self.status:
+            # the job may have written outputs the cached listing does not know about
+            self.workbench.manifest.expire()
+        if status != self.status:
+            self.workbench.job_store.update_status(self.workbench.name, self.job_id, status.name)
+        changed = status != self.status
+        self.status = status
+        if changed and status == JobStatus.SUCCEEDED and self.workbench._run_cache is not None:
+            self.workbench._settle_run(self)
 
     def get_status(self):
-        if getattr(JobStatus, self.status.__str__().upper()) in [JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.DELETION_IN_PROGRESS]:
+        if self.status in TERMINAL_STATUSES:
             return self.status.__str__()
-        status = get_job(self.job_id, workbench_name=self.workbench.name, auth_token=self.workbench.auth.get_access_token())
-        self.status = status
+        status = get_job(self.job_id, workbench_name=self.workbench.name, auth_token=self.workbench._access_token(),
+                         client=self.workbench.client)
+        self._set_status(status)
         return status.__str__()
 
+    def wait(self, timeout: float = None, raise_on_failure: bool = True, poller: Poller = None) -> JobStatus:
+        """
+        Blocks until the job finishes and returns its final status. Raises JobFailedError if the job fails and
+        TimeoutError if it is still running after timeout seconds.
+        """
+        poller = poller or get_poller()
+        done, _ = poller.wait([self], timeout=timeout, raise_on_failure=raise_on_failure)
+        if not done:
+            raise TimeoutError(f'Job {self.job_id} did not finish within {timeout} seconds')
+        return self.status
+
     def logs(self):
         try:
-            return get_job_logs(self.job_id, workbench_name=self.workbench.name, auth_token=self.workbench.auth.get_access_token())
+            return get_job_logs(self.job_id, workbench_name=self.workbench.name,
+                                auth_token=self.workbench._access_token(), client=self.workbench.client)
         except Exception as e:
             print(e)
 
+    def _iter_log_lines(self, follow: bool = True, since: int = 0, tail: int = None,
+                        read_timeout: float = DEFAULT_LOG_READ_TIMEOUT, poll_interval: float = DEFAULT_LOG_POLL_INTERVAL,
+                        max_retries: int = DEFAULT_LOG_RETRIES) -> Iterator[Tuple[int, bytes]]:
+        # (offset, raw line) pairs; reconnects from the last complete line until the job finishes
+        offset = since
+        backlog = deque(maxlen=tail) if tail else None
+        failures = 0
+        while True:
+            # decided before connecting, so the connection after the job finished drains the rest of the log
+            finished = not follow or self.status in TERMINAL_STATUSES
+            if not finished:
+                self.get_status()
+                finished = self.status in TERMINAL_STATUSES
+            try:
+                for offset, line in iter_job_log_lines(self.job_id, workbench_name=self.workbench.name,
+                                                       auth_token=self.workbench._access_token(),
+                                                       offset=offset, client=self.workbench.client,
+                                                       read_timeout=read_timeout, flush_partial=finished):
+                    self.log_offset = offset
+                    failures = 0
+                    if backlog is not None:
+                        backlog.append((offset, line))
+                    else:
+                        yield offset, line
+            except (httpx.TransportError, ApiError) as e:
+                # logs of a job that has not started yet are not there, keep waiting while following
+                waiting = isinstance(e, ApiError) and e.status_code == 404 and not finished
+                if not waiting and not (isinstance(e, httpx.TransportError) or e.transient):
+                    raise
+                if not waiting:
+                    failures += 1
+                    if failures > max_retries:
+                        raise
+                    instrumentation.record_retry('GET', f'/{self.workbench.name}/jobs/{self.job_id}/logs/stream')
+                time.sleep(min(poll_interval * 2 ** failures, DEFAULT_LOG_MAX_BACKOFF))
+                continue
+            if backlog is not None:
+                yield from backlog
+                backlog = None
+            if finished:
+                return
+            time.sleep(poll_interval)
+
+    def iter_logs(self, follow: bool = True, since: int = 0, tail: int = None,
+                  read_timeout: float = DEFAULT_LOG_READ_TIMEOUT, poll_interval: float = DEFAULT_LOG_POLL_INTERVAL,
+                  max_retries: int = DEFAULT_LOG_RETRIES) -> Iterator[str]:
+        """
+        Yields the job's log line by line without holding it in memory. Dropped connections and read timeouts
+        reconnect from the last complete line; job.log_offset holds the byte offset to pass as since later on.
+        :param follow: keep reading until the job finishes, otherwise stop at the end of what is logged so far
+        :param since: byte offset to start from
+        :param tail: only yield the last tail lines logged so far, then follow the new ones
+        :param read_timeout: seconds without log output before reconnecting
+        :param poll_interval: seconds between reconnects while the job is running
+        :param max_retries: consecutive failed connections before giving up
+        """
+        for _, line in self._iter_log_lines(follow=follow, since=since, tail=tail, read_timeout=read_timeout,
+                                            poll_interval=poll_interval, max_retries=max_retries):
+            yield line.decode('utf-8', errors='replace').rstrip('\r')
+
+    def save_logs(self, path: str, follow: bool = True, append: bool = True, **kwargs) -> int:
+        """
+        Writes the job's log to path as it is streamed. With append, an existing file is resumed from its size.
+        Takes the same keyword arguments as iter_logs and returns the number of bytes written.
+        """
+        since = os.path.getsize(path) if append and os.path.exists(path) else 0
+        written = 0
+        with open(path, 'ab' if since else 'wb') as f:
+            for _, line in self._iter_log_lines(follow=follow, since=since, **kwargs):
+                f.write(line + b'\n')
+                written += len(line) + 1
+        return written
+
     def stream_logs(self):
         try:
-            stream_job_logs(self.job_id, workbench_name=self.workbench.name, auth_token=self.workbench.auth.get_access_token())
+            for line in self.iter_logs():
+                print(line)
         except Exception as e:
             print(e)
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from os.path import join
+from typing import List, Iterable, Iterator
+
+from .client import Client
+from .settings import CACHE_DIR, BASE_URL
+from .storage import list_files_if_modified
+
+MANIFEST_DIR: str = join(CACHE_DIR, 'manifests')
+DEFAULT_MANIFEST_TTL: float = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size TEXT,
+    updated TEXT,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dirty (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    # every string starting with prefix sorts below this
+    return prefix + '\U0010ffff'
+
+
+class Manifest:
+    """
+    On-disk index of a workbench listing keyed by path. Lookups are local; the listing is fetched again once the
+    ttl expires (conditionally, when the server supplies an etag) or when a lookup touches an invalidated path.
+    """
+
+    def __init__(self, workbench_name: str, ttl: float = DEFAULT_MANIFEST_TTL, path: str = None,
+                 base_url: str = BASE_URL):
+        """
+        :param base_url: api the listing comes from; workbenches of the same name on different servers, e.g. the mock
+        server and production, get separate manifests
+        """
+        self.workbench_name = workbench_name
+        self.ttl = ttl
+        if path is None:
+            os.makedirs(MANIFEST_DIR, exist_ok=True)
+            server = hashlib.sha1(str(base_url).rstrip('/').encode()).hexdigest()[:12]
+            path = join(MANIFEST_DIR, f'{workbench_name}.{server}.sqlite')
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f'Manifest({self.workbench_name})'
+
+    def _meta(self, key: str):
+        row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self._db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def needs_refresh(self, path: str = None) -> bool:
+        """
+        True when the ttl expired or an invalidated path overlaps path (the whole workbench when None)
+        """
+        with self._lock:
+            refreshed_at = float(self._meta('refreshed_at') or 0)
+            if time.time() - refreshed_at > self.ttl:
+                return True
+            if path is None:
+                return self._db.execute('SELECT 1 FROM dirty LIMIT 1').fetchone() is not None
+            row = self._db.execute(
+                'SELECT 1 FROM dirty WHERE (path >= ? AND path < ?) OR substr(?, 1, length(path)) = path LIMIT 1',
+                (path, _prefix_upper_bound(path), path)
+            ).fetchone()
+            return row is not None
+
+    def refresh(self, auth_token: str, client: Client = None, force: bool = False):
+        """
+        Fetches the listing again if needed, skipping the transfer when the server reports it unchanged
+        """
+        with self._lock:
+            if not force and not self.needs_refresh():
+                return
+            has_dirty = self._db.execute('SELECT 1 FROM dirty LIMIT 1').fetchone() is not None
+            # local invalidations removed entries, a 304 would not bring them back
+            etag = None if force or has_dirty else self._meta('etag')
+            files, etag = list_files_if_modified(self.workbench_name, auth_token, etag=etag, client=client)
+            with self._db:
+                if files is not None:
+                    self._replace(files)
+                self._set_meta('etag', etag)
+                self._set_meta('refreshed_at', str(time.time()))
+
+    def _replace(self, files: Iterable[dict]):
+        self._db.execute('DELETE FROM files')
+        self._db.execute('DELETE FROM dirty')
+        self._db.executemany(
+            'INSERT OR REPLACE INTO files (path, size, updated, entry) VALUES (?, ?, ?, ?)',
+            (
+                (file.get('name'), file.get('size'), file.get('updated') or file.get('updated_at'), json.dumps(file))
+                for file in files
+            )
+        )
+
+    def exists(self, path: str) -> bool:
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM files WHERE path = ?', (path,)).fetchone() is not None
+
+    def get(self, path: str) -> dict:
+        with self._lock:
+            row = self._db.execute('SELECT entry FROM files WHERE path = ?', (path,)).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def entries(self, prefix: str = None) -> List[dict]:
+        """
+        Listing entries ordered by path, optionally only those under prefix
+        """
+        with self._lock:
+            if prefix:
+                rows = self._db.execute(
+                    'SELECT entry FROM files WHERE path >= ? AND path < ? ORDER BY path',
+                    (prefix, _prefix_upper_bound(prefix))
+                )
+            else:
+                rows = self._db.execute('SELECT entry FROM files ORDER BY path')
+            return [json.loads(entry) for entry, in rows.fetchall()]
+
+    def iter_entries(self, prefix: str = None, page_size: int = 1000) -> Iterator[dict]:
+        """
+        Like entries but reads the index page by page so large listings are never held in memory at once
+        """
+        last_path = ''
+        lower = prefix or ''
+        upper = _prefix_upper_bound(lower)
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    'SELECT path, entry FROM files WHERE path >= ? AND path < ? AND path > ? ORDER BY path LIMIT ?',
+                    (lower, upper, last_path, page_size)
+                ).fetchall()
+            for last_path, entry in rows:
+                yield json.loads(entry)
+            if len(rows) < page_size:
+                return
+
+    def invalidate(self, *paths: str):
+        """
+        Drops the entries at and under each path; the next lookup touching them refreshes the listing
+        """
+        with self._lock, self._db:
+            for path in paths:
+                self._db.execute(
+                    'DELETE FROM files WHERE path = ? OR (path >= ? AND path < ?)',
+                    (path, path.rstrip('/') + '/', _prefix_upper_bound(path.rstrip('/') + '/'))
+                )
+                self._db.execute('INSERT OR REPLACE INTO dirty (path) VALUES (?)', (path,))
+
+    def expire(self):
+        """
+        Marks the whole listing stale without dropping it, e.g. after a job wrote outputs
+        """
+        with self._lock, self._db:
+            self._set_meta('refreshed_at', '0')
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM files')
+            self._db.execute('DELETE FROM dirty')
+            self._db.execute('DELETE FROM meta')
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,160 @@
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shlex
+import sqlite3
+import threading
+import time
+from os.path import join
+from typing import List, Optional, Callable, Iterable
+
+from .settings import CACHE_DIR
+
+RUN_CACHE_PATH: str = join(CACHE_DIR, 'runs.sqlite')
+
+# workbench paths as they appear in commands, e.g. /input/atac-seq/*.gz or -o=/output/fastqc
+_PATH_PATTERN = re.compile(r'(?<![\w.])/?((?:input|output|working)/[^\s,;|&<>=]*)')
+_GLOB_CHARS = '*?['
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    workbench TEXT NOT NULL,
+    key TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    tool TEXT,
+    full_command TEXT,
+    paths TEXT NOT NULL,
+    fingerprint TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (workbench, key)
+);
+CREATE INDEX IF NOT EXISTS runs_job ON runs (workbench, job_id);
+"""
+
+_COLUMNS = ['workbench', 'key', 'job_id', 'tool', 'full_command', 'paths', 'fingerprint', 'created_at']
+
+
+def normalize_command(full_command: str) -> str:
+    """
+    Command with quoting and whitespace normalized, so equivalent spellings share a key
+    """
+    try:
+        return ' '.join(shlex.quote(token) for token in shlex.split(full_command))
+    except ValueError:
+        return ' '.join(full_command.split())
+
+
+def referenced_paths(full_command: str) -> List[str]:
+    """
+    Workbench paths (input/, output/ and working/) a command mentions, without the leading '/'
+    """
+    return sorted(set(path.rstrip('/') for path in _PATH_PATTERN.findall(full_command) if path.rstrip('/')))
+
+
+def run_key(tool: str, version: Optional[str], full_command: str) -> str:
+    return hashlib.sha1(json.dumps([tool, version or '', normalize_command(full_command)]).encode()).hexdigest()
+
+
+def fingerprint(paths: Iterable[str], entries: Callable[[str], List[dict]]) -> str:
+    """
+    Digest of the listing entries (name, size and checksum or update time) at or under every path; a path can be a
+    glob. Changes whenever one of the files is added, removed or rewritten.
+    :param entries: returns the listing entries under a prefix
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        glob_at = min([path.index(char) for char in _GLOB_CHARS if char in path], default=None)
+        if glob_at is None:
+            matched = [entry for entry in entries(path)
+                       if entry.get('name') == path or entry.get('name', '').startswith(path + '/')]
+        else:
+            matched = [entry for entry in entries(path[:glob_at])
+                       if fnmatch.fnmatchcase(entry.get('name', ''), path)]
+        digest.update(json.dumps([path, len(matched)]).encode())
+        for entry in sorted(matched, key=lambda entry: entry.get('name')):
+            checksum = entry.get('md5_hash') or entry.get('md5Hash') or entry.get('md5') or \
+                entry.get('updated') or entry.get('updated_at')
+            digest.update(json.dumps([entry.get('name'), entry.get('size'), checksum]).encode())
+    return digest.hexdigest()
+
+
+class RunCache:
+    """
+    Records which job ran each (tool, version, command). Once the job succeeds the fingerprint of every workbench
+    path the command mentions is stored, and the job is reused as long as those paths are unchanged.
+    """
+
+    def __init__(self, path: str = RUN_CACHE_PATH):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f'RunCache({self.path})'
+
+    def record(self, workbench: str, key: str, job_id: str, tool: str, full_command: str, paths: List[str]):
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO runs (workbench, key, job_id, tool, full_command, paths, fingerprint, '
+                'created_at) VALUES (?, ?, ?, ?, ?, ?, NULL, ?)',
+                (workbench, key, job_id, tool, full_command, json.dumps(paths), time.time())
+            )
+
+    def get(self, workbench: str, key: str) -> Optional[dict]:
+        return self._select_one('WHERE workbench = ? AND key = ?', (workbench, key))
+
+    def get_by_job(self, workbench: str, job_id: str) -> Optional[dict]:
+        return self._select_one('WHERE workbench = ? AND job_id = ?', (workbench, job_id))
+
+    def settle(self, workbench: str, key: str, fingerprint: str):
+        """
+        Stores the fingerprint of a run's paths as they were when its job succeeded
+        """
+        with self._lock, self._db:
+            self._db.execute('UPDATE runs SET fingerprint = ? WHERE workbench = ? AND key = ?',
+                             (fingerprint, workbench, key))
+
+    def invalidate(self, workbench: str, key: str = None, tool: str = None):
+        """
+        Forgets one run, every run of a tool, or with neither every run of the workbench
+        """
+        clauses = ['workbench = ?']
+        params = [workbench]
+        if key:
+            clauses.append('key = ?')
+            params.append(key)
+        if tool:
+            clauses.append('tool = ?')
+            params.append(tool)
+        with self._lock, self._db:
+            self._db.execute(f"DELETE FROM runs WHERE {' AND '.join(clauses)}", params)
+
+    def _select_one(self, sql: str, params) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM runs {sql}", params).fetchone()
+        if row is None:
+            return None
+        record = dict(zip(_COLUMNS, row))
+        record['paths'] = json.loads(record['paths'])
+        return record
+
+    def close(self):
+        self._db.close()
+
+
+_default_run_cache: Optional[RunCache] = None
+_default_run_cache_lock = threading.Lock()
+
+
+def get_run_cache() -> RunCache:
+    global _default_run_cache
+    with _default_run_cache_lock:
+        if _default_run_cache is None:
+            _default_run_cache = RunCache()
+        return _default_run_cache
@@ -0,0 +1,658 @@
+"""
+Local stand-in for the tinybio api, for trying the client out and benchmarking it without touching a real workbench.
+
+    python -m tiny.mockserver --port 8080 --objects 100000 --latency 0.02
+    TINYBIO_BASE_URL=http://127.0.0.1:8080 TINYBIO_AUTH_TOKEN=anything python
+
+Workbenches are created on first use and filled with --objects synthetic files. Jobs are queued for a tenth of
+--job-duration, then run until it has passed and succeed; their log grows to --log-lines lines while they run.
+Everything is kept in memory and lost when the server stops.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os.path import abspath, dirname
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+DEFAULT_OBJECT_SIZE: int = 1024
+DEFAULT_LOG_LINES: int = 1000
+DEFAULT_JOB_DURATION: float = 0.0
+DEFAULT_MAX_PAGE_SIZE: int = 1000
+# bodies are sent and received in chunks of this size, the unit bandwidth is throttled at
+CHUNK_SIZE: int = 64 * 1024
+
+TOOLS = {
+    'fastqc': '0.12.1',
+    'trimmomatic': '0.39',
+    'bowtie2': '2.5.1',
+    'samtools': '1.17',
+    'macs2': '2.2.7.1',
+    'curl': '7.88.1',
+}
+
+
+def _now() -> str:
+    # naive utc, as the api reports update times
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def _md5_base64(content: bytes) -> str:
+    return base64.b64encode(hashlib.md5(content).digest()).decode()
+
+
+def _synthetic_content(size: int) -> bytes:
+    # a fastq record, repeated
+    line = b'@SEQ_ID\nGATTTGGGGTTCAAAGCAGTATCGATCAAATAGTAAATCCATTTGTTCAACTCACAGTTT\n+\n' \
+           b'!\'\'*((((***+))%%%++)(%%%%).1***-+*\n'
+    return (line * (size // len(line) + 1))[:size]
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) of a single 'bytes=start-end' range, None without a usable range and (size, size) when the range
+    starts past the end
+    """
+    match = re.match(r'bytes=(\d*)-(\d*)$', (header or '').strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    if match.group(1) == '':
+        # suffix range, the last n bytes
+        return max(size - int(match.group(2)), 0), size - 1
+    start = int(match.group(1))
+    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    if start >= size:
+        return size, size
+    return start, end
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    """
+    Fields of a multipart/form-data body, as {name: (filename or None, content)}
+    """
+    match = re.search(r'boundary="?([^";]+)"?', content_type or '')
+    if not match:
+        return {}
+    fields = {}
+    for part in body.split(b'--' + match.group(1).encode())[1:]:
+        if part.startswith(b'--'):
+            break
+        head, _, content = part.partition(b'\r\n\r\n')
+        disposition = head.decode('utf-8', errors='replace')
+        name = re.search(r'\bname="([^"]*)"', disposition)
+        filename = re.search(r'\bfilename="([^"]*)"', disposition)
+        if name:
+            fields[name.group(1)] = (filename.group(1) if filename else None,
+                                     content[:-2] if content.endswith(b'\r\n') else content)
+    return fields
+
+
+class _Workbench:
+    def __init__(self, name: str, objects: int, object_size: int):
+        self.name = name
+        self.created = _now()
+        # name -> listing entry, and the content of the files uploaded during this session
+        self.files = {}
+        self.contents = {}
+        self.version = 0
+        self._names = None
+        self._listing = None
+        synthetic_md5 = _md5_base64(_synthetic_content(object_size))
+        for i in range(objects):
+            path = f'input/dataset_{i // 1000:03d}/sample_{i:06d}.fastq.gz'
+            self.files[path] = {'name': path, 'size': object_size, 'updated': self.created,
+                                'md5_hash': synthetic_md5}
+
+    def changed(self):
+        self.version += 1
+        self._names = None
+        self._listing = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.name}-{self.version}"'
+
+    def names(self) -> list:
+        if self._names is None:
+            self._names = sorted(self.files)
+        return self._names
+
+    def listing(self) -> bytes:
+        # the full listing is served as is until the next change
+        if self._listing is None:
+            self._listing = json.dumps([self.files[name] for name in self.names()]).encode()
+        return self._listing
+
+    def put(self, path: str, content: bytes) -> dict:
+        entry = self.files[path] = {'name': path, 'size': len(content), 'updated': _now(),
+                                    'md5_hash': _md5_base64(content)}
+        self.contents[path] = content
+        self.changed()
+        return entry
+
+    def content(self, path: str, object_size: int) -> Optional[bytes]:
+        if path not in self.files:
+            return None
+        if path in self.contents:
+            return self.contents[path]
+        return _synthetic_content(self.files[path]['size'] if isinstance(self.files[path]['size'], int)
+                                  else object_size)
+
+
+class MockApi:
+    """
+    In-memory state of the stand-in api, shared by the request handlers
+    :param latency: seconds every request waits before it is answered
+    :param bandwidth: bytes per second each request body and response body is limited to, None for no limit
+    :param objects: number of files every new workbench starts with
+    :param object_size: size in bytes of those files
+    :param log_lines: number of lines a job logs
+    :param job_duration: seconds from submission until a job succeeds
+    :param max_page_size: largest listing page handed out
+    """
+
+    def __init__(self, latency: float = 0.0, bandwidth: float = None, objects: int = 0,
+                 object_size: int = DEFAULT_OBJECT_SIZE, log_lines: int = DEFAULT_LOG_LINES,
+                 job_duration: float = DEFAULT_JOB_DURATION, max_page_size: int = DEFAULT_MAX_PAGE_SIZE):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.objects = objects
+        self.object_size = object_size
+        self.log_lines = log_lines
+        self.job_duration = job_duration
+        self.max_page_size = max_page_size
+        self.lock = threading.RLock()
+        self.workbenches = {}
+        self.jobs = {}
+        self.idempotency_keys = {}
+        self.uploads = {}
+        self._log = None
+
+    def workbench(self, name: str) -> _Workbench:
+        with self.lock:
+            workbench = self.workbenches.get(name)
+            if workbench is None:
+                workbench = self.workbenches[name] = _Workbench(name, self.objects, self.object_size)
+            return workbench
+
+    def submit(self, workbench_name: str, tool: str, full_command: str, idempotency_key: str = None) -> dict:
+        with self.lock:
+            if idempotency_key and idempotency_key in self.idempotency_keys:
+                return self.jobs[self.idempotency_keys[idempotency_key]]
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {'id': job_id, 'workbench': workbench_name, 'tool': tool,
+                                 'version': TOOLS.get(tool, 'latest'), 'full_command': full_command,
+                                 'submitted_at': time.time()}
+            if idempotency_key:
+                self.idempotency_keys[idempotency_key] = job_id
+            return self.jobs[job_id]
+
+    def job_state(self, job: dict) -> str:
+        elapsed = time.time() - job['submitted_at']
+        if elapsed >= self.job_duration:
+            return 'SUCCEEDED'
+        return 'QUEUED' if elapsed < self.job_duration / 10 else 'RUNNING'
+
+    def job_view(self, job: dict) -> dict:
+        return dict({key: value for key, value in job.items() if key != 'workbench'}, state=self.job_state(job))
+
+    def job_log(self, job: dict) -> bytes:
+        """
+        The part of a job's log written so far
+        """
+        if self._log is None:
+            self._log = ''.join(
+                f'2023-05-01T18:{i // 60 % 60:02d}:{i % 60:02d}Z step {i}: processed {i * 1000} reads, '
+                f'{i * 7 % 100}% duplicates\n'
+                for i in range(self.log_lines)
+            ).encode()
+        if self.job_duration <= 0:
+            return self._log
+        progress = min((time.time() - job['submitted_at']) / self.job_duration, 1.0)
+        end = self._log.rfind(b'\n', 0, int(len(self._log) * progress)) + 1
+        return self._log[:end]
+
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'tinybio-mock/1.0'
+    api: MockApi = None
+    verbose: bool = False
+
+    _ROUTES = [
+        ('GET', r'/workbench/me', 'list_workbenches'),
+        ('PUT', r'/workbench/([^/]+)/upload/multipart/([^/]+)/parts/(\d+)', 'upload_part'),
+        ('POST', r'/workbench/([^/]+)/upload/multipart/([^/]+)/complete', 'complete_upload'),
+        ('POST', r'/workbench/([^/]+)/upload/multipart', 'start_upload'),
+        ('POST', r'/workbench/([^/]+)/upload/file-url', 'upload_file_url'),
+        ('POST', r'/workbench/([^/]+)/upload', 'upload'),
+        ('GET', r'/workbench/([^/]+)/download', 'download'),
+        ('POST', r'/workbench/([^/]+)/run', 'run'),
+        ('POST', r'/workbench/([^/]+)/move-file', 'move_file'),
+        ('POST', r'/workbench/([^/]+)/create-directory', 'create_directory'),
+        ('DELETE', r'/workbench/([^/]+)/delete-path', 'delete_path'),
+        ('GET', r'/workbench/([^/]+)', 'list_files'),
+        ('POST', r'/workbench/([^/]+)', 'create_workbench'),
+        ('GET', r'/available-tools', 'available_tools'),
+        ('POST', r'/([^/]+)/jobs/status', 'job_statuses'),
+        ('GET', r'/([^/]+)/jobs/([^/]+)/logs/stream', 'stream_logs'),
+        ('GET', r'/([^/]+)/jobs/([^/]+)/logs', 'logs'),
+        ('GET', r'/([^/]+)/jobs/([^/]+)', 'job'),
+        ('GET', r'/blobs/([^/]+)/(.+)', 'blob'),
+    ]
+    _ROUTE_PATTERNS = [(method, re.compile(f'^{pattern}$'), name) for method, pattern, name in _ROUTES]
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self._body = None
+        if self.api.latency:
+            time.sleep(self.api.latency)
+        for route_method, pattern, name in self._ROUTE_PATTERNS:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                if name != 'blob' and not self.headers.get('Authorization'):
+                    return self._json({'detail': 'Not authenticated'}, status=401)
+                return getattr(self, name)(*(unquote(group) for group in match.groups()))
+        self._json({'detail': 'Not Found'}, status=404)
+
+    def _throttle(self, transferred: int, started: float):
+        if self.api.bandwidth:
+            ahead = transferred / self.api.bandwidth - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def body(self) -> bytes:
+        if self._body is not None:
+            return self._body
+        chunks = []
+        received = 0
+        started = time.perf_counter()
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # trailers end with an empty line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                received += size
+                self._throttle(received, started)
+        else:
+            remaining = int(self.headers.get('Content-Length') or 0)
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, CHUNK_SIZE))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+                received += len(chunk)
+                self._throttle(received, started)
+        self._body = b''.join(chunks)
+        return self._body
+
+    def json_body(self) -> dict:
+        try:
+            return json.loads(self.body() or b'{}')
+        except ValueError:
+            return {}
+
+    def _send(self, status: int, body: bytes = b'', content_type: str = 'application/json', headers: dict = None):
+        # a request body nobody read would otherwise be taken for the next request on the connection
+        self.body()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        started = time.perf_counter()
+        for offset in range(0, len(body), CHUNK_SIZE):
+            self.wfile.write(body[offset:offset + CHUNK_SIZE])
+            self._throttle(offset + CHUNK_SIZE, started)
+
+    def _json(self, data, status: int = 200, headers: dict = None):
+        self._send(status, json.dumps(data).encode(), headers=headers)
+
+    def _ranged(self, content: bytes, content_type: str, headers: dict = None):
+        headers = dict(headers or {})
+        headers['Accept-Ranges'] = 'bytes'
+        byte_range = _parse_range(self.headers.get('Range'), len(content))
+        if byte_range is None:
+            return self._send(200, content, content_type=content_type, headers=headers)
+        start, end = byte_range
+        if start >= len(content):
+            headers['Content-Range'] = f'bytes */{len(content)}'
+            return self._send(416, b'', content_type=content_type, headers=headers)
+        headers['Content-Range'] = f'bytes {start}-{end}/{len(content)}'
+        self._send(206, content[start:end + 1], content_type=content_type, headers=headers)
+
+    # workbenches and files
+
+    def list_workbenches(self):
+        with self.api.lock:
+            self._json([{'name': workbench.name, 'size': sum(entry['size'] for entry in workbench.files.values()
+                                                             if isinstance(entry['size'], int)),
+                         'updated_at': workbench.created} for workbench in self.api.workbenches.values()])
+
+    def create_workbench(self, workbench_name: str):
+        workbench_name = f"{workbench_name}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        self.api.workbench(workbench_name)
+        self._json({'workbench_name': workbench_name})
+
+    def list_files(self, workbench_name: str):
+        workbench = self.api.workbench(workbench_name)
+        path = self.query.get('path', '')
+        with self.api.lock:
+            if 'page_size' not in self.query and not path:
+                if self.headers.get('If-None-Match') == workbench.etag:
+                    return self._send(304, headers={'ETag': workbench.etag})
+                return self._send(200, workbench.listing(), headers={'ETag': workbench.etag})
+            names = workbench.names()
+            start = int(self.query.get('page_token') or bisect_left(names, path))
+            if 'page_size' not in self.query:
+                end = bisect_left(names, path + '\U0010ffff')
+                return self._json([workbench.files[name] for name in names[start:end]])
+            page_size = min(max(int(self.query['page_size']), 1), self.api.max_page_size)
+            page = [workbench.files[name] for name in names[start:start + page_size] if name.startswith(path)]
+            done = len(page) < page_size or start + page_size >= len(names) or \
+                not names[start + page_size].startswith(path)
+            self._json({'files': page, 'next_page_token': None if done else str(start + page_size)})
+
+    def upload(self, workbench_name: str):
+        fields = _parse_multipart(self.headers.get('Content-Type'), self.body())
+        if 'file' not in fields:
+            return self._json({'detail': 'No file'}, status=422)
+        filename, content = fields['file']
+        # like the real service, files are placed by their name alone
+        destination = 'input/' + (filename or 'upload').replace('\\', '/').rsplit('/', 1)[-1]
+        with self.api.lock:
+            entry = self.api.workbench(workbench_name).put(destination, content)
+        self._json(entry)
+
+    def start_upload(self, workbench_name: str):
+        data = self.json_body()
+        upload_id = uuid.uuid4().hex
+        with self.api.lock:
+            self.api.uploads[upload_id] = {'workbench': workbench_name, 'destination': data.get('destination'),
+                                           'parts': {}}
+        self._json({'upload_id': upload_id})
+
+    def upload_part(self, workbench_name: str, upload_id: str, part_number: str):
+        content = self.body()
+        with self.api.lock:
+            upload = self.api.uploads.get(upload_id)
+            if upload is None:
+                return self._json({'detail': 'Unknown upload'}, status=404)
+            upload['parts'][int(part_number)] = content
+        self._json({'etag': hashlib.md5(content).hexdigest()})
+
+    def complete_upload(self, workbench_name: str, upload_id: str):
+        self.body()
+        with self.api.lock:
+            upload = self.api.uploads.pop(upload_id, None)
+            if upload is None:
+                return self._json({'detail': 'Unknown upload'}, status=404)
+            content = b''.join(upload['parts'][number] for number in sorted(upload['parts']))
+            entry = self.api.workbench(workbench_name).put(upload['destination'], content)
+        self._json(entry)
+
+    def upload_file_url(self, workbench_name: str):
+        data = self.json_body()
+        job = self.api.submit(workbench_name, data.get('method', 'curl'),
+                              f"{data.get('method', 'curl')} {data.get('input_url')} -o {data.get('output_path')}",
+                              idempotency_key=self.headers.get('Idempotency-Key'))
+        self._json(self.api.job_view(job))
+
+    def download(self, workbench_name: str):
+        path = self.query.get('file_path', '')
+        if path not in self.api.workbench(workbench_name).files:
+            return self._json({'detail': f'{path} not found'}, status=404)
+        self._json({'url': f'http://{self.headers.get("Host")}/blobs/{quote(workbench_name)}/{quote(path)}'})
+
+    def blob(self, workbench_name: str, path: str):
+        with self.api.lock:
+            workbench = self.api.workbench(workbench_name)
+            content = workbench.content(path, self.api.object_size)
+            entry = workbench.files.get(path)
+        if content is None:
+            return self._send(404, b'Not Found', content_type='text/plain')
+        headers = {'ETag': f'"{entry["md5_hash"]}"', 'x-goog-hash': f'md5={entry["md5_hash"]}'}
+        self._ranged(content, 'application/octet-stream', headers=headers)
+
+    def move_file(self, workbench_name: str):
+        data = self.json_body()
+        source, destination = data.get('source_file_name'), data.get('destination_file_name')
+        with self.api.lock:
+            workbench = self.api.workbench(workbench_name)
+            if source not in workbench.files:
+                return self._json({'detail': f'{source} not found'}, status=404)
+            entry = workbench.files.pop(source)
+            workbench.files[destination] = dict(entry, name=destination, updated=_now())
+            if source in workbench.contents:
+                workbench.contents[destination] = workbench.contents.pop(source)
+            workbench.changed()
+        self._json({'message': f'Moved {source} to {destination}'})
+
+    def create_directory(self, workbench_name: str):
+        path = self.query.get('path', '').rstrip('/') + '/'
+        with self.api.lock:
+            workbench = self.api.workbench(workbench_name)
+            workbench.files[path] = {'name': path, 'size': 0, 'updated': _now()}
+            workbench.changed()
+        self._json({'path': path, 'message': f'Created {path}'})
+
+    def delete_path(self, workbench_name: str):
+        path = self.query.get('path', '')
+        with self.api.lock:
+            workbench = self.api.workbench(workbench_name)
+            deleted = [name for name in workbench.files if name == path or name.startswith(path.rstrip('/') + '/')]
+            for name in deleted:
+                del workbench.files[name]
+                workbench.contents.pop(name, None)
+            workbench.changed()
+        self._json({'path': path, 'status': f'Deleted {len(deleted)} files'})
+
+    # tools and jobs
+
+    def available_tools(self):
+        self._json([{'name': name, 'version': version} for name, version in TOOLS.items()])
+
+    def run(self, workbench_name: str):
+        data = self.json_body()
+        if not data.get('tool') or not data.get('full_command'):
+            return self._json({'detail': 'tool and full_command are required'}, status=422)
+        job = self.api.submit(workbench_name, data['tool'], data['full_command'],
+                              idempotency_key=self.headers.get('Idempotency-Key'))
+        self._json(self.api.job_view(job))
+
+    def _job(self, workbench_name: str, job_id: str) -> Optional[dict]:
+        job = self.api.jobs.get(job_id)
+        if job is None or job['workbench'] != workbench_name:
+            self._json({'detail': f'Job {job_id} not found'}, status=404)
+            return None
+        return job
+
+    def job(self, workbench_name: str, job_id: str):
+        job = self._job(workbench_name, job_id)
+        if job is not None:
+            self._json(self.api.job_view(job))
+
+    def job_statuses(self, workbench_name: str):
+        job_ids = self.json_body().get('job_ids', [])
+        jobs = [self.api.jobs.get(job_id) for job_id in job_ids]
+        self._json([{'id': job['id'], 'state': self.api.job_state(job)} for job in jobs
+                    if job is not None and job['workbench'] == workbench_name])
+
+    def logs(self, workbench_name: str, job_id: str):
+        job = self._job(workbench_name, job_id)
+        if job is not None:
+            self._json({'id': job_id, 'logs': self.api.job_log(job).decode().splitlines()})
+
+    def stream_logs(self, workbench_name: str, job_id: str):
+        job = self._job(workbench_name, job_id)
+        if job is not None:
+            self._ranged(self.api.job_log(job), 'text/plain; charset=utf-8')
+
+
+class MockServer:
+    """
+    Runs the stand-in api on a background thread of this process, see MockApi for the arguments
+
+        with MockServer(objects=1000) as server:
+            client = tiny.Client(base_url=server.url)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, verbose: bool = False, **kwargs):
+        self.api = MockApi(**kwargs)
+        handler = type('Handler', (MockApiHandler,), {'api': self.api, 'verbose': verbose})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def __repr__(self):
+        return f'MockServer({self.url})'
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def _arguments(parser: argparse.ArgumentParser = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(description='Local stand-in for the tinybio api')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080, help='0 picks a free port')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--bandwidth', type=float, default=None, help='bytes per second per request body')
+    parser.add_argument('--objects', type=int, default=0, help='files every new workbench starts with')
+    parser.add_argument('--object-size', type=int, default=DEFAULT_OBJECT_SIZE, help='bytes per synthetic file')
+    parser.add_argument('--log-lines', type=int, default=DEFAULT_LOG_LINES, help='lines each job logs')
+    parser.add_argument('--job-duration', type=float, default=DEFAULT_JOB_DURATION,
+                        help='seconds until a submitted job succeeds')
+    parser.add_argument('--max-page-size', type=int, default=DEFAULT_MAX_PAGE_SIZE)
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    return parser
+
+
+def _server_options(args: argparse.Namespace) -> dict:
+    return {'latency': args.latency, 'bandwidth': args.bandwidth, 'objects': args.objects,
+            'object_size': args.object_size, 'log_lines': args.log_lines, 'job_duration': args.job_duration,
+            'max_page_size': args.max_page_size}
+
+
+class MockServerProcess:
+    """
+    Runs the stand-in api in a child process, so serving requests does not compete with the client for the GIL.
+    Takes the same keyword arguments as MockApi.
+    """
+
+    def __init__(self, **kwargs):
+        self.options = kwargs
+        self.url = None
+        self._process = None
+
+    def __repr__(self):
+        return f'MockServerProcess({self.url})'
+
+    def start(self) -> 'MockServerProcess':
+        command = [sys.executable, '-m', 'tiny.mockserver', '--port', '0']
+        for name, value in self.options.items():
+            if value is not None:
+                command += [f'--{name.replace("_", "-")}', str(value)]
+        # the child imports this copy of the package, installed or not
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [dirname(dirname(abspath(__file__))),
+                                                           env.get('PYTHONPATH')]))
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True, env=env)
+        # the server announces its url once it is listening
+        output = []
+        for line in self._process.stdout:
+            match = re.match(r'Serving the mock tinybio api on (http://\S+)', line)
+            if match:
+                self.url = match.group(1)
+                return self
+            output.append(line)
+        self.stop()
+        raise RuntimeError(f"Mock server did not start: {''.join(output)}")
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process.stdout.close()
+            self._process = None
+
+    def __enter__(self) -> 'MockServerProcess':
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main(argv=None):
+    args = _arguments().parse_args(argv)
+    server = MockServer(host=args.host, port=args.port, verbose=args.verbose, **_server_options(args))
+    print(f'Serving the mock tinybio api on {server.url}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+from os.path import join, exists
+from typing import List, Dict, Iterable
+
+from .main import Workbench, Job
+from .poller import Poller, get_poller, FIRST_COMPLETED
+from .records import Records, StepRecord
+from .settings import CACHE_DIR
+from .workflow import JobStatus
+
+PIPELINE_STATE_DIR: str = join(CACHE_DIR, 'pipelines')
+DEFAULT_PIPELINE_CONCURRENCY: int = 8
+
+# failure policies
+STOP = 'stop'
+CONTINUE = 'continue'
+
+# step outcomes besides the JobStatus of its job
+COMPLETED_EARLIER = 'Completed earlier'
+UPSTREAM_FAILED = 'Upstream failed'
+NOT_STARTED = 'Not started'
+SUBMIT_FAILED = 'Submit failed'
+
+
+def _is_under(path: str, prefix: str) -> bool:
+    path = '/' + path.strip('/')
+    prefix = '/' + prefix.strip('/')
+    return path == prefix or path.startswith(prefix.rstrip('/') + '/')
+
+
+class Step:
+    def __init__(self, name: str, tool: str, full_command: str, depends_on: Iterable[str] = None,
+                 inputs: Iterable[str] = None, outputs: Iterable[str] = None):
+        self.name = name
+        self.tool = tool
+        self.full_command = full_command
+        self.depends_on = list(depends_on or [])
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        self.job = None
+        self.status = None
+        self.error = None
+
+    def __repr__(self):
+        return f'Step({self.name}, {self.tool}, {self.status})'
+
+    @property
+    def fingerprint(self) -> str:
+        # a step whose command changed since the last run is not considered completed
+        return hashlib.sha1(json.dumps([self.tool, self.full_command]).encode()).hexdigest()
+
+
+class Pipeline:
+    """
+    Steps run as jobs on a workbench as soon as the steps they depend on succeed. Besides depends_on, a step
+    depends on every step with an output path that one of its input paths falls under.
+
+    The job of each step is recorded on disk, so running the pipeline again skips the steps that already succeeded
+    (as long as their command did not change) and picks up the jobs that are still running.
+
+        pipeline = Pipeline(workbench, 'atac-seq')
+        pipeline.add('fastqc', 'fastqc', 'fastqc /input/atac-seq/*.gz -o /output/fastqc', outputs=['/output/fastqc'])
+        pipeline.add('trim', 'trimmomatic', '...', inputs=['/input/atac-seq'], outputs=['/output/trimmed'])
+        pipeline.add('align', 'bowtie2', '...', inputs=['/output/trimmed'], outputs=['/output/aligned'])
+        pipeline.run()
+    """
+
+    def __init__(self, workbench: Workbench, name: str, max_concurrency: int = DEFAULT_PIPELINE_CONCURRENCY,
+                 on_failure: str = STOP, poller: Poller = None):
+        """
+        :param workbench: workbench to run the steps on
+        :param name: name of the pipeline, identifies its saved state
+        :param max_concurrency: maximum number of steps running at once
+        :param on_failure: STOP submits nothing new after a step fails, CONTINUE keeps running the steps that do
+            not depend on the failed one
+        """
+        if on_failure not in (STOP, CONTINUE):
+            raise ValueError(f'Invalid on_failure {on_failure}')
+        self.workbench = workbench
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.on_failure = on_failure
+        self.poller = poller or get_poller()
+        self.steps: Dict[str, Step] = {}
+        self.state_path = join(PIPELINE_STATE_DIR, workbench.name, f'{name}.json')
+
+    def __repr__(self):
+        return f'Pipeline({self.name}, {len(self.steps)} steps)'
+
+    def add(self, name: str, tool: str, full_command: str, depends_on: Iterable[str] = None,
+            inputs: Iterable[str] = None, outputs: Iterable[str] = None) -> Step:
+        """
+        Adds a step
+        :param name: unique name of the step
+        :param tool: tool to run
+        :param full_command: command to run
+        :param depends_on: names of the steps that must succeed first
+        :param inputs: workbench paths the step reads
+        :param outputs: workbench paths the step writes
+        """
+        if name in self.steps:
+            raise ValueError(f'Step {name} already exists')
+        step = self.steps[name] = Step(name, tool, full_command, depends_on=depends_on, inputs=inputs,
+                                       outputs=outputs)
+        return step
+
+    def dependencies(self, step: Step) -> List[str]:
+        dependencies = list(step.depends_on)
+        for other in self.steps.values():
+            if other is step or other.name in dependencies:
+                continue
+            if any(_is_under(path, output) for path in step.inputs for output in other.outputs):
+                dependencies.append(other.name)
+        return dependencies
+
+    def order(self) -> List[Step]:
+        """
+        Steps in an order where every step comes after its dependencies, raises ValueError on unknown
+        dependencies and cycles
+        """
+        dependencies = {name: self.dependencies(step) for name, step in self.steps.items()}
+        for name, names in dependencies.items():
+            unknown = [dependency for dependency in names if dependency not in self.steps]
+            if unknown:
+                raise ValueError(f'Step {name} depends on unknown steps {unknown}')
+        ordered = []
+        placed = set()
+        remaining = list(self.steps)
+        while remaining:
+            ready = [name for name in remaining if all(dependency in placed for dependency in dependencies[name])]
+            if not ready:
+                raise ValueError(f'Steps {remaining} have circular dependencies')
+            for name in ready:
+                ordered.append(self.steps[name])
+                placed.add(name)
+            remaining = [name for name in remaining if name not in placed]
+        return ordered
+
+    def _load_state(self) -> dict:
+        if not exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _save_state(self, state: dict):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _resume(self, step: Step, state: dict):
+        # reattaches a step to the job of an earlier run of the same command
+        recorded = state.get(step.name)
+        if not recorded or recorded.get('fingerprint') != step.fingerprint:
+            return
+        job = self.workbench.jobs(recorded['job_id'])
+        if job is None:
+            job = Job(recorded['job_id'], step.tool, None, step.full_command, self.workbench)
+        if job.status in (JobStatus.FAILED, JobStatus.DELETION_IN_PROGRESS):
+            return
+        step.job = job
+
+    def run(self, restart: bool = False) -> Records:
+        """
+        Runs the pipeline until every step finished or cannot run
+        :param restart: run every step again instead of skipping the ones that already succeeded
+        :return: the report, see report()
+        """
+        steps = self.order()
+        dependencies = {step.name: self.dependencies(step) for step in steps}
+        state = {} if restart else self._load_state()
+        for step in steps:
+            step.job, step.status, step.error = None, None, None
+            # a step whose upstream runs again has to run again as well
+            upstream = [self.steps[name].job for name in dependencies[step.name]]
+            if all(job is not None and job.status == JobStatus.SUCCEEDED for job in upstream):
+                self._resume(step, state)
+
+        running: Dict[str, Step] = {}
+        failed = False
+        while True:
+            for step in steps:
+                if step.status is not None or step.name in running:
+                    continue
+                upstream = [self.steps[name].status for name in dependencies[step.name]]
+                if any(status is not None and status not in (JobStatus.SUCCEEDED, COMPLETED_EARLIER)
+                       for status in upstream):
+                    step.status = UPSTREAM_FAILED
+                elif step.job is not None and step.job.status == JobStatus.SUCCEEDED:
+                    step.status = COMPLETED_EARLIER
+                elif step.job is not None:
+                    # still running from an earlier run, counts against the concurrency cap like any other
+                    running[step.name] = step
+                elif all(status in (JobStatus.SUCCEEDED, COMPLETED_EARLIER) for status in upstream):
+                    if (failed and self.on_failure == STOP) or len(running) >= self.max_concurrency:
+                        continue
+                    try:
+                        step.job = self.workbench._submit(step.tool, step.full_command)
+                    except Exception as e:
+                        step.status = SUBMIT_FAILED
+                        step.error = e.__str__()
+                        failed = True
+                        continue
+                    state[step.name] = {'job_id': step.job.job_id, 'fingerprint': step.fingerprint}
+                    self._save_state(state)
+                    running[step.name] = step
+                    print(f'Submitted step {step.name} as job {step.job.job_id}')
+
+            if not running:
+                break
+            done, _ = self.poller.wait([step.job for step in running.values()], return_when=FIRST_COMPLETED)
+            for step in list(running.values()):
+                if step.job in done:
+                    del running[step.name]
+                    step.status = step.job.status
+                    if step.status != JobStatus.SUCCEEDED:
+                        failed = True
+                    print(f'Step {step.name} finished: {step.status.__str__()}')
+
+        for step in steps:
+            if step.status is None:
+                step.status = NOT_STARTED
+        return self.report(steps)
+
+    def report(self, steps: List[Step] = None) -> Records:
+        """
+        Where each step stands, as StepRecords in dependency order; call render() on the result to print it
+        """
+        steps = self.order() if steps is None else steps
+        return Records(StepRecord(step.name, step.job.job_id if step.job else 'N/A', step.tool,
+                                  step.status.__str__() if step.status is not None else 'N/A',
+                                  tuple(self.dependencies(step)), step.full_command, step.error)
+                       for step in steps)
@@ -0,0 +1,110 @@
+import random
+import time
+from typing import List, Tuple, Iterable
+
+from .workflow import JobStatus, TERMINAL_STATUSES
+
+FIRST_COMPLETED = 'FIRST_COMPLETED'
+ALL_COMPLETED = 'ALL_COMPLETED'
+
+DEFAULT_MIN_INTERVAL: float = 2.0
+DEFAULT_MAX_INTERVAL: float = 60.0
+DEFAULT_BACKOFF: float = 1.5
+DEFAULT_JITTER: float = 0.2
+
+
+class JobFailedError(Exception):
+    def __init__(self, job):
+        super().__init__(f'Job {job.job_id} ({job.tool}) failed: {job.full_command}')
+        self.job = job
+
+
+class Poller:
+    """
+    Polls job statuses with a per-job exponential backoff. A job's interval goes back to min_interval whenever its
+    status changes, and grows by backoff after every poll that sees no change. Jitter spreads polls of jobs
+    submitted together so they do not hit the api in lockstep.
+    """
+
+    def __init__(
+            self,
+            min_interval: float = DEFAULT_MIN_INTERVAL,
+            max_interval: float = DEFAULT_MAX_INTERVAL,
+            backoff: float = DEFAULT_BACKOFF,
+            jitter: float = DEFAULT_JITTER,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+
+    def __repr__(self):
+        return f'Poller(min_interval={self.min_interval}, max_interval={self.max_interval})'
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _poll(self, jobs: List) -> None:
+        # refresh through each job's workbench so the bulk endpoint / worker pool is used
+        by_workbench = {}
+        for job in jobs:
+            by_workbench.setdefault(id(job.workbench), (job.workbench, []))[1].append(job)
+        for workbench, workbench_jobs in by_workbench.values():
+            workbench.refresh_jobs(workbench_jobs)
+
+    def wait(self, jobs: Iterable, return_when: str = ALL_COMPLETED, timeout: float = None,
+             raise_on_failure: bool = False) -> Tuple[List, List]:
+        """
+        Blocks until the jobs finish
+        :param jobs: jobs to wait for
+        :param return_when: FIRST_COMPLETED or ALL_COMPLETED
+        :param timeout: seconds to wait at most, None waits forever
+        :param raise_on_failure: raise JobFailedError as soon as a job fails
+        :return: (done, not_done) lists of jobs
+        """
+        if return_when not in (FIRST_COMPLETED, ALL_COMPLETED):
+            raise ValueError(f'Invalid return_when {return_when}')
+        jobs = list(jobs)
+        unsubmitted = [job for job in jobs if job.job_id == 'N/A']
+        if unsubmitted:
+            raise ValueError(f'Cannot wait for {len(unsubmitted)} jobs that were never submitted')
+        deadline = None if timeout is None else time.monotonic() + timeout
+        intervals = {id(job): self.min_interval for job in jobs}
+        next_poll = {id(job): 0.0 for job in jobs}
+
+        while True:
+            now = time.monotonic()
+            due = [job for job in jobs if job.status not in TERMINAL_STATUSES and next_poll[id(job)] <= now]
+            previous = {id(job): job.status for job in due}
+            if due:
+                self._poll(due)
+            now = time.monotonic()
+            for job in due:
+                if job.status != previous[id(job)]:
+                    intervals[id(job)] = self.min_interval
+                else:
+                    intervals[id(job)] = min(intervals[id(job)] * self.backoff, self.max_interval)
+                next_poll[id(job)] = now + self._jittered(intervals[id(job)])
+
+            done = [job for job in jobs if job.status in TERMINAL_STATUSES]
+            not_done = [job for job in jobs if job.status not in TERMINAL_STATUSES]
+            if raise_on_failure:
+                for job in done:
+                    if job.status == JobStatus.FAILED:
+                        raise JobFailedError(job)
+            if not not_done or (return_when == FIRST_COMPLETED and done):
+                return done, not_done
+            if deadline is not None and now >= deadline:
+                return done, not_done
+
+            wake_at = min(next_poll[id(job)] for job in not_done)
+            if deadline is not None:
+                wake_at = min(wake_at, deadline)
+            time.sleep(max(wake_at - time.monotonic(), 0))
+
+
+_default_poller = Poller()
+
+
+def get_poller() -> Poller:
+    return _default_poller
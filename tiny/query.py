@@ -0,0 +1,102 @@
+import re
+from typing import Iterable, Iterator, Dict, Tuple, Pattern
+
+from .sync import remote_size
+
+_WILDCARDS = re.compile(r'[*?\[]')
+
+
+def glob_prefix(pattern: str) -> str:
+    """
+    Leading directories of pattern without wildcards, ending with '/', which the server can filter on by itself.
+    'input/**/*_1.fastq.gz' gives 'input/'; a pattern without wildcards gives its own directory.
+    """
+    segments = pattern.lstrip('/').split('/')
+    literal = []
+    for segment in segments[:-1]:
+        if _WILDCARDS.search(segment):
+            break
+        literal.append(segment)
+    return '/'.join(literal) + '/' if literal else ''
+
+
+def _translate_segment(segment: str) -> str:
+    parts = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = segment.find(']', i + 2 if segment[i + 1:i + 2] in ('!', ']') else i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = segment[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f'[{body}]')
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return ''.join(parts)
+
+
+def compile_glob(pattern: str) -> Pattern:
+    """
+    Compiles a glob over workbench paths: * and ? stay within one directory, [abc] and [!abc] match one character
+    and a ** segment matches any number of directories, including none. A trailing / only matches directories.
+    """
+    segments = pattern.lstrip('/').split('/')
+    regex = ''
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == '**':
+            regex += '.*' if last else '(?:[^/]+/)*'
+        else:
+            regex += _translate_segment(segment) + ('' if last else '/')
+    return re.compile(regex + r'\Z')
+
+
+def match_glob(entries: Iterable[dict], pattern: str) -> Iterator[dict]:
+    """
+    Yields the listing entries whose name matches pattern
+    """
+    match = compile_glob(pattern).match
+    for entry in entries:
+        if match(entry.get('name') or ''):
+            yield entry
+
+
+def disk_usage(entries: Iterable[dict], prefix: str = None, depth: int = None) -> Dict[str, Tuple[int, int]]:
+    """
+    Totals file sizes per directory in one pass over a listing. Each file counts toward every directory above it,
+    from prefix down to depth levels below prefix; deeper directories are folded into their ancestor at depth.
+    :param entries: listing entries under prefix
+    :param prefix: directory the totals start from, the whole workbench when None
+    :param depth: directory levels below prefix to report, None for all of them
+    :return: {directory: (bytes, files)}, with prefix itself as '' when None; empty when there are no files
+    """
+    prefix = prefix.strip('/') + '/' if prefix and prefix.strip('/') else ''
+    totals = {prefix: [0, 0]}
+    for entry in entries:
+        name = entry.get('name') or ''
+        size = remote_size(entry)
+        if name.endswith('/') or size is None or not name.startswith(prefix):
+            continue
+        directories = name[len(prefix):].split('/')[:-1]
+        if depth is not None:
+            directories = directories[:depth]
+        paths = [prefix]
+        for directory in directories:
+            paths.append(paths[-1] + directory + '/')
+        for path in paths:
+            total = totals.setdefault(path, [0, 0])
+            total[0] += size
+            total[1] += 1
+    if not totals[prefix][1]:
+        return {}
+    return {path: (size, files) for path, (size, files) in totals.items()}
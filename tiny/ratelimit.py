@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing rate calls per second with bursts of up to burst calls
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if not rate > 0:
+            raise ValueError(f'Invalid rate {rate}, expected calls per second above 0')
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'RateLimiter(rate={self.rate}, burst={self.burst})'
+
+    def acquire(self):
+        """
+        Blocks until a call is allowed
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,150 @@
+import io
+import sys
+from datetime import datetime
+from itertools import islice
+from typing import NamedTuple, Optional, Iterable, List, TextIO
+
+DEFAULT_RENDER_LIMIT: int = 50
+# column widths are taken from this many rows, later rows are cut to fit
+WIDTH_SAMPLE_ROWS: int = 50
+DEFAULT_MAX_COLUMN_WIDTH: int = 80
+
+
+class JobRecord(NamedTuple):
+    job_id: str
+    tool: str
+    version: str
+    status: str
+    full_command: str
+
+    headers = ('Job ID', 'Tool', 'Version', 'Status', 'Get Logs', 'Full Command')
+
+    def cells(self) -> list:
+        get_logs = f"workbench.jobs('{self.job_id}').logs()" if self.job_id != 'N/A' else 'N/A'
+        return [self.job_id, self.tool, self.version, self.status, get_logs, self.full_command]
+
+
+class WorkbenchRecord(NamedTuple):
+    name: str
+    size: Optional[int]
+    updated_at: Optional[str]
+
+    headers = ('Workbench Name', 'Size', 'Last Updated')
+
+    def cells(self) -> list:
+        import humanize
+
+        size = humanize.naturalsize(self.size) if self.size is not None else 'N/A'
+        try:
+            updated_at = datetime.strptime(self.updated_at, '%Y-%m-%dT%H:%M:%S.%f')
+            updated = humanize.naturaltime(datetime.now() - updated_at)
+        except (TypeError, ValueError):
+            updated = self.updated_at or 'N/A'
+        return [self.name, size, updated]
+
+
+class DiskUsageRecord(NamedTuple):
+    path: str
+    size: int
+    files: int
+
+    headers = ('Path', 'Size', 'Files')
+
+    def cells(self) -> list:
+        import humanize
+
+        return [self.path or '/', humanize.naturalsize(self.size), self.files]
+
+
+class StepRecord(NamedTuple):
+    step: str
+    job_id: str
+    tool: str
+    status: str
+    depends_on: tuple
+    full_command: str
+    error: Optional[str]
+
+    headers = ('Step', 'Job ID', 'Tool', 'Status', 'Depends On', 'Full Command')
+
+    def cells(self) -> list:
+        return [self.step, self.job_id, self.tool, self.status, ', '.join(self.depends_on),
+                self.error or self.full_command]
+
+
+def _cell(value) -> str:
+    text = '' if value is None else str(value)
+    return text.replace('\n', ' ')
+
+
+def _fit(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:max(width - 3, 0)] + '...'
+
+
+def render(records: Iterable[tuple], limit: Optional[int] = DEFAULT_RENDER_LIMIT, file: TextIO = None,
+           max_column_width: int = DEFAULT_MAX_COLUMN_WIDTH, empty_message: str = None):
+    """
+    Prints records as a table row by row, without building the whole table first. Column widths come from the
+    first rows; longer values further down are cut short.
+    :param records: records with headers and cells(), such as JobRecord, or a Records list
+    :param limit: print at most this many rows, None for all of them
+    :param file: stream to print to, stdout by default
+    :param max_column_width: values longer than this are cut short
+    :param empty_message: printed instead of the table when there are no records
+    """
+    file = file or sys.stdout
+    records = iter(records)
+    first = list(islice(records, WIDTH_SAMPLE_ROWS if limit is None else min(max(limit, 1), WIDTH_SAMPLE_ROWS)))
+    if not first:
+        if empty_message:
+            print(empty_message, file=file)
+        return
+    if limit is not None and limit < 1:
+        hidden = len(first) + sum(1 for _ in records)
+        print(f'... {hidden} more rows, render with a higher limit to see them', file=file)
+        return
+    headers = list(first[0].headers)
+    sample = [[_cell(cell) for cell in record.cells()] for record in first]
+    widths = [min(max([len(header)] + [len(row[i]) for row in sample]), max(max_column_width, len(header)))
+              for i, header in enumerate(headers)]
+
+    def line(cells: List[str]) -> str:
+        return '  '.join(_fit(cell, width).ljust(width) for cell, width in zip(cells, widths)).rstrip()
+
+    print(line(headers), file=file)
+    print(line(['-' * width for width in widths]), file=file)
+    for row in sample:
+        print(line(row), file=file)
+    shown = len(sample)
+    for record in records:
+        if limit is not None and shown >= limit:
+            hidden = 1 + sum(1 for _ in records)
+            print(f'... {hidden} more rows, render with a higher limit to see them', file=file)
+            return
+        print(line([_cell(cell) for cell in record.cells()]), file=file)
+        shown += 1
+
+
+class Records(list):
+    """
+    List of typed records (JobRecord, WorkbenchRecord, ...). Nothing is printed until render() is called; the repr
+    shows the first DEFAULT_RENDER_LIMIT rows as a table.
+    """
+
+    def __init__(self, records: Iterable[tuple] = (), empty_message: str = None):
+        super().__init__(records)
+        self.empty_message = empty_message
+
+    def render(self, limit: Optional[int] = DEFAULT_RENDER_LIMIT, file: TextIO = None,
+               max_column_width: int = DEFAULT_MAX_COLUMN_WIDTH):
+        render(self, limit=limit, file=file, max_column_width=max_column_width, empty_message=self.empty_message)
+
+    def as_dicts(self) -> List[dict]:
+        return [record._asdict() for record in self]
+
+    def __repr__(self):
+        buffer = io.StringIO()
+        render(self, file=buffer, empty_message=self.empty_message or 'No records')
+        return buffer.getvalue().rstrip('\n')
+
+    __str__ = __repr__
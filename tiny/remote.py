@@ -0,0 +1,128 @@
+import io
+from collections import OrderedDict
+
+from .client import Client, get_client
+from .errors import ApiError
+from .transfer import _content_range_total, _empty_object
+
+DEFAULT_BLOCK_SIZE: int = 1024 * 1024
+DEFAULT_CACHE_BLOCKS: int = 64
+DEFAULT_MAX_READ_AHEAD: int = 16
+
+
+class RemoteFile(io.RawIOBase):
+    """
+    Seekable, read-only file object over a download url. Reads are served from fixed size blocks fetched with
+    range requests and kept in an LRU cache. Sequential reads grow the number of blocks fetched per request,
+    so streaming a slice costs roughly the size of the slice in transfer.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            client: Client = None,
+            name: str = None,
+            block_size: int = DEFAULT_BLOCK_SIZE,
+            cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+            max_read_ahead: int = DEFAULT_MAX_READ_AHEAD,
+    ):
+        super().__init__()
+        self.url = url
+        self.name = name or url
+        self.client = client or get_client()
+        self.block_size = block_size
+        self.cache_blocks = max(cache_blocks, max_read_ahead)
+        self.max_read_ahead = max_read_ahead
+        self.bytes_fetched = 0
+        self._cache = OrderedDict()
+        self._position = 0
+        self._read_ahead = 1
+        self._last_block = None
+        self.size = self._probe_size()
+
+    def __repr__(self):
+        return f'RemoteFile({self.name})'
+
+    def _probe_size(self) -> int:
+        with self.client.stream('GET', self.url, headers={'Range': 'bytes=0-0'}) as r:
+            if _empty_object(r):
+                # an empty object has no byte 0 to return, every read is at the end of the file
+                return 0
+            if r.status_code != 206:
+                raise ApiError(f"Range requests are not supported for {self.name}: {r.status_code}",
+                               status_code=r.status_code)
+            size = _content_range_total(r.headers.get('content-range'))
+        if size is None:
+            raise Exception(f"Unknown size for {self.name}")
+        return size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f'Invalid whence {whence}')
+        if position < 0:
+            raise ValueError(f'Negative seek position {position}')
+        self._position = position
+        return position
+
+    def _fetch(self, first: int, last: int):
+        """
+        Fetches blocks first..last inclusive in one range request and caches them
+        """
+        start = first * self.block_size
+        end = min((last + 1) * self.block_size, self.size) - 1
+        r = self.client.get(self.url, headers={'Range': f'bytes={start}-{end}'})
+        if r.status_code != 206:
+            raise ApiError(f"Error reading bytes {start}-{end} of {self.name}: {r.status_code}",
+                           status_code=r.status_code)
+        data = r.content
+        self.bytes_fetched += len(data)
+        for index in range(first, last + 1):
+            offset = (index - first) * self.block_size
+            self._cache[index] = data[offset:offset + self.block_size]
+            self._cache.move_to_end(index)
+        while len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+
+    def _block(self, index: int) -> bytes:
+        if self._last_block is not None and index == self._last_block + 1:
+            self._read_ahead = min(self._read_ahead * 2, self.max_read_ahead)
+        elif index != self._last_block:
+            self._read_ahead = 1
+        self._last_block = index
+
+        if index not in self._cache:
+            last_block = (self.size - 1) // self.block_size
+            last = index
+            while last < min(index + self._read_ahead - 1, last_block) and last + 1 not in self._cache:
+                last += 1
+            self._fetch(index, last)
+        self._cache.move_to_end(index)
+        return self._cache[index]
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast('B')
+        wanted = min(len(view), max(self.size - self._position, 0))
+        read = 0
+        while read < wanted:
+            index, offset = divmod(self._position, self.block_size)
+            block = self._block(index)
+            count = min(len(block) - offset, wanted - read)
+            view[read:read + count] = block[offset:offset + count]
+            read += count
+            self._position += count
+        return read
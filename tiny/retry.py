@@ -0,0 +1,171 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from .errors import TRANSIENT_STATUS_CODES
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+# the server did not act on these, so any request can be sent again
+NOT_PROCESSED_STATUS_CODES = (429, 503)
+# raised before the request reached the server
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+DEFAULT_MAX_RETRIES: int = 4
+DEFAULT_RETRY_BACKOFF: float = 0.5
+DEFAULT_MAX_RETRY_BACKOFF: float = 30.0
+DEFAULT_MAX_RETRY_AFTER: float = 120.0
+
+DEFAULT_FAILURE_THRESHOLD: int = 10
+DEFAULT_CIRCUIT_COOLDOWN: float = 5.0
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before sending a failed request again. Idempotent requests are retried on
+    connection errors, timeouts and transient statuses (429, 5xx); other requests only when the server cannot have
+    acted on them (connect errors, 429, 503), unless they carry an idempotency key. Waits grow exponentially with
+    full jitter, or follow the Retry-After header when the server sends one.
+    """
+
+    def __init__(
+            self,
+            max_retries: int = DEFAULT_MAX_RETRIES,
+            backoff: float = DEFAULT_RETRY_BACKOFF,
+            max_backoff: float = DEFAULT_MAX_RETRY_BACKOFF,
+            max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+            retry_status_codes=TRANSIENT_STATUS_CODES,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.retry_status_codes = retry_status_codes
+
+    def __repr__(self):
+        return f'RetryPolicy(max_retries={self.max_retries}, backoff={self.backoff})'
+
+    def retry_response(self, response: httpx.Response, idempotent: bool) -> bool:
+        return response.status_code in self.retry_status_codes and \
+            (idempotent or response.status_code in NOT_PROCESSED_STATUS_CODES)
+
+    def retry_error(self, error: Exception, idempotent: bool) -> bool:
+        return isinstance(error, httpx.TransportError) and (idempotent or isinstance(error, NOT_SENT_ERRORS))
+
+    def delay(self, attempt: int, response: httpx.Response = None) -> float:
+        """
+        Seconds to wait before retry number attempt (from 0)
+        """
+        if response is not None:
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+NO_RETRY = RetryPolicy(max_retries=0)
+
+
+class CircuitBreaker:
+    """
+    Adaptive limit on the requests a client has in flight. Every transient failure halves the limit and every
+    success raises it by one again, so bulk operations slow down while the api is degraded instead of piling on
+    retries. After failure_threshold failures in a row the circuit opens: requests wait cooldown seconds and then
+    go through one at a time until they succeed again.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            min_concurrency: int = 1,
+            failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+            cooldown: float = DEFAULT_CIRCUIT_COOLDOWN,
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self._condition = threading.Condition()
+
+    def __repr__(self):
+        return f'CircuitBreaker({self.state}, limit={int(self.limit)}, in_flight={self.in_flight})'
+
+    @property
+    def state(self) -> str:
+        if time.monotonic() < self.open_until:
+            return 'open'
+        return 'closed' if self.limit >= self.max_concurrency else 'throttled'
+
+    def _wait_time(self, hold: bool) -> float:
+        # 0 when a request may go now, otherwise how long to wait at most before checking again
+        now = time.monotonic()
+        if now < self.open_until:
+            return self.open_until - now
+        if hold and self.in_flight >= max(int(self.limit), self.min_concurrency):
+            return 1.0
+        return 0.0
+
+    def acquire(self, hold: bool = True):
+        """
+        Blocks until a request may be sent
+        :param hold: count the request against the limit until release() (False for long-lived streams, which
+            only wait while the circuit is open)
+        """
+        with self._condition:
+            while True:
+                wait = self._wait_time(hold)
+                if wait <= 0:
+                    self.in_flight += hold
+                    return
+                self._condition.wait(wait)
+
+    async def acquire_async(self, hold: bool = True):
+        while True:
+            with self._condition:
+                wait = self._wait_time(hold)
+                if wait <= 0:
+                    self.in_flight += hold
+                    return
+            await asyncio.sleep(min(wait, 0.05))
+
+    def release(self, success: Optional[bool], hold: bool = True):
+        """
+        Records the outcome of a request started with acquire
+        :param success: False for transient failures, None when the outcome says nothing about the api's health
+        """
+        with self._condition:
+            self.in_flight -= hold
+            if success is True:
+                self.consecutive_failures = 0
+                self.limit = min(self.limit + 1, self.max_concurrency)
+            elif success is False:
+                self.consecutive_failures += 1
+                self.limit = max(self.limit / 2, self.min_concurrency)
+                if self.consecutive_failures >= self.failure_threshold:
+                    self.open_until = time.monotonic() + self.cooldown
+                    self.limit = self.min_concurrency
+                    self.consecutive_failures = 0
+            self._condition.notify_all()
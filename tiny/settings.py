@@ -1,3 +1,25 @@
+import os
+
 PROD_BASE_URL = "https://api.tinybio.cloud"
 # PROD_BASE_URL = "http://localhost:8080"
 DEV_BASE_URL = "http://localhost:8080"
+# api the clients talk to unless given a base_url, e.g. a local server started with python -m tiny.mockserver
+BASE_URL = os.environ.get('TINYBIO_BASE_URL', PROD_BASE_URL)
+CACHE_DIR = os.environ.get('TINYBIO_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.tiny'))
+LOGIN_URL = "https://api.tinybio.cloud/readme-docs/login"
+
+# printed on import when TINYBIO_BANNER is set and no token is
+AUTH_BANNER = """
+TINYBIO_AUTH_TOKEN NOT FOUND IN ENVIRONMENT VARIABLES
+
+To create a token click here: https://api.tinybio.cloud/readme-docs/login
+
+SET YOUR TOKEN AS AN ENVIRONMENT VARIABLE:
+import os
+os.environ['TINYBIO_AUTH_TOKEN']='YOUR_TOKEN_HERE'
+
+To gain access to your workbench, run:
+workbench = tiny.Workbench(name="WORKBENCH_NAME")
+
+Check out these comprehensive tutorials on RNA-Seq, ATAC-Seq, and Variant calling on our docs here: http://docs.tinybio.cloud
+"""
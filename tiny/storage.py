@@ -1,87 +1,337 @@
 import json
-from os import listdir
-from os.path import isfile, join, isdir, split
-from typing import List, Tuple, Any
-
-import httpx
-
-from .settings import PROD_BASE_URL
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import walk, sep
+from os.path import join, isdir, split, getsize, relpath, basename
+from typing import List, Tuple, Any, Optional, Iterator
+
+from .client import Client, get_client, TRANSFER_TIMEOUT
+from .errors import ApiError
+from .transfer import upload_chunked, download_ranged, DEFAULT_PART_SIZE
 
 INPUT_PREFIX: str = 'input/'
+DEFAULT_UPLOAD_WORKERS: int = 8
+DEFAULT_DOWNLOAD_WORKERS: int = 8
+DEFAULT_BULK_WORKERS: int = 16
 
 
-def download_file(workbench_name: str, remote_file: str, auth_token: str) -> json:
+def download_file(workbench_name: str, remote_file: str, auth_token: str, client: Client = None) -> json:
     """
     Downloads a file from a workbench
     :param workbench_name: name of workbench
     :param remote_file: full path of remote file
     :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
     :return:
     """
+    client = client or get_client()
     query_params = {'file_path': remote_file}
-    url = f"{PROD_BASE_URL}/workbench/{workbench_name}/download"
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.get(url, timeout=None, params=query_params, headers=headers)
+    url = f"/workbench/{workbench_name}/download"
+    r = client.get(url, auth_token=auth_token, params=query_params)
     if r.status_code != 200:
-        raise Exception(f"Error downloading file {remote_file} from workbench {workbench_name}")
+        raise ApiError(f"Error downloading file {remote_file} from workbench {workbench_name}",
+                       status_code=r.status_code)
 
     return r.json()
 
 
-def list_files_in_workbench(workbench_name: str, auth_token: str, path: str = None) -> json:
+def get_download_url(workbench_name: str, remote_file: str, auth_token: str, client: Client = None) -> str:
+    """
+    Gets the signed download url of a file in a workbench
+    :param workbench_name: name of workbench
+    :param remote_file: full path of remote file
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
+    :return:
+    """
+    response = download_file(workbench_name, remote_file, auth_token, client=client)
+    if isinstance(response, str):
+        return response
+    for key in ('url', 'download_url', 'signed_url'):
+        if response.get(key):
+            return response[key]
+    raise Exception(f"No download url for {remote_file} in workbench {workbench_name}: {response}")
+
+
+def download_files(workbench_name: str, remote_path: str, destination: str, auth_token: str, client: Client = None,
+                   max_workers: int = DEFAULT_DOWNLOAD_WORKERS, part_size: int = DEFAULT_PART_SIZE,
+                   verify: bool = False) -> dict:
+    """
+    Downloads a file, or every file under a directory when remote_path ends with '/', from a workbench
+    :param workbench_name: name of workbench
+    :param remote_path: full path of remote file or directory prefix
+    :param destination: local file path, or local directory for a directory prefix
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the requests with, defaults to the shared client
+    :param max_workers: maximum number of files downloaded at once
+    :param part_size: size of each range request in bytes
+    :param verify: check each finished file against the checksum advertised by the server
+    :return: mapping of remote path to local path
+    """
+    client = client or get_client()
+    if not remote_path.endswith('/'):
+        if isdir(destination):
+            destination = join(destination, remote_path.rsplit('/', 1)[-1])
+        downloads = {remote_path: destination}
+    else:
+        files = list_files_in_workbench(workbench_name, auth_token, path=remote_path, client=client)
+        downloads = {
+            file.get('name'): join(destination, *file.get('name')[len(remote_path):].split('/'))
+            for file in files
+            if file.get('name', '').startswith(remote_path) and not file.get('name').endswith('/')
+        }
+
+    return _download_many(workbench_name, downloads, auth_token, client=client, max_workers=max_workers,
+                          part_size=part_size, verify=verify)
+
+
+def _download_many(workbench_name: str, downloads: dict, auth_token: str, client: Client = None,
+                   max_workers: int = DEFAULT_DOWNLOAD_WORKERS, part_size: int = DEFAULT_PART_SIZE,
+                   verify: bool = False) -> dict:
+    """
+    Downloads files concurrently
+    :param workbench_name: name of workbench
+    :param downloads: mapping of remote path to local path
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the requests with, defaults to the shared client
+    :param max_workers: maximum number of files downloaded at once
+    :param part_size: size of each range request in bytes
+    :param verify: check each finished file against the checksum advertised by the server
+    :return: mapping of remote path to local path
+    """
+    client = client or get_client()
+
+    def fetch(remote_file: str, local_file: str) -> str:
+        url = get_download_url(workbench_name, remote_file, auth_token, client=client)
+        return download_ranged(url, local_file, client=client, part_size=part_size, verify=verify)
+
+    file_mapping = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, remote_file, local_file): remote_file
+                   for remote_file, local_file in downloads.items()}
+        for future in as_completed(futures):
+            remote_file = futures[future]
+            try:
+                file_mapping[remote_file] = future.result()
+            except Exception as e:
+                errors[remote_file] = e
+    if errors:
+        failed = ', '.join(f'{remote_file}: {error}' for remote_file, error in errors.items())
+        raise Exception(f"Error downloading {len(errors)} files from workbench {workbench_name}: {failed}")
+
+    return {remote_file: file_mapping[remote_file] for remote_file in downloads}
+
+
+def list_files_in_workbench(workbench_name: str, auth_token: str, path: str = None, client: Client = None) -> json:
     """
     Lists files in a workbench
     :param workbench_name: name of workbench
     :param path: path to list files in
     :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
     :return:
     """
-    url = f"{PROD_BASE_URL}/workbench/{workbench_name}"
-    if path:
-        url += f"?path={path}"
-
-    #TODO: abstract this out into a client?
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.get(url, timeout=None, headers=headers)
+    client = client or get_client()
+    url = f"/workbench/{workbench_name}"
+    query_params = {'path': path} if path else None
+    r = client.get(url, auth_token=auth_token, params=query_params)
     if r.status_code != 200:
-        raise Exception(r.content)
+        raise ApiError(r.content, status_code=r.status_code)
 
     return r.json()
 
 
-def _upload_blob(workbench_name: str, source_file_name: str, auth_token: str) -> json:
+def iter_files_in_workbench(workbench_name: str, auth_token: str, path: str = None, page_size: int = 1000,
+                            client: Client = None) -> Iterator[dict]:
+    """
+    Lists files in a workbench page by page, yielding entries as each page arrives. Servers that answer with a
+    plain list are treated as a single page.
+    :param workbench_name: name of workbench
+    :param auth_token: auth token provided by logging in
+    :param path: path to list files in
+    :param page_size: number of entries requested per page
+    :param client: client to send the requests with, defaults to the shared client
+    :return:
+    """
+    client = client or get_client()
+    url = f"/workbench/{workbench_name}"
+    query_params = {'page_size': page_size}
+    if path:
+        query_params['path'] = path
+    while True:
+        r = client.get(url, auth_token=auth_token, params=query_params)
+        if r.status_code != 200:
+            raise ApiError(r.content, status_code=r.status_code)
+        page = r.json()
+        if isinstance(page, list):
+            yield from page
+            return
+        yield from page.get('files', [])
+        next_page_token = page.get('next_page_token')
+        if not next_page_token:
+            return
+        query_params['page_token'] = next_page_token
+
+
+def list_files_if_modified(workbench_name: str, auth_token: str, etag: str = None,
+                           client: Client = None) -> Tuple[Optional[list], Optional[str]]:
+    """
+    Lists files in a workbench unless the listing is unchanged since etag
+    :param workbench_name: name of workbench
+    :param auth_token: auth token provided by logging in
+    :param etag: etag of the previously fetched listing
+    :param client: client to send the request with, defaults to the shared client
+    :return: (files or None when unchanged, etag of the listing)
+    """
+    client = client or get_client()
+    url = f"/workbench/{workbench_name}"
+    headers = {'If-None-Match': etag} if etag else None
+    r = client.get(url, auth_token=auth_token, headers=headers)
+    if r.status_code == 304:
+        return None, etag
+    if r.status_code != 200:
+        raise ApiError(r.content, status_code=r.status_code)
+
+    return r.json(), r.headers.get('etag')
+
+
+def _upload_blob(workbench_name: str, source_file_name: str, auth_token: str, client: Client = None) -> json:
     """Uploads a file to the workbench."""
+    client = client or get_client()
     # The ID of your GCS workbench
     # name = "your-workbench-name"
     # The path to your file to upload
     # source_file_name = "local/path/to/file"
 
     # from requests_toolbelt import MultipartEncoder
-    url = f"{PROD_BASE_URL}/workbench/{workbench_name}/upload"
+    url = f"/workbench/{workbench_name}/upload"
     # m = MultipartEncoder(fields={'file': (source_file_name, open(source_file_name, 'rb'))})
     # r = requests.post(url, data=m, headers={'Content-Type': m.content_type})
-    files = {'file': open(source_file_name, 'rb')}
     print(f'Uploading {source_file_name} to {workbench_name}')
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.post(url, files=files, timeout=None, headers=headers)
+    with open(source_file_name, 'rb') as f:
+        r = client.post(url, auth_token=auth_token, files={'file': f}, timeout=TRANSFER_TIMEOUT,
+                        idempotency_key=uuid.uuid4().hex)
     if r.status_code != 200:
         print(r.text)
-        raise Exception(f"Error uploading file {source_file_name} to workbench {workbench_name}")
+        raise ApiError(f"Error uploading file {source_file_name} to workbench {workbench_name}",
+                       status_code=r.status_code)
 
     return r.json()
 
 
-def upload_files(workbench_name: str, local_files: str, auth_token: str) -> dict:
+def _is_chunked(source_file_name: str, part_size: int = None) -> bool:
+    return bool(part_size) and getsize(source_file_name) > part_size
+
+
+def _upload_one(workbench_name: str, source_file_name: str, destination: str, auth_token: str, client: Client = None,
+                part_size: int = None) -> json:
+    """
+    Uploads a single file, in resumable parts when part_size is set and the file is larger than one part
+    """
+    if _is_chunked(source_file_name, part_size):
+        return upload_chunked(workbench_name, source_file_name, destination, auth_token, client=client,
+                              part_size=part_size)
+    return _upload_blob(workbench_name, source_file_name, auth_token, client=client)
+
+
+def _walk_files(local_dir: str) -> List[str]:
     """
-    Uploads a list or single files to a workbench
+    Recursively lists the files under a local directory
+    :param local_dir: local directory
+    :return: paths relative to local_dir, always '/' separated
+    """
+    relative_paths = []
+    for dir_path, dir_names, file_names in walk(local_dir):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            relative_path = relpath(join(dir_path, file_name), local_dir)
+            relative_paths.append(relative_path.replace(sep, '/'))
+    return relative_paths
+
+
+def _check_name_collisions(workbench_name: str, local_files: List[str]):
+    """
+    Raises ValueError listing the files that share a name, since /upload places each file by its name alone and
+    they would overwrite each other
+    """
+    name_counts = Counter(basename(local_file) for local_file in local_files)
+    colliding = sorted(local_file for local_file in local_files if name_counts[basename(local_file)] > 1)
+    if colliding:
+        raise ValueError(f"Cannot upload files sharing a name to workbench {workbench_name}, each would overwrite "
+                         f"the others: {', '.join(colliding)}")
+
+
+def _upload_many(workbench_name: str, uploads: List[Tuple[str, str]], auth_token: str, client: Client = None,
+                 max_workers: int = DEFAULT_UPLOAD_WORKERS, part_size: int = None) -> dict:
+    """
+    Uploads files concurrently, largest first so the long transfers start straight away
+    :param workbench_name: name of workbench
+    :param uploads: list of tuples (local path, destination path)
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the requests with, defaults to the shared client
+    :param max_workers: maximum number of files in flight
+    :param part_size: upload files larger than this in resumable parts of this size
+    :return: mapping of local path to destination path for every uploaded file
+    """
+    client = client or get_client()
+    _check_name_collisions(workbench_name, [local_file for local_file, _ in uploads
+                                            if not _is_chunked(local_file, part_size)])
+    uploads = sorted(uploads, key=lambda upload: getsize(upload[0]), reverse=True)
+    total_bytes = sum(getsize(local_file) for local_file, _ in uploads)
+
+    file_mapping = {}
+    errors = {}
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_upload_one, workbench_name, local_file, destination, auth_token, client, part_size):
+                (local_file, destination)
+            for local_file, destination in uploads
+        }
+        for future in as_completed(futures):
+            local_file, destination = futures[future]
+            try:
+                future.result()
+                file_mapping[local_file] = destination
+            except Exception as e:
+                errors[local_file] = e
+    elapsed = max(time.monotonic() - started, 1e-6)
+
+    from humanize import naturalsize
+
+    sent_bytes = sum(getsize(local_file) for local_file in file_mapping)
+    print(f'Uploaded {len(file_mapping)}/{len(uploads)} files ({naturalsize(sent_bytes)} of {naturalsize(total_bytes)}) '
+          f'to {workbench_name} in {elapsed:.1f}s ({naturalsize(sent_bytes / elapsed)}/s)')
+    if errors:
+        failed = ', '.join(f'{local_file}: {error}' for local_file, error in errors.items())
+        raise Exception(f"Error uploading {len(errors)} files to workbench {workbench_name}: {failed}")
+
+    # keep the mapping in walk order rather than completion order
+    return {local_file: file_mapping[local_file] for local_file, _ in sorted(uploads) if local_file in file_mapping}
+
+
+def upload_files(workbench_name: str, local_files: str, auth_token: str, client: Client = None,
+                 max_workers: int = DEFAULT_UPLOAD_WORKERS, chunked: bool = False,
+                 part_size: int = DEFAULT_PART_SIZE) -> dict:
+    """
+    Uploads a list or single files to a workbench, directories are walked recursively and uploaded concurrently
     :param workbench_name: name of workbench
     :param local_files: full path of local file or directory
     :param auth_token: auth token provided by logging in
+    :param client: client to send the requests with, defaults to the shared client
+    :param max_workers: maximum number of files uploaded at once
+    :param chunked: upload files larger than part_size in resumable parts
+    :param part_size: size in bytes of each part when chunked
     :return:
     """
     file_mapping = {}
     try:
         is_dir = isdir(local_files)
+        if is_dir:
+            local_files = local_files.rstrip('/') or local_files
 
         file_path, base_name = split(local_files)
         dir_prefix = INPUT_PREFIX + base_name
@@ -91,14 +341,14 @@ def upload_files(workbench_name: str, local_files: str, auth_token: str) -> dict
             source_path = local_files
 
         if is_dir:
-            files = [f for f in listdir(local_files) if isfile(join(local_files, f))]
-            for file in files:
-                local_file = source_path + file
-                _upload_blob(workbench_name, local_file, auth_token)
-                destination_blob_name = dir_prefix + '/' + file
-                file_mapping[local_file] = destination_blob_name
+            uploads = [(source_path + file, dir_prefix + '/' + file) for file in _walk_files(local_files)]
+            file_mapping = _upload_many(workbench_name, uploads, auth_token, client=client, max_workers=max_workers,
+                                        part_size=part_size if chunked else None)
+        elif chunked and getsize(source_path) > part_size:
+            upload_chunked(workbench_name, source_path, dir_prefix, auth_token, client=client, part_size=part_size)
+            file_mapping[source_path] = dir_prefix
         else:
-            _upload_blob(workbench_name, source_path, auth_token)
+            _upload_blob(workbench_name, source_path, auth_token, client=client)
             destination_blob_name = dir_prefix
             file_mapping[source_path] = destination_blob_name
 
@@ -107,123 +357,248 @@ def upload_files(workbench_name: str, local_files: str, auth_token: str) -> dict
         raise e
 
 
-def upload_file_path(workbench_name: str, files: List[Tuple[str, str]], auth_token: str, method: str = 'curl') -> list[Any]:
+def _submit_file_url(workbench_name: str, input_url: str, output_path: str, auth_token: str, method: str,
+                     client: Client) -> json:
+    url = f"/workbench/{workbench_name}/upload/file-url"
+    data = {
+        'input_url': input_url,
+        'output_path': output_path,
+        'method': method
+    }
+    r = client.post(url, auth_token=auth_token, json=data, idempotency_key=uuid.uuid4().hex)
+    if r.status_code != 200:
+        raise ApiError(r.content, status_code=r.status_code)
+
+    return r.json()
+
+
+def upload_file_path(workbench_name: str, files: List[Tuple[str, str]], auth_token: str, method: str = 'curl',
+                     client: Client = None) -> List[Any]:
     """
     creates a job that will download a list or single files to a workbench
     :param workbench_name: name of workbench
     :param files: list of tuples (url, output path)
     :param auth_token: auth token provided by logging in
     :param method: method to use to download file
+    :param client: client to send the requests with, defaults to the shared client
     :return:
     """
+    client = client or get_client()
     response = []
     for file in files:
         input_url = file[0]
         output_path = file[1]
-        url = f"{PROD_BASE_URL}/workbench/{workbench_name}/upload/file-url"
-        headers = {'Authorization': f'Bearer {auth_token}'}
-        data = {
-            'input_url': input_url,
-            'output_path': output_path,
-            'method': method
+        response.append(_submit_file_url(workbench_name, input_url, output_path, auth_token, method, client))
+    return response
+
+
+def upload_file_path_batch(workbench_name: str, files: List[Tuple[str, str]], auth_token: str, method: str = 'curl',
+                           client: Client = None,
+                           max_workers: int = DEFAULT_UPLOAD_WORKERS) -> Tuple[List[Tuple[Tuple[str, str], Any]],
+                                                                               List[dict]]:
+    """
+    creates download jobs for many files concurrently, dropping duplicate (url, output path) pairs. A failure does
+    not stop the other submissions.
+    :param workbench_name: name of workbench
+    :param files: list of tuples (url, output path)
+    :param auth_token: auth token provided by logging in
+    :param method: method to use to download file
+    :param client: client to send the requests with, defaults to the shared client
+    :param max_workers: maximum number of submissions in flight
+    :return: ([((url, output path), job response)] in input order, [{'input_url', 'output_path', 'error'}])
+    """
+    client = client or get_client()
+    unique_files = list(dict.fromkeys((input_url, output_path) for input_url, output_path in files))
+
+    responses = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_submit_file_url, workbench_name, input_url, output_path, auth_token, method, client):
+                (input_url, output_path)
+            for input_url, output_path in unique_files
         }
-        r = httpx.post(url, timeout=None, headers=headers, json=data)
-        if r.status_code != 200:
-            raise Exception(r.content)
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                responses[file] = future.result()
+            except Exception as e:
+                errors[file] = e
 
-        response.append(r.json())
-    return response
+    return (
+        [(file, responses[file]) for file in unique_files if file in responses],
+        [{'input_url': file[0], 'output_path': file[1], 'error': errors[file].__str__()}
+         for file in unique_files if file in errors],
+    )
 
 
-def create_bucket(workbench_name: str, auth_token: str) -> json:
+def create_bucket(workbench_name: str, auth_token: str, client: Client = None) -> json:
     """
     Creates a workbench
     :param workbench_name: name of workbench
     :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
     :return:
     """
-    url = f"{PROD_BASE_URL}/workbench/{workbench_name}"
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.post(url, timeout=None, headers=headers)
+    client = client or get_client()
+    url = f"/workbench/{workbench_name}"
+    r = client.post(url, auth_token=auth_token)
     if r.status_code != 200:
-        raise Exception(r.content)
+        raise ApiError(r.content, status_code=r.status_code)
 
     return r.json()
 
 
-def move_file(workbench_name: str, source_file: str, destination_file: str, auth_token: str) -> json:
+def move_file(workbench_name: str, source_file: str, destination_file: str, auth_token: str,
+              client: Client = None) -> json:
     """
     Moves a file in a workbench
     :param workbench_name: name of workbench
     :param source_file: full path of source file
     :param destination_file: full path of destination file
     :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
     :return:
     Cannot rename folders currently only files
     """
+    try:
+        return _move_one(workbench_name, source_file, destination_file, auth_token, client or get_client())
+    except ApiError as e:
+        return {'message': e.args[0]}
+
 
-    url = f"{PROD_BASE_URL}/workbench/{workbench_name}/move-file"
-    headers = {'Authorization': f'Bearer {auth_token}'}
+def _move_one(workbench_name: str, source_file: str, destination_file: str, auth_token: str, client: Client) -> json:
+    # raises ApiError with the detail of the error response, move_file reports it as the message instead
+    url = f"/workbench/{workbench_name}/move-file"
     data = {
         'source_file_name': source_file,
         'destination_file_name': destination_file
     }
-    r = httpx.post(url, timeout=None, headers=headers, json=data)
+    r = client.post(url, auth_token=auth_token, json=data, idempotency_key=uuid.uuid4().hex)
     if r.status_code != 200:
-        return {'message': json.loads(r.content).get('detail')}
+        try:
+            detail = r.json().get('detail')
+        except ValueError:
+            detail = r.text
+        raise ApiError(detail, status_code=r.status_code)
 
     return r.json()
 
 
-def create_directory(workbench_name: str, directory: str, auth_token: str) -> json:
+def _run_bulk(operation, items: List[tuple], max_workers: int) -> dict:
+    """
+    Calls operation(*item) for every item concurrently; a failure does not stop the others
+    :return: mapping of each failed item to its error
+    """
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(operation, *item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors[futures[future]] = e
+    return errors
+
+
+def move_files(workbench_name: str, moves: List[Tuple[str, str]], auth_token: str, client: Client = None,
+               max_workers: int = DEFAULT_BULK_WORKERS) -> List[dict]:
+    """
+    Moves many files in a workbench concurrently. A failure does not stop the other moves.
+    :param workbench_name: name of workbench
+    :param moves: list of tuples (source path, destination path)
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the requests with, defaults to the shared client
+    :param max_workers: maximum number of moves in flight
+    :return: one {'action', 'source', 'destination', 'status', 'error'} dict per move, in input order
+    """
+    client = client or get_client()
+    errors = _run_bulk(lambda source, destination: _move_one(workbench_name, source, destination, auth_token, client),
+                       moves, max_workers)
+    results = []
+    for source, destination in moves:
+        error = errors.get((source, destination))
+        results.append({'action': 'move', 'source': source, 'destination': destination,
+                        'status': 'moved' if error is None else 'failed',
+                        'error': None if error is None else error.__str__()})
+    return results
+
+
+def delete_paths(workbench_name: str, paths: List[str], auth_token: str, client: Client = None,
+                 max_workers: int = DEFAULT_BULK_WORKERS) -> List[dict]:
+    """
+    Deletes many files in a workbench concurrently. A failure does not stop the other deletes.
+    :param workbench_name: name of workbench
+    :param paths: full paths of the files
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the requests with, defaults to the shared client
+    :param max_workers: maximum number of deletes in flight
+    :return: one {'action', 'path', 'status', 'error'} dict per path, in input order
+    """
+    client = client or get_client()
+    errors = _run_bulk(lambda path: delete_path(workbench_name, path, auth_token, client),
+                       [(path,) for path in paths], max_workers)
+    results = []
+    for path in paths:
+        error = errors.get((path,))
+        results.append({'action': 'delete', 'path': path, 'status': 'deleted' if error is None else 'failed',
+                        'error': None if error is None else error.__str__()})
+    return results
+
+
+def create_directory(workbench_name: str, directory: str, auth_token: str, client: Client = None) -> json:
     """
     Creates a directory in a workbench
     :param workbench_name: name of workbench
     :param directory: full path of directory
     :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
     :return:
     """
-    url = f"{PROD_BASE_URL}/workbench/{workbench_name}/create-directory"
-    headers = {'Authorization': f'Bearer {auth_token}'}
+    client = client or get_client()
+    url = f"/workbench/{workbench_name}/create-directory"
     query_params = {
         'path': directory
     }
-    r = httpx.post(url, timeout=None, headers=headers,  params=query_params)
+    r = client.post(url, auth_token=auth_token, params=query_params)
     if r.status_code != 200:
-        raise Exception(r.content)
+        raise ApiError(r.content, status_code=r.status_code)
 
     return r.json()
 
 
-def delete_path(workbench_name: str, path: str, auth_token: str) -> json:
+def delete_path(workbench_name: str, path: str, auth_token: str, client: Client = None) -> json:
     """
     Deletes a file or directory in a workbench
     :param workbench_name: name of workbench
     :param path: full path of file or directory
     :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
     :return:
     """
-    url = f"{PROD_BASE_URL}/workbench/{workbench_name}/delete-path"
-    headers = {'Authorization': f'Bearer {auth_token}'}
+    client = client or get_client()
+    url = f"/workbench/{workbench_name}/delete-path"
     query_params = {
         'path': path
     }
-    r = httpx.delete(url, timeout=None, headers=headers,  params=query_params)
+    r = client.delete(url, auth_token=auth_token, params=query_params)
     if r.status_code != 200:
-        raise Exception(r.content)
+        raise ApiError(r.content, status_code=r.status_code)
 
     return r.json()
 
 
-def get_workbenches(auth_token: str) -> json:
+def get_workbenches(auth_token: str, client: Client = None) -> json:
     """
     Gets a list of workbenches
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the request with, defaults to the shared client
     :return:
     """
-    url = f"{PROD_BASE_URL}/workbench/me"
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.get(url, headers=headers, timeout=None)
+    client = client or get_client()
+    url = "/workbench/me"
+    r = client.get(url, auth_token=auth_token)
     if r.status_code != 200:
-        raise Exception(r.content)
+        raise ApiError(r.content, status_code=r.status_code)
 
     return r.json()
\ No newline at end of file
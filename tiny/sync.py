@@ -0,0 +1,231 @@
+import base64
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join, getsize, abspath
+from typing import List, Dict, Iterable, Optional
+
+from .settings import CACHE_DIR
+from .storage import _walk_files
+
+HASH_CACHE_PATH: str = join(CACHE_DIR, 'hashes.sqlite')
+DEFAULT_HASH_WORKERS: int = min(8, os.cpu_count() or 1)
+# hashlib releases the GIL while hashing slices this large, so threads hash files in parallel
+HASH_SLICE_SIZE: int = 8 * 1024 * 1024
+
+UP = 'up'
+DOWN = 'down'
+
+UPLOAD = 'upload'
+DOWNLOAD = 'download'
+SKIP = 'skip'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    md5 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS synced (
+    workbench TEXT NOT NULL,
+    remote_path TEXT NOT NULL,
+    md5 TEXT NOT NULL,
+    remote_updated TEXT,
+    PRIMARY KEY (workbench, remote_path)
+);
+"""
+
+
+def file_md5(path: str) -> str:
+    """
+    Hex md5 of a local file, read through mmap
+    """
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        if getsize(path) == 0:
+            return md5.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(view), HASH_SLICE_SIZE):
+                    md5.update(view[offset:offset + HASH_SLICE_SIZE])
+            finally:
+                view.release()
+    return md5.hexdigest()
+
+
+class HashCache:
+    """
+    Local file hashes keyed by path, reused while a file's size and mtime are unchanged, and the hash each
+    workbench file had when it was last synced.
+    """
+
+    def __init__(self, path: str = HASH_CACHE_PATH):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f'HashCache({self.path})'
+
+    def md5(self, path: str) -> str:
+        path = abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._db.execute('SELECT size, mtime_ns, md5 FROM hashes WHERE path = ?', (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        digest = file_md5(path)
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO hashes (path, size, mtime_ns, md5) VALUES (?, ?, ?, ?)',
+                             (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def md5_many(self, paths: Iterable[str], max_workers: int = DEFAULT_HASH_WORKERS) -> Dict[str, str]:
+        """
+        Hashes files in parallel, largest first
+        """
+        paths = sorted(set(paths), key=getsize, reverse=True)
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+            return dict(zip(paths, executor.map(self.md5, paths)))
+
+    def synced(self, workbench_name: str, remote_path: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute('SELECT md5, remote_updated FROM synced WHERE workbench = ? AND remote_path = ?',
+                                   (workbench_name, remote_path)).fetchone()
+        return {'md5': row[0], 'remote_updated': row[1]} if row else None
+
+    def record_synced(self, workbench_name: str, records: Iterable[tuple]):
+        """
+        :param records: (remote path, md5, remote updated time) tuples
+        """
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO synced (workbench, remote_path, md5, remote_updated) VALUES (?, ?, ?, ?)',
+                ((workbench_name, remote_path, md5, updated) for remote_path, md5, updated in records)
+            )
+
+    def close(self):
+        self._db.close()
+
+
+_default_hash_cache: Optional[HashCache] = None
+_default_hash_cache_lock = threading.Lock()
+
+
+def get_hash_cache() -> HashCache:
+    global _default_hash_cache
+    with _default_hash_cache_lock:
+        if _default_hash_cache is None:
+            _default_hash_cache = HashCache()
+        return _default_hash_cache
+
+
+def remote_md5(entry: dict) -> Optional[str]:
+    """
+    Hex md5 of a listing entry when the server supplies one, hex or base64 encoded
+    """
+    for key in ('md5', 'md5_hash', 'md5Hash', 'content_md5'):
+        digest = entry.get(key)
+        if not digest:
+            continue
+        if len(digest) == 32:
+            return digest.lower()
+        try:
+            return base64.b64decode(digest).hex()
+        except ValueError:
+            continue
+    return None
+
+
+def remote_size(entry: dict) -> Optional[int]:
+    size = entry.get('size')
+    if isinstance(size, int):
+        return size
+    if isinstance(size, str) and size.isdigit():
+        return int(size)
+    # sizes like '1.0 GB' are for display only
+    return None
+
+
+def remote_updated(entry: dict) -> Optional[str]:
+    return entry.get('updated') or entry.get('updated_at')
+
+
+def plan_sync(workbench_name: str, local_dir: str, remote_prefix: str, remote_entries: Iterable[dict],
+              direction: str = UP, hash_cache: HashCache = None,
+              hash_workers: int = DEFAULT_HASH_WORKERS) -> List[dict]:
+    """
+    Compares a local directory with the files under a workbench prefix. Files are the same when the server
+    checksum matches the local hash, or, without a server checksum, when neither side changed since they were last
+    synced. Local files are only hashed when sizes do not already tell them apart.
+    :param workbench_name: name of workbench
+    :param local_dir: local directory
+    :param remote_prefix: workbench directory, ending with '/'
+    :param remote_entries: listing entries under remote_prefix
+    :param direction: UP makes the workbench match local_dir, DOWN makes local_dir match the workbench
+    :param hash_cache: cache of local hashes, defaults to the shared one
+    :param hash_workers: number of files hashed at once
+    :return: one {'action', 'local_path', 'remote_path', 'reason'} dict per file, action being UPLOAD, DOWNLOAD or
+        SKIP; files only present at the destination are left alone
+    """
+    if direction not in (UP, DOWN):
+        raise ValueError(f"Invalid direction {direction}, expected '{UP}' or '{DOWN}'")
+    hash_cache = hash_cache or get_hash_cache()
+    transfer = UPLOAD if direction == UP else DOWNLOAD
+
+    remote = {entry['name'][len(remote_prefix):]: entry for entry in remote_entries
+              if entry.get('name', '').startswith(remote_prefix) and not entry['name'].endswith('/')}
+    local = {relative_path: join(local_dir, *relative_path.split('/'))
+             for relative_path in (_walk_files(local_dir) if os.path.isdir(local_dir) else [])}
+
+    relative_paths = sorted(remote) if direction == DOWN else sorted(local)
+    plan = []
+    needs_hash = []
+    for relative_path in relative_paths:
+        local_path = local.get(relative_path) or join(local_dir, *relative_path.split('/'))
+        item = {'action': transfer, 'local_path': local_path, 'remote_path': remote_prefix + relative_path,
+                'reason': None}
+        plan.append(item)
+        entry = remote.get(relative_path)
+        if relative_path not in local:
+            item['reason'] = 'missing locally'
+        elif entry is None:
+            item['reason'] = 'missing remotely'
+        elif remote_size(entry) is not None and remote_size(entry) != getsize(local_path):
+            item['reason'] = 'size differs'
+        else:
+            needs_hash.append(item)
+
+    hashes = hash_cache.md5_many([item['local_path'] for item in needs_hash], max_workers=hash_workers)
+    for item in needs_hash:
+        digest = hashes[item['local_path']]
+        entry = remote[item['remote_path'][len(remote_prefix):]]
+        server_md5 = remote_md5(entry)
+        if server_md5:
+            same = server_md5 == digest
+            item['reason'] = 'checksum matches' if same else 'checksum differs'
+        else:
+            last_sync = hash_cache.synced(workbench_name, item['remote_path'])
+            if last_sync is None:
+                same = False
+                item['reason'] = 'not synced before'
+            elif last_sync['remote_updated'] != remote_updated(entry):
+                same = False
+                item['reason'] = 'changed remotely'
+            else:
+                same = last_sync['md5'] == digest
+                item['reason'] = 'unchanged since last sync' if same else 'changed locally'
+        if same:
+            item['action'] = SKIP
+    return plan
@@ -0,0 +1,362 @@
+import base64
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os.path import getsize, getmtime, abspath, join, exists
+from typing import Optional
+
+import httpx
+
+from . import instrumentation
+from .client import Client, get_client, TRANSFER_TIMEOUT
+from .errors import ApiError
+from .settings import CACHE_DIR
+
+DEFAULT_PART_SIZE: int = 16 * 1024 * 1024
+DEFAULT_PART_WORKERS: int = 4
+UPLOAD_CHECKPOINT_DIR: str = join(CACHE_DIR, 'uploads')
+
+
+class _Checkpoint:
+    """
+    Local record of the parts of a multipart upload the server has acknowledged
+    """
+
+    def __init__(self, path: str, state: dict):
+        self.path = path
+        self.state = state
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, workbench_name: str, source_file_name: str, destination: str, part_size: int) -> '_Checkpoint':
+        key = hashlib.sha1(f'{workbench_name}:{abspath(source_file_name)}:{destination}'.encode()).hexdigest()
+        path = join(UPLOAD_CHECKPOINT_DIR, f'{key}.json')
+        expected = {
+            'workbench_name': workbench_name,
+            'source': abspath(source_file_name),
+            'destination': destination,
+            'size': getsize(source_file_name),
+            'mtime': getmtime(source_file_name),
+            'part_size': part_size,
+        }
+        if exists(path):
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+                # the local file changed since the interrupted upload, start over
+                if all(state.get(k) == v for k, v in expected.items()):
+                    return cls(path, state)
+            except ValueError:
+                pass
+        return cls(path, dict(expected, upload_id=None, parts={}))
+
+    @property
+    def upload_id(self) -> Optional[str]:
+        return self.state.get('upload_id')
+
+    @property
+    def parts(self) -> dict:
+        return self.state['parts']
+
+    def start(self, upload_id: str):
+        self.state['upload_id'] = upload_id
+        self.state['parts'] = {}
+        self._save()
+
+    def acknowledge(self, part_number: int, etag: str):
+        with self._lock:
+            self.state['parts'][str(part_number)] = etag
+            self._save()
+
+    def _save(self):
+        os.makedirs(UPLOAD_CHECKPOINT_DIR, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if exists(self.path):
+            os.remove(self.path)
+
+    def clear(self):
+        self.state['upload_id'] = None
+        self.state['parts'] = {}
+        self.remove()
+
+
+def _start_multipart_upload(workbench_name: str, destination: str, size: int, part_size: int, auth_token: str,
+                            client: Client) -> str:
+    url = f"/workbench/{workbench_name}/upload/multipart"
+    data = {'destination': destination, 'size': size, 'part_size': part_size}
+    r = client.post(url, auth_token=auth_token, json=data, idempotency_key=uuid.uuid4().hex)
+    if r.status_code != 200:
+        raise ApiError(f"Error starting upload of {destination} to workbench {workbench_name}: {r.text}",
+                       status_code=r.status_code)
+    return r.json().get('upload_id')
+
+
+def _upload_part(workbench_name: str, upload_id: str, part_number: int, content: bytes, auth_token: str,
+                 client: Client) -> str:
+    url = f"/workbench/{workbench_name}/upload/multipart/{upload_id}/parts/{part_number}"
+    headers = {'Content-Type': 'application/octet-stream'}
+    r = client.put(url, auth_token=auth_token, content=content, headers=headers, timeout=TRANSFER_TIMEOUT)
+    if r.status_code != 200:
+        raise ApiError(f"Error uploading part {part_number} of upload {upload_id}: {r.text}", status_code=r.status_code)
+    return r.json().get('etag') or r.headers.get('etag', '')
+
+
+def _complete_multipart_upload(workbench_name: str, upload_id: str, parts: dict, auth_token: str,
+                               client: Client) -> dict:
+    url = f"/workbench/{workbench_name}/upload/multipart/{upload_id}/complete"
+    data = {'parts': [{'part_number': int(n), 'etag': etag} for n, etag in sorted(parts.items(), key=lambda p: int(p[0]))]}
+    # completing the same parts twice yields the same object
+    r = client.post(url, auth_token=auth_token, json=data, idempotent=True)
+    if r.status_code != 200:
+        raise ApiError(f"Error completing upload {upload_id} to workbench {workbench_name}: {r.text}",
+                       status_code=r.status_code)
+    return r.json()
+
+
+def upload_chunked(workbench_name: str, source_file_name: str, destination: str, auth_token: str,
+                   client: Client = None, part_size: int = DEFAULT_PART_SIZE,
+                   max_workers: int = DEFAULT_PART_WORKERS) -> dict:
+    """
+    Uploads a file in fixed size parts read from a memory map, several parts at a time. Acknowledged parts are
+    checkpointed locally so an interrupted upload resumes from where it stopped when called again, or starts over
+    if the server no longer knows the interrupted upload.
+    :param workbench_name: name of workbench
+    :param source_file_name: local path of the file
+    :param destination: full path of the file on the workbench
+    :param auth_token: auth token provided by logging in
+    :param client: client to send the requests with, defaults to the shared client
+    :param part_size: size of each part in bytes
+    :param max_workers: maximum number of parts in flight
+    :return:
+    """
+    client = client or get_client()
+    checkpoint = _Checkpoint.load(workbench_name, source_file_name, destination, part_size)
+    resumed = bool(checkpoint.upload_id)
+    try:
+        return _upload_parts(workbench_name, source_file_name, checkpoint, auth_token, client, max_workers)
+    except ApiError as e:
+        # the server no longer knows the checkpointed upload, e.g. it expired, so resuming it can never succeed
+        if not resumed or e.status_code != 404:
+            raise
+        print(f'Upload {checkpoint.upload_id} of {source_file_name} is gone from the server, starting over')
+    checkpoint.clear()
+    return _upload_parts(workbench_name, source_file_name, checkpoint, auth_token, client, max_workers)
+
+
+def _upload_parts(workbench_name: str, source_file_name: str, checkpoint: _Checkpoint, auth_token: str,
+                  client: Client, max_workers: int) -> dict:
+    # sends the parts the checkpoint has no acknowledgement for, starting the upload first when it has none
+    destination = checkpoint.state['destination']
+    size = checkpoint.state['size']
+    part_size = checkpoint.state['part_size']
+    if not checkpoint.upload_id:
+        checkpoint.start(_start_multipart_upload(workbench_name, destination, size, part_size, auth_token, client))
+
+    part_count = max(1, -(-size // part_size))
+    pending = [n for n in range(1, part_count + 1) if str(n) not in checkpoint.parts]
+    if len(pending) < part_count:
+        print(f'Resuming upload of {source_file_name} to {workbench_name} '
+              f'({part_count - len(pending)}/{part_count} parts already uploaded)')
+    else:
+        print(f'Uploading {source_file_name} to {workbench_name} in {part_count} parts')
+
+    with open(source_file_name, 'rb') as f:
+        # mmap cannot map an empty file
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        try:
+            def send(part_number: int):
+                start = (part_number - 1) * part_size
+                etag = _upload_part(workbench_name, checkpoint.upload_id, part_number,
+                                    view[start:start + part_size], auth_token, client)
+                checkpoint.acknowledge(part_number, etag)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(send, part_number) for part_number in pending]
+                for future in as_completed(futures):
+                    future.result()
+        finally:
+            if size:
+                view.close()
+
+    response = _complete_multipart_upload(workbench_name, checkpoint.upload_id, checkpoint.parts, auth_token, client)
+    checkpoint.remove()
+    return response
+
+
+def _content_range_total(content_range: str) -> Optional[int]:
+    # bytes 0-0/12345
+    total = content_range.rsplit('/', 1)[-1] if content_range else '*'
+    return int(total) if total.isdigit() else None
+
+
+def _empty_object(response: httpx.Response) -> bool:
+    """
+    True when a 'bytes=0-0' probe was refused because the object is empty: a 416 with 'Content-Range: bytes */0',
+    or without a body when the server leaves the header out
+    """
+    if response.status_code != 416:
+        return False
+    total = _content_range_total(response.headers.get('content-range'))
+    return total == 0 or (total is None and not response.read())
+
+
+def _remote_md5(headers) -> Optional[str]:
+    """
+    Reads the object md5 advertised by the storage backend, hex encoded
+    """
+    # Content-MD5 of a range response describes the range, not the object
+    hashes = [] if headers.get('content-range') else [headers.get('content-md5', '')]
+    # x-goog-hash: crc32c=n03x6A==, md5=Ojk9c3dhfxgoKVVHYwFbHQ==
+    for value in headers.get('x-goog-hash', '').split(','):
+        name, _, digest = value.strip().partition('=')
+        if name == 'md5':
+            hashes.append(digest)
+    for digest in hashes:
+        if digest:
+            return base64.b64decode(digest).hex()
+    return None
+
+
+def _file_md5(path: str) -> str:
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+class _DownloadState:
+    """
+    Sidecar record of the ranges already written to a partial download
+    """
+
+    def __init__(self, path: str, size: int, etag: str):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.parts = set()
+        self._lock = threading.Lock()
+        if exists(path):
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+                if state.get('size') == size and state.get('etag') == etag:
+                    self.parts = set(state.get('parts', []))
+            except ValueError:
+                pass
+
+    def done(self, index: int):
+        with self._lock:
+            self.parts.add(index)
+            with open(self.path, 'w') as f:
+                json.dump({'size': self.size, 'etag': self.etag, 'parts': sorted(self.parts)}, f)
+
+    def remove(self):
+        if exists(self.path):
+            os.remove(self.path)
+
+    def clear(self):
+        self.state['upload_id'] = None
+        self.state['parts'] = {}
+        self.remove()
+
+
+def download_ranged(url: str, destination: str, client: Client = None, part_size: int = DEFAULT_PART_SIZE,
+                    max_workers: int = DEFAULT_PART_WORKERS, verify: bool = False, md5: str = None) -> str:
+    """
+    Downloads a url into a local file with concurrent range requests. Bytes land in a preallocated
+    '<destination>.part' file which survives interruptions, so calling again fetches only the missing ranges.
+    :param url: download url, usually the signed url returned by download_file
+    :param destination: local path of the file
+    :param client: client to send the requests with, defaults to the shared client
+    :param part_size: size of each range request in bytes
+    :param max_workers: maximum number of ranges in flight
+    :param verify: check the finished file against the md5 advertised by the server (or md5), else its size
+    :param md5: expected hex md5 of the file
+    :return: destination
+    """
+    client = client or get_client()
+    partial_path = destination + '.part'
+    parent = os.path.dirname(destination)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+    with client.stream('GET', url, headers={'Range': 'bytes=0-0'}) as probe:
+        empty = _empty_object(probe)
+        if probe.status_code not in (200, 206) and not empty:
+            raise ApiError(f"Error downloading {destination}: {probe.status_code}", status_code=probe.status_code)
+        headers = probe.headers
+        size = _content_range_total(headers.get('content-range')) if probe.status_code == 206 else None
+        if empty:
+            open(partial_path, 'wb').close()
+            size = 0
+            ranges = []
+        elif size is None:
+            # no range support, take the body as it comes
+            with open(partial_path, 'wb') as f:
+                for chunk in probe.iter_bytes():
+                    f.write(chunk)
+            size = os.path.getsize(partial_path)
+            ranges = []
+        else:
+            ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+    state = _DownloadState(partial_path + '.json', size, headers.get('etag', ''))
+    if ranges:
+        if not state.parts or not exists(partial_path):
+            state.parts = set()
+        with open(partial_path, 'r+b' if exists(partial_path) else 'wb') as f:
+            f.truncate(size)
+
+        def fetch_range(start: int, end: int):
+            with client.stream('GET', url, headers={'Range': f'bytes={start}-{end}'}, timeout=TRANSFER_TIMEOUT) as r:
+                if r.status_code != 206:
+                    raise ApiError(f"Error downloading bytes {start}-{end} of {destination}: {r.status_code}",
+                                   status_code=r.status_code)
+                with open(partial_path, 'r+b') as f:
+                    f.seek(start)
+                    for chunk in r.iter_bytes():
+                        f.write(chunk)
+
+        def fetch(index: int):
+            # streams are not retried by the client, a range can simply be fetched again
+            start, end = ranges[index]
+            policy = client.retry_policy
+            for attempt in range(policy.max_retries + 1):
+                try:
+                    fetch_range(start, end)
+                    break
+                except (httpx.TransportError, ApiError) as e:
+                    if attempt == policy.max_retries or (isinstance(e, ApiError) and not e.transient):
+                        raise
+                    instrumentation.record_retry('GET', url)
+                    time.sleep(policy.delay(attempt))
+            state.done(index)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fetch, index) for index in range(len(ranges)) if index not in state.parts]
+            for future in as_completed(futures):
+                future.result()
+
+    if verify:
+        expected = md5 or _remote_md5(headers)
+        if expected and _file_md5(partial_path) != expected:
+            state.remove()
+            os.remove(partial_path)
+            raise Exception(f"Checksum mismatch downloading {destination}")
+        if os.path.getsize(partial_path) != size:
+            raise Exception(f"Size mismatch downloading {destination}")
+
+    os.replace(partial_path, destination)
+    state.remove()
+    return destination
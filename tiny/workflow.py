@@ -1,17 +1,25 @@
 import enum
 import json
+import uuid
+from typing import List, Optional, Iterator, Tuple
 
 import httpx
 
-from .settings import PROD_BASE_URL
+from .client import Client, get_client
+from .errors import ApiError
 
+DEFAULT_LOG_CONNECT_TIMEOUT: float = 30.0
+DEFAULT_LOG_READ_TIMEOUT: float = 300.0
 
-def execute_workflow(workbench_name: str, arguments: dict, auth_token: str) -> json:
-    url = f'{PROD_BASE_URL}/workbench/{workbench_name}/run'
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.post(url=url, json=arguments, timeout=None, headers=headers)
+
+def execute_workflow(workbench_name: str, arguments: dict, auth_token: str, client: Client = None,
+                     idempotency_key: str = None) -> json:
+    client = client or get_client()
+    url = f'/workbench/{workbench_name}/run'
+    # the key lets a retried submission be recognized instead of starting a second job
+    r = client.post(url, auth_token=auth_token, json=arguments, idempotency_key=idempotency_key or uuid.uuid4().hex)
     if r.status_code != 200:
-        raise Exception(f'Failed to execute job: {r.text}')
+        raise ApiError(f'Failed to execute job: {r.text}', status_code=r.status_code)
     return r.json()
 
 
@@ -50,32 +58,123 @@ class JobStatus(enum.Enum):
         return rep_map.get(self.value)
 
 
-def get_job(job_id: str, workbench_name: str, auth_token: str) -> json:
-    url = f'{PROD_BASE_URL}/{workbench_name}/jobs/{job_id}'
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.get(url=url, timeout=None, headers=headers)
+TERMINAL_STATUSES = [JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.DELETION_IN_PROGRESS]
+
+
+def get_job(job_id: str, workbench_name: str, auth_token: str, client: Client = None) -> json:
+    client = client or get_client()
+    url = f'/{workbench_name}/jobs/{job_id}'
+    r = client.get(url, auth_token=auth_token)
     if r.status_code != 200:
         return r.content
     state = r.json().get('state')
     return JobStatus(state)
 
 
-def get_job_logs(job_id: str, workbench_name: str, auth_token: str) -> json:
-    url = f'{PROD_BASE_URL}/{workbench_name}/jobs/{job_id}/logs'
-    headers = {'Authorization': f'Bearer {auth_token}'}
-    r = httpx.get(url=url, timeout=None, headers=headers)
+def get_tool_versions(client: Client = None) -> dict:
+    """
+    Versions the api currently runs each available tool with
+    :return: mapping of tool name to version, empty when the api does not report versions
+    """
+    client = client or get_client()
+    r = client.get('/available-tools')
     if r.status_code != 200:
-        raise Exception(f'Failed to get job logs: {r.text}')
+        raise ApiError(f'Failed to get available tools: {r.text}', status_code=r.status_code)
+    tools = r.json()
+    if isinstance(tools, dict):
+        tools = tools.get('tools', tools)
+    if isinstance(tools, dict):
+        return {name: tool.get('version') if isinstance(tool, dict) else tool for name, tool in tools.items()}
+    versions = {}
+    for tool in tools if isinstance(tools, list) else []:
+        if isinstance(tool, dict) and (tool.get('name') or tool.get('tool')):
+            versions[tool.get('name') or tool.get('tool')] = tool.get('version')
+    return versions
+
+
+def get_jobs(job_ids: List[str], workbench_name: str, auth_token: str, client: Client = None) -> Optional[dict]:
+    """
+    Fetches the status of several jobs in one request
+    :return: mapping of job id to JobStatus, or None when the api has no bulk status endpoint
+    """
+    client = client or get_client()
+    url = f'/{workbench_name}/jobs/status'
+    r = client.post(url, auth_token=auth_token, json={'job_ids': job_ids})
+    if r.status_code in (404, 405):
+        return None
+    if r.status_code != 200:
+        raise ApiError(f'Failed to get job statuses: {r.text}', status_code=r.status_code)
+    jobs = r.json()
+    if isinstance(jobs, dict):
+        jobs = [{'id': job_id, 'state': state} for job_id, state in jobs.items()]
+    return {job.get('id'): JobStatus(job.get('state')) for job in jobs}
+
+
+def get_job_logs(job_id: str, workbench_name: str, auth_token: str, client: Client = None) -> json:
+    client = client or get_client()
+    url = f'/{workbench_name}/jobs/{job_id}/logs'
+    r = client.get(url, auth_token=auth_token)
+    if r.status_code != 200:
+        raise ApiError(f'Failed to get job logs: {r.text}', status_code=r.status_code)
     return r.json()
 
-def stream_job_logs(job_id: str, workbench_name: str, auth_token: str) -> json:
-    url = f'{PROD_BASE_URL}/{workbench_name}/jobs/{job_id}/logs/stream'
-    headers = {
-        'Authorization': f'Bearer {auth_token}',
-    }
-    with httpx.stream('GET', url, headers=headers) as r:
-        try:
-            for chunk in r.iter_raw():  # or, for line in r.iter_lines():
-                print(chunk.decode('utf-8').strip())
-        except Exception as e:
-            print(f"Stream Ended: no more logs to stream.")
\ No newline at end of file
+def _take_lines(buffer: bytearray, position: int) -> Tuple[List[Tuple[int, bytes]], int]:
+    # removes the complete lines from buffer, splitting on the newline byte, which never occurs inside a
+    # multibyte utf-8 sequence
+    lines = []
+    start = 0
+    while True:
+        end = buffer.find(b'\n', start)
+        if end < 0:
+            break
+        position += end + 1 - start
+        lines.append((position, bytes(buffer[start:end])))
+        start = end + 1
+    del buffer[:start]
+    return lines, position
+
+
+def iter_job_log_lines(job_id: str, workbench_name: str, auth_token: str, offset: int = 0, client: Client = None,
+                       read_timeout: float = DEFAULT_LOG_READ_TIMEOUT,
+                       flush_partial: bool = False) -> Iterator[Tuple[int, bytes]]:
+    """
+    Streams a job's log once, from byte offset until the server closes the stream
+    :param offset: byte offset to resume from, sent as a Range header
+    :param read_timeout: seconds without data before httpx.ReadTimeout is raised
+    :param flush_partial: also yield a trailing line that has no newline yet, e.g. once the job finished
+    :return: (offset after the line, line without its newline) for every complete line, so a caller can resume
+        from the last offset it handled
+    """
+    client = client or get_client()
+    url = f'/{workbench_name}/jobs/{job_id}/logs/stream'
+    headers = {'Range': f'bytes={offset}-'} if offset else None
+    timeout = httpx.Timeout(DEFAULT_LOG_CONNECT_TIMEOUT, read=read_timeout)
+    with client.stream('GET', url, auth_token=auth_token, headers=headers, timeout=timeout) as r:
+        if r.status_code == 416:
+            # nothing past offset yet
+            return
+        if r.status_code not in (200, 206):
+            r.read()
+            raise ApiError(f'Failed to stream job logs: {r.text}', status_code=r.status_code)
+        # a server that ignores Range resends the log from the start
+        skip = offset if r.status_code == 200 else 0
+        position = offset
+        buffer = bytearray()
+        for chunk in r.iter_bytes():
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk = chunk[skip:]
+                skip = 0
+            buffer.extend(chunk)
+            lines, position = _take_lines(buffer, position)
+            yield from lines
+        if flush_partial and buffer:
+            yield position + len(buffer), bytes(buffer)
+
+
+def stream_job_logs(job_id: str, workbench_name: str, auth_token: str, client: Client = None) -> json:
+    client = client or get_client()
+    for _, line in iter_job_log_lines(job_id, workbench_name, auth_token, client=client, flush_partial=True):
+        print(line.decode('utf-8', errors='replace').rstrip('\r'))